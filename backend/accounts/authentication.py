@@ -0,0 +1,143 @@
+"""
+JWT authentication that resolves request.user without a query per request.
+
+Users are looked up in a bounded in-process LRU, then in the shared cache
+(Redis when REDIS_CACHE_URL is set), and only then in the database. Only
+the fields the API reads per request are cached (never the password hash).
+The resolved user is a model instance with every other field deferred, so
+reading one of them loads it, and saving the instance only writes the
+loaded fields.
+
+Saving or deleting a User drops its shared entry and the entry in the
+writing process's LRU. Other processes may keep their LRU copy for up to
+JWT_USER_CACHE_LOCAL_TTL seconds, which bounds how long a deactivated user
+or revoked staff flag can still be honoured there.
+
+With JWT_USER_CLAIMS enabled, issued tokens also carry ``is_staff`` and
+``is_superuser`` so clients can read the role without a request. The
+server never trusts them: authorization uses the resolved user.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+User = get_user_model()
+
+CACHED_USER_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name',
+    'is_active', 'is_staff', 'is_superuser', 'created_at',
+)
+USER_CLAIMS = ('is_staff', 'is_superuser')
+
+
+class _LocalUserCache:
+    """Thread-safe LRU of user field values with a per-entry TTL"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires, values = entry
+            if expires < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return values
+
+    def set(self, user_id, values):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + settings.JWT_USER_CACHE_LOCAL_TTL, values)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > settings.JWT_USER_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+local_user_cache = _LocalUserCache()
+
+
+def _shared_key(user_id):
+    return f'jwt-user:{user_id}'
+
+
+def _load_values(user_id):
+    values = local_user_cache.get(user_id)
+    if values is not None:
+        return values
+    values = cache.get(_shared_key(user_id))
+    if values is None:
+        values = User.objects.filter(pk=user_id).values_list(*CACHED_USER_FIELDS).first()
+        if values is None:
+            return None
+        cache.set(_shared_key(user_id), values, settings.JWT_USER_CACHE_TIMEOUT)
+    local_user_cache.set(user_id, values)
+    return values
+
+
+def resolve_user(user_id):
+    """The user with ``user_id`` (other fields deferred), or None"""
+    values = _load_values(user_id)
+    if values is None:
+        return None
+    # from_db() expects the values in model field order
+    fields = dict(zip(CACHED_USER_FIELDS, values))
+    names = [field.attname for field in User._meta.concrete_fields if field.attname in fields]
+    return User.from_db('default', names, [fields[name] for name in names])
+
+
+def _forget(user_id):
+    cache.delete(_shared_key(user_id))
+    local_user_cache.discard(user_id)
+
+
+def invalidate_user(user_id):
+    """Drop the cached copy of a user; runs now and again after commit"""
+    # Forgetting now keeps this process from reading its own stale copy
+    # mid-transaction; forgetting after commit drops copies cached meanwhile
+    _forget(user_id)
+    transaction.on_commit(lambda: _forget(user_id))
+
+
+def add_user_claims(token, user):
+    """Embed the role flags in ``token`` when JWT_USER_CLAIMS is enabled"""
+    if settings.JWT_USER_CLAIMS:
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+    return token
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication whose user lookup goes through resolve_user()"""
+
+    def get_user(self, validated_token):
+        if getattr(api_settings, 'CHECK_REVOKE_TOKEN', False):
+            # Revocation compares against the password hash, which is never cached
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        user = resolve_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
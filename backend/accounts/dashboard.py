@@ -0,0 +1,118 @@
+"""
+Everything the patient home screen shows, in one response.
+
+dashboard_state() runs three aggregate queries (daily rollups, medications,
+insights) that give both the summary stats and the validators for
+conditional GET: any reading, health factor, medication or insight write
+changes a row count or a latest updated_at. When the client's copy is still
+current the view answers 304 without loading any rows; otherwise
+build_dashboard() adds one query per list (plus one for archived readings).
+"""
+from datetime import timedelta
+
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+from health_factors.models import HealthFactor
+from health_factors.serializers import HealthFactorSerializer
+from insights.models import UserInsight
+from insights.serializers import UserInsightSerializer
+from itaku_backend.conditional import make_etag
+from medications.models import Medication
+from medications.serializers import MedicationSerializer
+from readings.archive import ArchivedReadings
+from readings.models import BP_CATEGORY_CHOICES, BloodPressureReading, DailyRollup
+from readings.serializers import BloodPressureReadingSerializer
+
+RECENT_READINGS = 20
+RECENT_FACTORS = 20
+UNREAD_INSIGHTS = 20
+STATS_DAYS = 30
+
+
+def _average(total, count):
+    return round(total / count, 1) if count else None
+
+
+def dashboard_state(user):
+    """
+    Return ``(etag, last_modified, stats)`` for the user's dashboard. The
+    ETag also changes with the day, since the stats cover the last
+    STATS_DAYS days.
+    """
+    today = timezone.localdate()
+    recent = Q(date__gt=today - timedelta(days=STATS_DAYS))
+    rollups = DailyRollup.objects.filter(user=user).aggregate(
+        rows=Count('id'),
+        latest=Max('updated_at'),
+        total=Sum('reading_count'),
+        readings=Sum('reading_count', filter=recent),
+        systolic_sum=Sum('systolic_sum', filter=recent),
+        diastolic_sum=Sum('diastolic_sum', filter=recent),
+        heart_rate_count=Sum('heart_rate_count', filter=recent),
+        heart_rate_sum=Sum('heart_rate_sum', filter=recent),
+        **{category: Sum(f'{category}_count', filter=recent) for category, _ in BP_CATEGORY_CHOICES},
+    )
+    medications = Medication.objects.filter(user=user).aggregate(rows=Count('id'), latest=Max('updated_at'))
+    insights = UserInsight.objects.filter(user=user).aggregate(
+        rows=Count('id'),
+        latest=Max('updated_at'),
+        unread=Count('id', filter=Q(is_read=False)),
+    )
+
+    readings = rollups['readings'] or 0
+    stats = {
+        'total_readings': rollups['total'] or 0,
+        'unread_insights': insights['unread'],
+        f'last_{STATS_DAYS}_days': {
+            'readings': readings,
+            'systolic_avg': _average(rollups['systolic_sum'], readings),
+            'diastolic_avg': _average(rollups['diastolic_sum'], readings),
+            'heart_rate_avg': _average(rollups['heart_rate_sum'], rollups['heart_rate_count']),
+            'categories': {category: rollups[category] or 0 for category, _ in BP_CATEGORY_CHOICES},
+        },
+    }
+    etag = make_etag(
+        user.id, today,
+        rollups['rows'], rollups['latest'],
+        medications['rows'], medications['latest'],
+        insights['rows'], insights['latest'],
+    )
+    latest = [value for value in (rollups['latest'], medications['latest'], insights['latest']) if value]
+    return etag, max(latest) if latest else None, stats
+
+
+def build_dashboard(request, stats):
+    """The dashboard payload for request.user; one query per list"""
+    user = request.user
+    context = {'request': request}
+    readings = list(
+        BloodPressureReading.objects.filter(user=user).select_related('user')
+        .order_by('-recorded_at', '-id')[:RECENT_READINGS]
+    )
+    # Users whose history is mostly archived still see their latest readings
+    archived = ArchivedReadings().filter(user_id=user.id).page(['-recorded_at', '-id'], None, False, RECENT_READINGS)
+    if archived:
+        for reading in archived:
+            reading.user = user
+        readings = sorted(readings + archived, key=lambda reading: (reading.recorded_at, reading.id), reverse=True)
+        readings = readings[:RECENT_READINGS]
+    factors = (
+        HealthFactor.objects.filter(user=user).select_related('user')
+        .order_by('-date', '-id')[:RECENT_FACTORS]
+    )
+    medications = (
+        Medication.objects.filter(user=user, is_active=True).select_related('user')
+        .order_by('-start_date', '-id')
+    )
+    insights = (
+        UserInsight.objects.filter(user=user, is_read=False).select_related('user')
+        .order_by('-generated_at', '-id')[:UNREAD_INSIGHTS]
+    )
+    return {
+        'readings': BloodPressureReadingSerializer(readings, many=True, context=context).data,
+        'health_factors': HealthFactorSerializer(factors, many=True, context=context).data,
+        'active_medications': MedicationSerializer(medications, many=True, context=context).data,
+        'unread_insights': UserInsightSerializer(insights, many=True, context=context).data,
+        'stats': stats,
+    }
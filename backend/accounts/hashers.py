@@ -0,0 +1,19 @@
+"""
+Password hasher with a work factor set from settings.
+
+PASSWORD_PBKDF2_ITERATIONS sets the PBKDF2 iteration count. Hashes store
+their own count, so existing passwords keep verifying after it changes.
+Django rehashes a password at the new count on the next successful login
+(see User.check_password), so raising or lowering it takes effect as users
+sign in.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with PASSWORD_PBKDF2_ITERATIONS iterations"""
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
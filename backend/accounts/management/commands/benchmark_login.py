@@ -0,0 +1,90 @@
+"""
+Django management command to benchmark login throughput.
+
+Posts credentials to the token endpoint for a throwaway user (created in a
+transaction that is rolled back) at each PBKDF2 iteration count, and
+compares the login time with the cost of one password hash. A login that
+hashes once costs about one hash plus token signing; the old path, which
+checked the password and then authenticated again, cost two.
+
+Usage: python manage.py benchmark_login --logins 20 --iterations 600000 260000
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from itaku_backend.urls import CustomTokenObtainPairView
+
+User = get_user_model()
+
+EMAIL = 'login-benchmark@example.com'
+PASSWORD = 'benchmark-Passw0rd!'
+
+
+def _time_hash(user, count):
+    started = time.perf_counter()
+    for _ in range(count):
+        user.check_password(PASSWORD)
+    return (time.perf_counter() - started) / count
+
+
+def _time_logins(count):
+    view = CustomTokenObtainPairView.as_view()
+    factory = APIRequestFactory()
+    started = time.perf_counter()
+    for _ in range(count):
+        response = view(factory.post('/api/token/', {'email': EMAIL, 'password': PASSWORD}, format='json'))
+        if response.status_code != 200:
+            raise CommandError(f'Login failed with status {response.status_code}: {response.data}')
+    return (time.perf_counter() - started) / count
+
+
+class Command(BaseCommand):
+    help = 'Benchmark login throughput against the password hashing cost'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--logins',
+            type=int,
+            default=20,
+            help='Number of logins timed per iteration count (default: 20)',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            nargs='+',
+            default=None,
+            help='PBKDF2 iteration counts to compare (default: PASSWORD_PBKDF2_ITERATIONS)',
+        )
+
+    def handle(self, *args, **options):
+        count = options['logins']
+        iterations = options['iterations'] or [settings.PASSWORD_PBKDF2_ITERATIONS]
+
+        self.stdout.write(self.style.SUCCESS('='*60))
+        self.stdout.write(self.style.SUCCESS('Login Throughput Benchmark'))
+        self.stdout.write(self.style.SUCCESS('='*60))
+        self.stdout.write(
+            f"{'iterations':>10} {'hash ms':>9} {'login ms':>9} {'logins/s':>9} {'hashes/login':>13}"
+        )
+
+        with transaction.atomic():
+            for value in iterations:
+                with override_settings(PASSWORD_PBKDF2_ITERATIONS=value):
+                    user, _ = User.objects.get_or_create(email=EMAIL, defaults={'username': EMAIL})
+                    user.set_password(PASSWORD)
+                    user.save()
+                    hash_seconds = _time_hash(user, count)
+                    login_seconds = _time_logins(count)
+                self.stdout.write(
+                    f'{value:>10,} {hash_seconds * 1000:>9.1f} {login_seconds * 1000:>9.1f} '
+                    f'{1 / login_seconds:>9.1f} {login_seconds / hash_seconds:>13.2f}'
+                )
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark complete (benchmark user rolled back)'))
@@ -0,0 +1,177 @@
+"""
+Refresh token revocation list in Redis, fronted by an in-process Bloom
+filter.
+
+Revoking a token sets ``revoked-jti:<jti>`` in Redis (SET NX, expiring
+when the token does) and appends the jti to a sorted set used as a log.
+Each process keeps a Bloom filter of the logged jtis and pulls new log
+entries at most every TOKEN_REVOCATION_SYNC_SECONDS. Checking a token that
+is not in the filter, the common case, needs no Redis call. A hit in the
+filter is confirmed against the per-jti key, since Bloom filters have
+false positives.
+
+Rotation revokes the old refresh token with SET NX. Of two refreshes
+racing with the same token, only one succeeds, even before the other
+process's filter has synced. Only the check for a token revoked elsewhere
+can lag, by up to TOKEN_REVOCATION_SYNC_SECONDS.
+
+The Redis client is created from TOKEN_REVOCATION_REDIS_URL. Tests can
+pass any redis-py compatible client (such as fakeredis.FakeRedis()) to
+set_revocation_client().
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+
+import redis
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+logger = logging.getLogger(__name__)
+
+REVOKED_KEY_PREFIX = 'revoked-jti:'
+REVOCATION_LOG_KEY = 'revoked-jtis'
+# Re-read this much of the log on each sync, in case another process's
+# clock runs behind ours
+SYNC_OVERLAP_SECONDS = 5
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter of strings: no false negatives, few false positives"""
+
+    def __init__(self, capacity, error_rate):
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class RevocationList:
+    """Revoked refresh token jtis, checked in memory (see module docstring)"""
+
+    def __init__(self, client):
+        self.client = client
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._cursor = 0.0
+        self._synced_at = None
+
+    def _sync(self):
+        capacity = settings.TOKEN_REVOCATION_BLOOM_CAPACITY
+        # Tokens revoked longer ago than a refresh token lives have expired anyway
+        horizon = time.time() - api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()
+        if self._bloom is None or self._bloom.count > capacity:
+            # Start over, dropping expired entries from the log and the filter
+            self.client.zremrangebyscore(REVOCATION_LOG_KEY, '-inf', horizon)
+            bloom = BloomFilter(capacity, settings.TOKEN_REVOCATION_BLOOM_ERROR_RATE)
+            start = horizon
+        else:
+            bloom = self._bloom
+            start = self._cursor - SYNC_OVERLAP_SECONDS
+        cursor = self._cursor
+        for jti, revoked_at in self.client.zrangebyscore(REVOCATION_LOG_KEY, start, '+inf', withscores=True):
+            bloom.add(_text(jti))
+            cursor = max(cursor, revoked_at)
+        self._bloom, self._cursor, self._synced_at = bloom, cursor, time.monotonic()
+
+    def is_revoked(self, jti):
+        with self._lock:
+            if self._synced_at is None or time.monotonic() - self._synced_at >= settings.TOKEN_REVOCATION_SYNC_SECONDS:
+                self._sync()
+            if jti not in self._bloom:
+                return False
+        return bool(self.client.exists(REVOKED_KEY_PREFIX + jti))
+
+    def revoke(self, jti, expires_at):
+        """
+        Revoke ``jti`` until ``expires_at`` (epoch seconds). Returns False
+        if it was already revoked.
+        """
+        ttl = max(math.ceil(expires_at - time.time()), 1)
+        if not self.client.set(REVOKED_KEY_PREFIX + jti, 1, nx=True, ex=ttl):
+            return False
+        self.client.zadd(REVOCATION_LOG_KEY, {jti: time.time()})
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+        return True
+
+
+_revocation_list = None
+
+
+def get_revocation_list():
+    global _revocation_list
+    if _revocation_list is None:
+        _revocation_list = RevocationList(redis.Redis.from_url(settings.TOKEN_REVOCATION_REDIS_URL))
+    return _revocation_list
+
+
+def set_revocation_client(client):
+    """
+    Use ``client`` (e.g. a fakeredis instance) for the revocation list.
+    Returns the previous list, which restore_revocation_list() puts back.
+    """
+    global _revocation_list
+    previous = _revocation_list
+    _revocation_list = RevocationList(client)
+    return previous
+
+
+def restore_revocation_list(revocation_list):
+    """Put back a list returned by set_revocation_client()"""
+    global _revocation_list
+    _revocation_list = revocation_list
+
+
+class RevocableRefreshToken(RefreshToken):
+    """
+    Refresh token checked against the revocation list, which is what
+    blacklist() adds to. The token blacklist app is not installed, so the
+    stock RefreshToken has no blacklist() and rotated tokens stayed valid.
+    """
+
+    def verify(self):
+        super().verify()
+        try:
+            revoked = get_revocation_list().is_revoked(self.payload[api_settings.JTI_CLAIM])
+        except redis.RedisError:
+            # Fail closed: a token we can't check is not honoured
+            logger.warning('Token revocation list unavailable', exc_info=True)
+            raise TokenError(_('Token could not be checked'))
+        if revoked:
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        try:
+            revoked = get_revocation_list().revoke(self.payload[api_settings.JTI_CLAIM], self.payload['exp'])
+        except redis.RedisError:
+            logger.warning('Token revocation list unavailable', exc_info=True)
+            raise TokenError(_('Token could not be checked'))
+        if not revoked:
+            # Another request already rotated this token
+            raise TokenError(_('Token is blacklisted'))
@@ -1,34 +1,81 @@
-from rest_framework import serializers
+from rest_framework import exceptions, serializers
+from django.conf import settings
+from django.contrib.auth.models import update_last_login
 from django.contrib.auth.password_validation import validate_password
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from .authentication import add_user_claims, resolve_user
+from .revocation import RevocableRefreshToken
 from .models import User
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
-    """Custom JWT serializer to allow login with email"""
+    """
+    Custom JWT serializer to allow login with email.
+
+    The password is hashed exactly once per attempt: the user is looked up
+    and checked here and the token pair is issued directly, instead of
+    authenticating again through super().validate(). check_password() also
+    rehashes the password when the hasher settings changed.
+    """
     username_field = 'email'
+    token_class = RevocableRefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
 
     def validate(self, attrs):
-        # Authenticate using email instead of username
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
-        
         email = attrs.get('email')
         password = attrs.get('password')
-        
-        if email and password:
-            try:
-                user = User.objects.get(email=email)
-                if user.check_password(password):
-                    attrs['username'] = user.username
-                    return super().validate(attrs)
-                else:
-                    raise serializers.ValidationError('Invalid email or password.')
-            except User.DoesNotExist:
-                raise serializers.ValidationError('Invalid email or password.')
-        else:
+        if not (email and password):
             raise serializers.ValidationError('Must include "email" and "password".')
 
+        user = User.objects.filter(email=email).first()
+        if user is None:
+            # Hash anyway so unknown emails take as long as wrong passwords
+            User().set_password(password)
+            raise serializers.ValidationError('Invalid email or password.')
+        if not user.check_password(password):
+            raise serializers.ValidationError('Invalid email or password.')
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise exceptions.AuthenticationFailed(
+                self.error_messages['no_active_account'],
+                'no_active_account',
+            )
+
+        self.user = user
+        refresh = self.get_token(user)
+        if api_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, user)
+        return {'refresh': str(refresh), 'access': str(refresh.access_token)}
+
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh that rejects revoked refresh tokens (and revokes the old
+    one on rotation), and re-reads the role claims (when JWT_USER_CLAIMS is
+    on) from the cached user, so they follow role changes at the next refresh.
+    """
+    token_class = RevocableRefreshToken
+    default_error_messages = {
+        'no_active_account': 'No active account found with the given credentials',
+    }
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        if settings.JWT_USER_CLAIMS:
+            access = AccessToken(data['access'])
+            user = resolve_user(access[api_settings.USER_ID_CLAIM])
+            if not api_settings.USER_AUTHENTICATION_RULE(user):
+                raise exceptions.AuthenticationFailed(
+                    self.error_messages['no_active_account'],
+                    'no_active_account',
+                )
+            data['access'] = str(add_user_claims(access, user))
+        return data
+
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
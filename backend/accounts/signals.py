@@ -0,0 +1,82 @@
+"""
+Signal handlers dropping cached data when the rows behind it change: the
+admin summary, the owner's (and staff's) response cache pages of the saved
+model, and the cached user used by JWT authentication. Invalidation runs
+after commit, after the daily rollup refresh (which the summary reads)
+scheduled by the same save or delete.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from health_factors.models import HealthFactor
+from insights.models import UserInsight
+from itaku_backend.response_cache import CACHED_RESOURCES, bump_user_versions
+from medications.models import Medication
+from readings.models import BloodPressureReading
+# Connect the rollup refresh receivers first, so their on-commit refresh
+# runs before the invalidation below
+from readings import signals as reading_signals  # noqa: F401
+from .authentication import invalidate_user
+from .summary import invalidate_admin_summary
+
+User = get_user_model()
+
+CACHED_MODELS = {
+    BloodPressureReading: 'readings',
+    HealthFactor: 'health_factors',
+    Medication: 'medications',
+    UserInsight: 'insights',
+}
+
+
+def _invalidate_on_commit(sender, **kwargs):
+    transaction.on_commit(invalidate_admin_summary)
+
+
+for model in (User, BloodPressureReading, HealthFactor, UserInsight):
+    post_save.connect(_invalidate_on_commit, sender=model, dispatch_uid=f'admin-summary-save-{model.__name__}')
+    post_delete.connect(_invalidate_on_commit, sender=model, dispatch_uid=f'admin-summary-delete-{model.__name__}')
+
+
+def _remember_owner(sender, instance, **kwargs):
+    # The readings app already remembers the previous owner of readings and factors
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous:
+        instance._cache_previous_owner = previous[0]
+    elif instance.pk:
+        instance._cache_previous_owner = sender.objects.filter(pk=instance.pk).values_list('user_id', flat=True).first()
+
+
+def _bump_owner_pages(sender, instance, **kwargs):
+    user_ids = [instance.user_id]
+    previous = getattr(instance, '_cache_previous_owner', None)
+    if previous:
+        user_ids.append(previous)
+    bump_user_versions(CACHED_MODELS[sender], user_ids)
+
+
+def _bump_user_pages(sender, instance, update_fields=None, **kwargs):
+    # Every cached page shows the owner's email; a login only touches last_login
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    for resource in CACHED_RESOURCES:
+        bump_user_versions(resource, [instance.pk])
+
+
+for model in CACHED_MODELS:
+    pre_save.connect(_remember_owner, sender=model, dispatch_uid=f'response-cache-owner-{model.__name__}')
+    post_save.connect(_bump_owner_pages, sender=model, dispatch_uid=f'response-cache-save-{model.__name__}')
+    post_delete.connect(_bump_owner_pages, sender=model, dispatch_uid=f'response-cache-delete-{model.__name__}')
+post_save.connect(_bump_user_pages, sender=User, dispatch_uid='response-cache-save-User')
+
+
+def _invalidate_cached_user(sender, instance, update_fields=None, **kwargs):
+    # last_login is not cached, so logins keep the cached user
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_user(instance.pk)
+
+
+post_save.connect(_invalidate_cached_user, sender=User, dispatch_uid='jwt-user-save')
+post_delete.connect(_invalidate_cached_user, sender=User, dispatch_uid='jwt-user-delete')
@@ -0,0 +1,98 @@
+"""
+Site-wide totals for the admin dashboard.
+
+Each section is one aggregate query: reading totals, category counts and
+active users come from the DailyRollup table (which also covers archived
+readings), so no query scans the raw readings. The result is cached for
+ADMIN_SUMMARY_CACHE_TIMEOUT seconds and dropped whenever a user, reading,
+health factor or insight is saved or deleted (see accounts/signals.py).
+Bulk writes that skip signals (bulk ingest, insight batches, archiving and
+the category backfill) drop it themselves.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from health_factors.models import HealthFactor
+from insights.models import UserInsight
+from readings.models import BP_CATEGORY_CHOICES, DailyRollup
+
+User = get_user_model()
+
+ADMIN_SUMMARY_CACHE_KEY = 'admin-summary'
+ACTIVE_USER_WINDOWS = (7, 30)
+
+
+def _user_counts():
+    staff = Q(is_staff=True) | Q(is_superuser=True)
+    return User.objects.aggregate(
+        total=Count('id'),
+        staff=Count('id', filter=staff),
+        patients=Count('id', filter=~staff),
+    )
+
+
+def _reading_counts():
+    today = timezone.localdate()
+    stats = DailyRollup.objects.aggregate(
+        total=Sum('reading_count'),
+        **{category: Sum(f'{category}_count') for category, _ in BP_CATEGORY_CHOICES},
+        **{
+            f'active_{days}': Count(
+                'user', distinct=True,
+                filter=Q(date__gt=today - timedelta(days=days), reading_count__gt=0),
+            )
+            for days in ACTIVE_USER_WINDOWS
+        },
+    )
+    readings = {
+        'total': stats['total'] or 0,
+        'categories': {category: stats[category] or 0 for category, _ in BP_CATEGORY_CHOICES},
+    }
+    active = {f'last_{days}_days': stats[f'active_{days}'] for days in ACTIVE_USER_WINDOWS}
+    return readings, active
+
+
+def _insight_counts():
+    unread = Q(is_read=False)
+    stats = UserInsight.objects.aggregate(
+        total=Count('id'),
+        unread=Count('id', filter=unread),
+        **{f'type_{value}': Count('id', filter=Q(insight_type=value)) for value, _ in UserInsight.INSIGHT_TYPES},
+        **{f'unread_{value}': Count('id', filter=unread & Q(severity=value)) for value in ('low', 'medium', 'high')},
+    )
+    return {
+        'total': stats['total'],
+        'unread': stats['unread'],
+        'unread_by_severity': {value: stats[f'unread_{value}'] for value in ('low', 'medium', 'high')},
+        'types': {value: stats[f'type_{value}'] for value, _ in UserInsight.INSIGHT_TYPES},
+    }
+
+
+def compute_admin_summary():
+    readings, active = _reading_counts()
+    return {
+        'users': _user_counts(),
+        'active_users': active,
+        'readings': readings,
+        'health_factors': {'total': HealthFactor.objects.count()},
+        'insights': _insight_counts(),
+        'generated_at': timezone.now().isoformat(),
+    }
+
+
+def cached_admin_summary():
+    """compute_admin_summary(), cached until a write or the timeout"""
+    summary = cache.get(ADMIN_SUMMARY_CACHE_KEY)
+    if summary is None:
+        summary = compute_admin_summary()
+        cache.set(ADMIN_SUMMARY_CACHE_KEY, summary, settings.ADMIN_SUMMARY_CACHE_TIMEOUT)
+    return summary
+
+
+def invalidate_admin_summary():
+    cache.delete(ADMIN_SUMMARY_CACHE_KEY)
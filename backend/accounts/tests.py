@@ -0,0 +1,64 @@
+from unittest import mock
+
+import fakeredis
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .revocation import RevocationList, restore_revocation_list, set_revocation_client
+
+User = get_user_model()
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class RefreshTokenRevocationTests(TestCase):
+    """Refresh token rotation against a fakeredis revocation list"""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        self.addCleanup(restore_revocation_list, set_revocation_client(self.redis))
+        User.objects.create_user(username='patient', email='patient@example.com', password='s3cret-pass')
+        self.client = APIClient()
+
+    def _login(self):
+        response = self.client.post(
+            '/api/token/', {'email': 'patient@example.com', 'password': 's3cret-pass'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data['refresh']
+
+    def _refresh(self, token):
+        return self.client.post('/api/token/refresh/', {'refresh': token}, format='json')
+
+    def test_rotation_issues_a_new_refresh_token(self):
+        refresh = self._login()
+        response = self._refresh(refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.data)
+        self.assertNotEqual(response.data['refresh'], refresh)
+        # The rotated token is usable in turn
+        self.assertEqual(self._refresh(response.data['refresh']).status_code, 200)
+
+    def test_reusing_a_rotated_refresh_token_is_rejected(self):
+        refresh = self._login()
+        self.assertEqual(self._refresh(refresh).status_code, 200)
+        self.assertEqual(self._refresh(refresh).status_code, 401)
+
+    @override_settings(TOKEN_REVOCATION_BLOOM_CAPACITY=1, TOKEN_REVOCATION_BLOOM_ERROR_RATE=0.5)
+    def test_bloom_filter_hit_is_confirmed_in_redis(self):
+        revocations = RevocationList(self.redis)
+        self.assertTrue(revocations.revoke('revoked-jti', 4102444800))
+        self.assertTrue(revocations.is_revoked('revoked-jti'))
+
+        # A two-bit filter: some other jti is bound to collide with the revoked one
+        false_positive = next(
+            jti for jti in (f'jti-{i}' for i in range(100)) if jti in revocations._bloom
+        )
+        with mock.patch.object(self.redis, 'exists', wraps=self.redis.exists) as exists:
+            self.assertFalse(revocations.is_revoked(false_positive))
+        exists.assert_called_once_with('revoked-jti:' + false_positive)
+
+    def test_revoking_twice_fails(self):
+        revocations = RevocationList(self.redis)
+        self.assertTrue(revocations.revoke('jti', 4102444800))
+        self.assertFalse(revocations.revoke('jti', 4102444800))
@@ -7,6 +7,10 @@ from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from .serializers import UserRegistrationSerializer, UserSerializer
 from .models import User
+from .summary import cached_admin_summary
+from .dashboard import dashboard_state, build_dashboard
+from itaku_backend.conditional import not_modified, set_validators
+from itaku_backend.response_cache import cache_stats
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -162,6 +166,33 @@ def admin_check(request):
     })
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def admin_summary(request):
+    """Site-wide counts for the admin dashboard (cached briefly, dropped on writes)"""
+    return Response(cached_admin_summary())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def admin_cache_stats(request):
+    """Response cache hit/miss counters per resource (staff only)"""
+    return Response(cache_stats())
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dashboard(request):
+    """Recent readings, factors, active medications, unread insights and stats of the current user"""
+    etag, last_modified, stats = dashboard_state(request.user)
+    # Only the ETag answers: Last-Modified does not move on deletes or at the
+    # day rollover, so it is sent for information only
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    return set_validators(Response(build_dashboard(request, stats)), etag, last_modified)
+
+
 class UserProfileUpdateView(generics.UpdateAPIView):
     """Update user profile"""
     serializer_class = UserSerializer
@@ -0,0 +1,139 @@
+"""
+Correlation of blood pressure with health factors.
+
+Readings and health factors are joined by day in SQL: the DailyRollup
+table holds one row per (user, day) with the day's BP sums and that day's
+health factors, so a user's whole history is one index range scan. The
+statistics are then computed with NumPy and cached per user until the
+user's rollups change.
+"""
+import hashlib
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from readings.models import DailyRollup
+from readings.rollups import FACTOR_FIELDS
+
+CORRELATION_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Levels reported per factor: (label, lower bound inclusive, upper bound exclusive)
+FACTOR_LEVELS = {
+    'sleep_quality': [(str(level), level, level + 1) for level in range(1, 6)],
+    'stress_level': [(str(level), level, level + 1) for level in range(1, 6)],
+    'exercise_duration': [
+        ('0-15 min', 0, 16),
+        ('16-30 min', 16, 31),
+        ('31-60 min', 31, 61),
+        ('60+ min', 61, np.inf),
+    ],
+}
+
+# Correlations need at least this many paired days to be reported
+MIN_PAIRED_DAYS = 3
+
+
+def _rank(values):
+    """Ranks starting at 1, ties sharing their average rank (as Spearman needs)"""
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    average = np.cumsum(counts) - (counts - 1) / 2
+    return average[inverse]
+
+
+def _pearson(x, y):
+    if len(x) < MIN_PAIRED_DAYS or np.ptp(x) == 0 or np.ptp(y) == 0:
+        return None
+    return round(float(np.corrcoef(x, y)[0, 1]), 3)
+
+
+def _correlations(factor, systolic, diastolic):
+    """Pearson and Spearman coefficients of one factor against daily mean BP"""
+    paired = ~np.isnan(factor) & ~np.isnan(systolic)
+    x, sys, dia = factor[paired], systolic[paired], diastolic[paired]
+    return {
+        'days': int(paired.sum()),
+        'systolic': {
+            'pearson': _pearson(x, sys),
+            'spearman': _pearson(_rank(x), _rank(sys)),
+        },
+        'diastolic': {
+            'pearson': _pearson(x, dia),
+            'spearman': _pearson(_rank(x), _rank(dia)),
+        },
+    }
+
+
+def _levels(field, factor, counts, systolic_sums, diastolic_sums):
+    """Reading-weighted mean BP of the days at each level of a factor"""
+    levels = []
+    for label, low, high in FACTOR_LEVELS[field]:
+        days = (factor >= low) & (factor < high) & (counts > 0)
+        readings = int(counts[days].sum())
+        levels.append({
+            'level': label,
+            'days': int(days.sum()),
+            'readings': readings,
+            'systolic': round(float(systolic_sums[days].sum() / readings), 1) if readings else None,
+            'diastolic': round(float(diastolic_sums[days].sum() / readings), 1) if readings else None,
+        })
+    return levels
+
+
+def compute_correlations(rollups):
+    """
+    Per-factor BP means by level, plus same-day and next-day (factor on day
+    d against BP on day d + 1) Pearson/Spearman coefficients.
+    """
+    rows = list(
+        rollups.order_by('date').values_list(
+            'date', 'reading_count', 'systolic_sum', 'diastolic_sum', *FACTOR_FIELDS
+        )
+    )
+    table = np.array([row[1:] for row in rows], dtype=float).reshape(len(rows), 3 + len(FACTOR_FIELDS))
+    ordinals = np.fromiter((row[0].toordinal() for row in rows), dtype=np.int64, count=len(rows))
+    counts, systolic_sums, diastolic_sums = table[:, 0], table[:, 1], table[:, 2]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        systolic = np.where(counts > 0, systolic_sums / counts, np.nan)
+        diastolic = np.where(counts > 0, diastolic_sums / counts, np.nan)
+
+    # Index of each day's calendar successor, where the user has a row for it
+    following = np.searchsorted(ordinals, ordinals + 1)
+    has_next = following < len(ordinals)
+    has_next[has_next] = ordinals[following[has_next]] == ordinals[has_next] + 1
+    next_systolic = np.full(len(rows), np.nan)
+    next_diastolic = np.full(len(rows), np.nan)
+    next_systolic[has_next] = systolic[following[has_next]]
+    next_diastolic[has_next] = diastolic[following[has_next]]
+
+    factors = {}
+    for column, field in enumerate(FACTOR_FIELDS, start=3):
+        factor = table[:, column]
+        factors[field] = {
+            'levels': _levels(field, factor, counts, systolic_sums, diastolic_sums),
+            'same_day': _correlations(factor, systolic, diastolic),
+            'next_day': _correlations(factor, next_systolic, next_diastolic),
+        }
+    return {
+        'days': int((counts > 0).sum()),
+        'factors': factors,
+    }
+
+
+def rollup_fingerprint(rollups):
+    """Changes whenever a rollup row of the queryset is added, updated or removed"""
+    stats = rollups.order_by().aggregate(count=Count('id'), latest=Max('updated_at'))
+    latest = stats['latest'].isoformat() if stats['latest'] else ''
+    return hashlib.sha256(f"{stats['count']}:{latest}".encode()).hexdigest()[:32]
+
+
+def user_correlations(user_id):
+    """compute_correlations() for one user, cached until their data changes"""
+    rollups = DailyRollup.objects.filter(user_id=user_id)
+    key = f'health-factor-correlations:{user_id}:{rollup_fingerprint(rollups)}'
+    result = cache.get(key)
+    if result is None:
+        result = compute_correlations(rollups)
+        cache.set(key, result, CORRELATION_CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("health_factors", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="healthfactor",
+            index=models.Index(fields=["-date"], name="health_fact_date_f896e7_idx"),
+        ),
+    ]
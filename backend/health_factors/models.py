@@ -34,6 +34,7 @@ class HealthFactor(models.Model):
         unique_together = ['user', 'date']
         indexes = [
             models.Index(fields=['user', '-date']),
+            models.Index(fields=['-date']),
         ]
 
     def __str__(self):
@@ -1,16 +1,33 @@
-from rest_framework import viewsets
+from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from django.contrib.auth import get_user_model
+from itaku_backend.filters import IndexedFilter
+from itaku_backend.conditional import ConditionalGetMixin
+from itaku_backend.response_cache import ResponseCacheMixin
 from .models import HealthFactor
 from .serializers import HealthFactorSerializer
+from .correlations import user_correlations
 
 User = get_user_model()
 
 
-class HealthFactorViewSet(viewsets.ModelViewSet):
+class HealthFactorViewSet(ResponseCacheMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for managing health factors"""
+    cache_resource = 'health_factors'
     serializer_class = HealthFactorSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('-date', '-id')
+    ordering_options = {
+        '-date': ('-date', '-id'),
+        'date': ('date', 'id'),
+    }
+    indexed_filters = {
+        'user': IndexedFilter('user', admin_only=True, example='1'),
+        'start': IndexedFilter('date', 'gte', kind='date', example='2024-01-01'),
+        'end': IndexedFilter('date', 'lte', kind='date', example='2024-12-31'),
+    }
 
     def get_queryset(self):
         # Admin users can see all health factors, regular users see only their own
@@ -27,3 +44,16 @@ class HealthFactorViewSet(viewsets.ModelViewSet):
         else:
             serializer.save(user=self.request.user)
 
+    @action(detail=False, methods=['get'])
+    def correlations(self, request):
+        """
+        Blood pressure by health factor level, with same-day and next-day
+        Pearson/Spearman coefficients. Admins pass ``user`` to pick a patient.
+        """
+        user_id = request.user.id
+        if request.query_params.get('user') and (request.user.is_staff or request.user.is_superuser):
+            try:
+                user_id = int(request.query_params['user'])
+            except ValueError:
+                return Response({'user': ['Must be an integer.']}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(user_correlations(user_id))
@@ -0,0 +1,186 @@
+"""
+Batch anomaly detection over recent blood pressure readings.
+
+Each reading is compared with the same user's preceding readings using the
+modified z-score of Iglewicz and Hoaglin: 0.6745 * (x - median) / MAD, where
+median and MAD (median absolute deviation) are taken over the last WINDOW
+readings. Median and MAD are robust, so earlier outliers don't raise the
+baseline.
+
+Users are processed in batches. Each batch is one readings query; the
+rolling windows for every user in the batch are computed at once with NumPy.
+Flagged readings become UserInsight(insight_type='anomaly') rows whose
+dedupe_key names the reading, so overlapping runs never duplicate them.
+"""
+import warnings
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.summary import invalidate_admin_summary
+from itaku_backend.response_cache import bump_user_versions
+from readings.models import BloodPressureReading
+from .models import UserInsight
+
+# Readings in each baseline, and the minimum needed to judge a reading
+WINDOW = 30
+MIN_BASELINE = 10
+# Baselines only use readings from this many days before the scanned ones
+LOOKBACK_DAYS = 60
+Z_THRESHOLD = 3.5
+# MAD floor (mmHg / bpm) so very steady users aren't flagged for a few points
+MIN_MAD = 2.0
+# Largest |z| of a flagged reading at which it becomes medium / high severity
+SEVERITY_THRESHOLDS = (('high', 7.0), ('medium', 5.0))
+
+ANOMALY_COLUMNS = (
+    ('systolic', 'mmHg'),
+    ('diastolic', 'mmHg'),
+    ('heart_rate', 'bpm'),
+)
+READING_FIELDS = ('id', 'user_id', 'recorded_at', 'systolic', 'diastolic', 'heart_rate')
+
+
+def rolling_baseline(values, groups, targets, window=WINDOW):
+    """
+    Median, MAD and size of the baseline of each row in ``targets``: the
+    ``window`` rows before it that belong to the same group.
+
+    ``values`` has shape (n, k) with NaN for missing values and ``groups``
+    shape (n,); rows must be sorted by group, then time. Returns three
+    (len(targets), k) arrays; median and MAD are NaN where the baseline is empty.
+    """
+    index = targets[:, None] + np.arange(-window, 0)
+    valid = index >= 0
+    index = np.where(valid, index, 0)
+    valid &= groups[index] == groups[targets][:, None]
+    windows = np.where(valid[:, :, None], values[index], np.nan)
+
+    with warnings.catch_warnings():
+        # Rows without any baseline produce all-NaN slices
+        warnings.simplefilter('ignore', RuntimeWarning)
+        median = np.nanmedian(windows, axis=1)
+        mad = np.nanmedian(np.abs(windows - median[:, None, :]), axis=1)
+    count = (~np.isnan(windows)).sum(axis=1)
+    return median, mad, count
+
+
+def modified_z_scores(values, median, mad, count):
+    """Modified z-scores, NaN where the value is missing or the baseline too small"""
+    with np.errstate(invalid='ignore'):
+        scores = 0.6745 * (values - median) / np.maximum(mad, MIN_MAD)
+    return np.where(count >= MIN_BASELINE, scores, np.nan)
+
+
+def _severity(score):
+    for severity, threshold in SEVERITY_THRESHOLDS:
+        if score >= threshold:
+            return severity
+    return 'low'
+
+
+def _insight_text(recorded_at, values, median, flagged):
+    systolic, diastolic, heart_rate = values
+    reading = f'{int(systolic)}/{int(diastolic)} mmHg'
+    if not np.isnan(heart_rate):
+        reading += f', {int(heart_rate)} bpm'
+
+    details = []
+    for column, (name, unit) in enumerate(ANOMALY_COLUMNS):
+        if flagged[column]:
+            difference = values[column] - median[column]
+            direction = 'above' if difference > 0 else 'below'
+            label = name.replace('_', ' ')
+            details.append(
+                f'{label} {abs(difference):.0f} {unit} {direction} your usual {median[column]:.0f}'
+            )
+    when = timezone.localtime(recorded_at).strftime('%b %d, %Y at %H:%M')
+    return f'Unusual reading on {when} ({reading}): {"; ".join(details)}.'
+
+
+def find_anomalies(rows, since):
+    """
+    Anomalous readings among ``rows`` (READING_FIELDS tuples sorted by user,
+    then time) recorded at or after ``since`` (a datetime, or a dict of one
+    per user ID), as unsaved UserInsight objects.
+    """
+    if not rows:
+        return []
+    users = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+    values = np.array([row[3:] for row in rows], dtype=float)
+    if isinstance(since, dict):
+        targets = np.flatnonzero([row[2] >= since[row[1]] for row in rows])
+    else:
+        targets = np.flatnonzero([row[2] >= since for row in rows])
+    if not len(targets):
+        return []
+
+    median, mad, count = rolling_baseline(values, users, targets)
+    scores = np.abs(modified_z_scores(values[targets], median, mad, count))
+    flagged = scores > Z_THRESHOLD
+    worst = np.where(flagged, scores, 0).max(axis=1)
+
+    insights = []
+    for position in np.flatnonzero(flagged.any(axis=1)):
+        reading_id, user_id, recorded_at = rows[targets[position]][:3]
+        insights.append(UserInsight(
+            user_id=user_id,
+            insight_type='anomaly',
+            severity=_severity(worst[position]),
+            insight_text=_insight_text(recorded_at, values[targets[position]], median[position], flagged[position]),
+            dedupe_key=f'anomaly:reading:{reading_id}',
+        ))
+    return insights
+
+
+def save_insights(insights):
+    """
+    Insert the insights whose (user, dedupe_key) doesn't exist yet and return
+    how many were new. Conflicts from concurrent runs are ignored. bulk_create
+    skips signals, so the owners' cached insight pages and the admin summary
+    are invalidated here.
+    """
+    if not insights:
+        return 0
+    existing = set(
+        UserInsight.objects.filter(
+            user_id__in={insight.user_id for insight in insights},
+            dedupe_key__in=[insight.dedupe_key for insight in insights],
+        ).values_list('user_id', 'dedupe_key')
+    )
+    new = [insight for insight in insights if (insight.user_id, insight.dedupe_key) not in existing]
+    UserInsight.objects.bulk_create(new, batch_size=1000, ignore_conflicts=True)
+    bump_user_versions('insights', [insight.user_id for insight in new])
+    if new:
+        transaction.on_commit(invalidate_admin_summary)
+    return len(new)
+
+
+def detect_anomalies(days=2, user_ids=None, batch_size=500):
+    """
+    Flag anomalous readings recorded in the last ``days`` days, for the users
+    in ``user_ids`` or everyone with readings in that period. Returns counts
+    of the users scanned, readings flagged and insights created.
+    """
+    since = timezone.now() - timedelta(days=days)
+    if user_ids is None:
+        user_ids = (
+            BloodPressureReading.objects.filter(recorded_at__gte=since)
+            .order_by('user_id').values_list('user_id', flat=True).distinct()
+        )
+    user_ids = sorted(set(user_ids))
+
+    flagged = created = 0
+    for start in range(0, len(user_ids), batch_size):
+        rows = list(
+            BloodPressureReading.objects.filter(
+                user_id__in=user_ids[start:start + batch_size],
+                recorded_at__gte=since - timedelta(days=LOOKBACK_DAYS),
+            ).order_by('user_id', 'recorded_at', 'id').values_list(*READING_FIELDS)
+        )
+        insights = find_anomalies(rows, since)
+        flagged += len(insights)
+        created += save_insights(insights)
+    return {'users': len(user_ids), 'flagged': flagged, 'created': created}
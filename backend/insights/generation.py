@@ -0,0 +1,100 @@
+"""
+Sharded, incremental insight generation.
+
+The user ID space is split into contiguous shards of INSIGHTS_SHARD_SIZE
+IDs. Each shard is processed independently, either by one Celery task per
+shard (the generate_insights coordinator task) or by a local process pool
+(`manage.py generate_insights`). More workers therefore mean a shorter run.
+
+Each user has an InsightWatermark: the recorded_at of the newest reading
+already scanned. A run only looks at users with readings past their
+watermark and only judges those readings. Baselines still come from the
+readings before them. Readings recorded more than INSIGHTS_MAX_CATCHUP_DAYS
+ago are never scanned, which bounds the first run and the catch-up after an
+outage. Readings backfilled behind a watermark are not scanned either; run
+`manage.py detect_anomalies --days N` to rescan a window.
+
+Trend insights don't need a batch pass; they are maintained per reading
+(see insights/trends.py).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Max, OuterRef, Q, F, Subquery
+from django.utils import timezone
+
+from readings.models import BloodPressureReading
+from .anomalies import LOOKBACK_DAYS, READING_FIELDS, find_anomalies, save_insights
+from .models import InsightWatermark
+
+User = get_user_model()
+
+
+def user_id_shards(shard_size):
+    """Contiguous ``[start, end)`` user ID ranges covering every user"""
+    last = User.objects.aggregate(last=Max('id'))['last']
+    if last is None:
+        return []
+    return [(start, start + shard_size) for start in range(1, last + 1, shard_size)]
+
+
+def _catchup_floor():
+    return timezone.now() - timedelta(days=settings.INSIGHTS_MAX_CATCHUP_DAYS)
+
+
+def pending_user_ids(start, end, floor):
+    """IDs in ``[start, end)`` of users with readings after their watermark (and ``floor``)"""
+    watermark = InsightWatermark.objects.filter(user_id=OuterRef('user_id')).values('last_recorded_at')
+    return list(
+        BloodPressureReading.objects.filter(user_id__gte=start, user_id__lt=end, recorded_at__gte=floor)
+        .annotate(watermark=Subquery(watermark))
+        .filter(Q(watermark__isnull=True) | Q(recorded_at__gt=F('watermark')))
+        .order_by('user_id').values_list('user_id', flat=True).distinct()
+    )
+
+
+def _advance_watermarks(rows):
+    latest = {}
+    for row in rows:
+        # Rows are sorted by user, then time, so the last one per user wins
+        latest[row[1]] = row[2]
+    InsightWatermark.objects.bulk_create(
+        [InsightWatermark(user_id=user_id, last_recorded_at=recorded_at) for user_id, recorded_at in latest.items()],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['last_recorded_at', 'updated_at'],
+    )
+
+
+def generate_shard(start, end, batch_size=500):
+    """
+    Generate anomaly insights for the new readings of users with IDs in
+    ``[start, end)`` and advance their watermarks. Returns counts of the
+    users scanned, readings flagged and insights created.
+    """
+    floor = _catchup_floor()
+    user_ids = pending_user_ids(start, end, floor)
+
+    flagged = created = 0
+    for offset in range(0, len(user_ids), batch_size):
+        batch = user_ids[offset:offset + batch_size]
+        watermarks = dict(
+            InsightWatermark.objects.filter(user_id__in=batch).values_list('user_id', 'last_recorded_at')
+        )
+        # Judge only readings after the watermark (or the catch-up floor)
+        since = {
+            user_id: max(watermarks[user_id] + timedelta(microseconds=1), floor) if user_id in watermarks else floor
+            for user_id in batch
+        }
+        rows = list(
+            BloodPressureReading.objects.filter(
+                user_id__in=batch,
+                recorded_at__gte=min(since.values()) - timedelta(days=LOOKBACK_DAYS),
+            ).order_by('user_id', 'recorded_at', 'id').values_list(*READING_FIELDS)
+        )
+        insights = find_anomalies(rows, since)
+        flagged += len(insights)
+        created += save_insights(insights)
+        _advance_watermarks(rows)
+    return {'users': len(user_ids), 'flagged': flagged, 'created': created}
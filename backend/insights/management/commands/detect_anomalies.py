@@ -0,0 +1,49 @@
+"""
+Django management command to flag unusual blood pressure readings as
+anomaly insights (see insights/anomalies.py). Safe to rerun: readings that
+already have an anomaly insight are skipped.
+
+Usage: python manage.py detect_anomalies [--days N] [--batch-size N] [--user ID ...]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from insights.anomalies import detect_anomalies
+
+
+class Command(BaseCommand):
+    help = 'Create anomaly insights for unusual recent blood pressure readings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=2,
+            help='Scan readings recorded in the last N days (default: 2)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of users whose readings are loaded per query (default: 500)',
+        )
+        parser.add_argument(
+            '--user',
+            type=int,
+            nargs='+',
+            dest='users',
+            help='Only scan these user IDs (default: everyone with recent readings)',
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--days and --batch-size must be positive')
+
+        result = detect_anomalies(
+            days=options['days'],
+            user_ids=options['users'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Scanned {result['users']} users: {result['flagged']} anomalous readings, "
+            f"{result['created']} new insights"
+        ))
@@ -0,0 +1,67 @@
+"""
+Django management command to run sharded insight generation (see
+insights/generation.py) on this machine, one shard per process. Use it
+where no Celery broker is available; `--celery` queues the same work as one
+Celery task per shard instead.
+
+Usage: python manage.py generate_insights [--workers N] [--shard-size N] [--celery]
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from insights.generation import generate_shard, user_id_shards
+from insights.tasks import generate_insights
+
+
+class Command(BaseCommand):
+    help = 'Generate insights for new readings, one user ID shard per process'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of worker processes (default: number of CPUs)',
+        )
+        parser.add_argument(
+            '--shard-size',
+            type=int,
+            default=settings.INSIGHTS_SHARD_SIZE,
+            help=f'Number of user IDs per shard (default: {settings.INSIGHTS_SHARD_SIZE})',
+        )
+        parser.add_argument(
+            '--celery',
+            action='store_true',
+            help='Queue one Celery task per shard (of --shard-size user IDs) instead of running locally',
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['shard_size'] < 1:
+            raise CommandError('--workers and --shard-size must be positive')
+
+        if options['celery']:
+            result = generate_insights.delay(options['shard_size'])
+            self.stdout.write(self.style.SUCCESS(f'✅ Queued insight generation (task {result.id})'))
+            return
+
+        shards = user_id_shards(options['shard_size'])
+        workers = min(options['workers'], len(shards))
+        if workers <= 1:
+            results = [generate_shard(start, end) for start, end in shards]
+        else:
+            # Forked workers inherit the configured Django; they must open
+            # their own database connections rather than share the parent's
+            connections.close_all()
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork')) as executor:
+                results = list(executor.map(generate_shard, *zip(*shards)))
+
+        totals = {key: sum(result[key] for result in results) for key in ('users', 'flagged', 'created')}
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Processed {len(shards)} shards with {max(workers, 1)} workers: scanned {totals['users']} users, "
+            f"{totals['flagged']} anomalous readings, {totals['created']} new insights"
+        ))
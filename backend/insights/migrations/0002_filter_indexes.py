@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("insights", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="userinsight",
+            index=models.Index(
+                fields=["user", "is_read", "-generated_at"],
+                name="insights_us_user_id_23c9c9_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userinsight",
+            index=models.Index(
+                fields=["user", "severity", "-generated_at"],
+                name="insights_us_user_id_7fd624_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userinsight",
+            index=models.Index(
+                fields=["-generated_at"], name="insights_us_generat_977db7_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userinsight",
+            index=models.Index(
+                fields=["is_read", "-generated_at"],
+                name="insights_us_is_read_7110a2_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userinsight",
+            index=models.Index(
+                fields=["severity", "-generated_at"],
+                name="insights_us_severit_d576f6_idx",
+            ),
+        ),
+    ]
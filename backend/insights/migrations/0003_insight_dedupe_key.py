@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("insights", "0002_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userinsight",
+            name="dedupe_key",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=100
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="userinsight",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("dedupe_key", ""), _negated=True),
+                fields=("user", "dedupe_key"),
+                name="insights_userinsight_unique_dedupe_key",
+            ),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+        ("insights", "0003_insight_dedupe_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserTrendState",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="trend_state",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("reading_count", models.IntegerField(default=0)),
+                ("last_recorded_at", models.DateTimeField(blank=True, null=True)),
+                ("systolic_level", models.FloatField(blank=True, null=True)),
+                ("diastolic_level", models.FloatField(blank=True, null=True)),
+                ("weight_sum", models.FloatField(default=0)),
+                ("x_sum", models.FloatField(default=0)),
+                ("xx_sum", models.FloatField(default=0)),
+                ("systolic_sum", models.FloatField(default=0)),
+                ("diastolic_sum", models.FloatField(default=0)),
+                ("x_systolic_sum", models.FloatField(default=0)),
+                ("x_diastolic_sum", models.FloatField(default=0)),
+                (
+                    "systolic_direction",
+                    models.CharField(
+                        choices=[
+                            ("steady", "Steady"),
+                            ("rising", "Rising"),
+                            ("falling", "Falling"),
+                        ],
+                        default="steady",
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "diastolic_direction",
+                    models.CharField(
+                        choices=[
+                            ("steady", "Steady"),
+                            ("rising", "Rising"),
+                            ("falling", "Falling"),
+                        ],
+                        default="steady",
+                        max_length=10,
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
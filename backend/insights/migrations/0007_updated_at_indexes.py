@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("insights", "0006_userinsight_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="userinsight",
+            index=models.Index(
+                fields=["user", "-updated_at"], name="insights_us_user_id_816047_idx"
+            ),
+        ),
+    ]
@@ -17,19 +17,80 @@ class UserInsight(models.Model):
     insight_text = models.TextField(help_text="The generated insight message")
     insight_type = models.CharField(max_length=50, choices=INSIGHT_TYPES)
     generated_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     is_read = models.BooleanField(default=False)
     severity = models.CharField(
         max_length=20,
         choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')],
         default='low'
     )
+    # Set on generated insights (e.g. 'anomaly:reading:42') so reruns of a
+    # generator never create the same insight twice; blank for manual ones
+    dedupe_key = models.CharField(max_length=100, blank=True, default='', editable=False)
 
     class Meta:
         ordering = ['-generated_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'dedupe_key'],
+                condition=~models.Q(dedupe_key=''),
+                name='insights_userinsight_unique_dedupe_key',
+            ),
+        ]
         indexes = [
             models.Index(fields=['user', '-generated_at']),
+            models.Index(fields=['user', 'is_read', '-generated_at']),
+            models.Index(fields=['user', 'severity', '-generated_at']),
+            models.Index(fields=['-generated_at']),
+            models.Index(fields=['is_read', '-generated_at']),
+            models.Index(fields=['severity', '-generated_at']),
+            # Latest change per user, the list's conditional GET validator
+            models.Index(fields=['user', '-updated_at']),
         ]
 
     def __str__(self):
         return f"{self.user.email} - {self.insight_type} - {self.generated_at}"
 
+
+class UserTrendState(models.Model):
+    """
+    Running trend statistics of a user's blood pressure, updated in constant
+    time per new reading (see insights/trends.py)
+    """
+    DIRECTIONS = [
+        ('steady', 'Steady'),
+        ('rising', 'Rising'),
+        ('falling', 'Falling'),
+    ]
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='trend_state')
+    reading_count = models.IntegerField(default=0)
+    last_recorded_at = models.DateTimeField(null=True, blank=True)
+    # Exponentially weighted moving averages, one step per reading
+    systolic_level = models.FloatField(null=True, blank=True)
+    diastolic_level = models.FloatField(null=True, blank=True)
+    # Time-decayed weighted least-squares sums; x is the reading time in days
+    # relative to last_recorded_at (so always <= 0)
+    weight_sum = models.FloatField(default=0)
+    x_sum = models.FloatField(default=0)
+    xx_sum = models.FloatField(default=0)
+    systolic_sum = models.FloatField(default=0)
+    diastolic_sum = models.FloatField(default=0)
+    x_systolic_sum = models.FloatField(default=0)
+    x_diastolic_sum = models.FloatField(default=0)
+    systolic_direction = models.CharField(max_length=10, choices=DIRECTIONS, default='steady')
+    diastolic_direction = models.CharField(max_length=10, choices=DIRECTIONS, default='steady')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.email} - {self.systolic_direction}/{self.diastolic_direction}"
+
+
+class InsightWatermark(models.Model):
+    """Time of the newest reading already scanned by insight generation, per user"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='insight_watermark')
+    last_recorded_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.email} - {self.last_recorded_at}"
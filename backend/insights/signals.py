@@ -0,0 +1,40 @@
+"""
+Signal handlers keeping UserTrendState in sync with readings. Updates run
+after commit so a rolled back reading never reaches the trend state.
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from readings.models import BloodPressureReading
+from .trends import record_reading, recompute_trend
+
+
+def _field_value(instance, field):
+    # Values assigned in code may still be strings until the row is reloaded
+    return instance._meta.get_field(field).to_python(getattr(instance, field))
+
+
+@receiver(post_save, sender=BloodPressureReading)
+def track_reading_trend(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(partial(
+            record_reading,
+            instance.user_id,
+            _field_value(instance, 'recorded_at'),
+            _field_value(instance, 'systolic'),
+            _field_value(instance, 'diastolic'),
+        ))
+        return
+    # The readings app remembers the previous owner of an edited row
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous and previous[0] != instance.user_id:
+        transaction.on_commit(partial(recompute_trend, previous[0]))
+    transaction.on_commit(partial(recompute_trend, instance.user_id))
+
+
+@receiver(post_delete, sender=BloodPressureReading)
+def untrack_deleted_reading(sender, instance, **kwargs):
+    transaction.on_commit(partial(recompute_trend, instance.user_id))
@@ -0,0 +1,20 @@
+from celery import group, shared_task
+from django.conf import settings
+from .generation import generate_shard, user_id_shards
+
+
+@shared_task
+def generate_insights(shard_size=None):
+    """
+    Fan insight generation out to one task per shard of the user ID space
+    (``shard_size`` user IDs each, default INSIGHTS_SHARD_SIZE)
+    """
+    shards = user_id_shards(shard_size or settings.INSIGHTS_SHARD_SIZE)
+    group(generate_insight_shard.s(start, end) for start, end in shards).apply_async()
+    return len(shards)
+
+
+@shared_task
+def generate_insight_shard(start, end):
+    """Generate insights for the new readings of users with IDs in [start, end)"""
+    return generate_shard(start, end)
@@ -0,0 +1,183 @@
+"""
+Incremental blood pressure trend tracking.
+
+Each user has one UserTrendState row holding an EWMA level and time-decayed
+weighted least-squares sums per column. A new reading is folded in with a
+constant number of arithmetic steps: the sums are decayed to the reading's
+time (half-life INSIGHTS_TREND_HALF_LIFE_DAYS), their origin is shifted to
+that time, and the reading is added at x = 0. The slope of the weighted
+regression line is the recent trend.
+
+Edits, deletes and backfilled readings (recorded before the latest one)
+change the past, so they rebuild the state from the readings of the last
+RECOMPUTE_HALF_LIVES half-lives, beyond which weights are negligible.
+
+When a column's slope crosses its INSIGHTS_TREND_<COLUMN>_SLOPE threshold
+(mmHg per week), a trend insight is created.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from readings.models import BloodPressureReading
+from .anomalies import save_insights
+from .models import UserInsight, UserTrendState
+
+TREND_FIELDS = ('systolic', 'diastolic')
+SUM_FIELDS = ['weight_sum', 'x_sum', 'xx_sum'] + [
+    name for field in TREND_FIELDS for name in (f'{field}_sum', f'x_{field}_sum')
+]
+RECOMPUTE_HALF_LIVES = 10
+
+# A slope needs this much (decayed) weight and spread in time to be trusted:
+# the weighted standard deviation of the reading times must be 5+ days
+MIN_WEIGHT = 7.0
+MIN_X_VARIANCE = 25.0  # days squared
+# Levels at which a rising trend is high severity
+HIGH_LEVELS = {'systolic': 140, 'diastolic': 90}
+
+
+def _slope_threshold(field):
+    return getattr(settings, f'INSIGHTS_TREND_{field.upper()}_SLOPE')
+
+
+def _advance(state, recorded_at):
+    """Decay the sums to ``recorded_at`` and make it their x origin"""
+    if state.last_recorded_at is not None:
+        days = (recorded_at - state.last_recorded_at).total_seconds() / 86400
+        decay = 0.5 ** (days / settings.INSIGHTS_TREND_HALF_LIFE_DAYS)
+        weight, x_sum = state.weight_sum, state.x_sum
+        state.xx_sum = decay * (state.xx_sum - 2 * days * x_sum + days * days * weight)
+        state.x_sum = decay * (x_sum - days * weight)
+        state.weight_sum = decay * weight
+        for field in TREND_FIELDS:
+            y_sum = getattr(state, f'{field}_sum')
+            xy_sum = getattr(state, f'x_{field}_sum')
+            setattr(state, f'x_{field}_sum', decay * (xy_sum - days * y_sum))
+            setattr(state, f'{field}_sum', decay * y_sum)
+    state.last_recorded_at = recorded_at
+
+
+def _add_reading(state, recorded_at, values):
+    _advance(state, recorded_at)
+    alpha = settings.INSIGHTS_TREND_EWMA_ALPHA
+    state.reading_count += 1
+    state.weight_sum += 1
+    for field in TREND_FIELDS:
+        value = values[field]
+        # The new reading sits at x = 0, so the x sums don't change
+        setattr(state, f'{field}_sum', getattr(state, f'{field}_sum') + value)
+        level = getattr(state, f'{field}_level')
+        setattr(state, f'{field}_level', value if level is None else level + alpha * (value - level))
+
+
+def trend_slope(state, field):
+    """Recent slope of ``field`` in mmHg per week, or None with too little data"""
+    weight = state.weight_sum
+    # weight² times the weighted variance of x
+    spread = weight * state.xx_sum - state.x_sum ** 2
+    if weight < MIN_WEIGHT or spread < MIN_X_VARIANCE * weight * weight:
+        return None
+    covariance = weight * getattr(state, f'x_{field}_sum') - state.x_sum * getattr(state, f'{field}_sum')
+    return 7 * covariance / spread
+
+
+def _direction(slope, threshold, previous):
+    if slope is None:
+        return 'steady'
+    if slope >= threshold:
+        return 'rising'
+    if slope <= -threshold:
+        return 'falling'
+    # Between half and the full threshold the previous direction holds, so
+    # a slope hovering around the threshold doesn't flap
+    if abs(slope) < threshold / 2:
+        return 'steady'
+    return previous
+
+
+def _trend_insight(state, field, direction, slope):
+    level = getattr(state, f'{field}_level')
+    if direction == 'falling':
+        severity = 'low'
+    else:
+        severity = 'high' if level >= HIGH_LEVELS[field] else 'medium'
+    return UserInsight(
+        user_id=state.user_id,
+        insight_type='trend',
+        severity=severity,
+        insight_text=(
+            f'Your {field} blood pressure has been {direction} by about {abs(slope):.1f} mmHg '
+            f'per week. Your recent average is {level:.0f} mmHg.'
+        ),
+        dedupe_key=f'trend:{field}:{direction}:{int(state.last_recorded_at.timestamp())}',
+    )
+
+
+def _update_directions(state):
+    """Re-evaluate each column's direction; returns insights for new rising/falling trends"""
+    insights = []
+    for field in TREND_FIELDS:
+        previous = getattr(state, f'{field}_direction')
+        slope = trend_slope(state, field)
+        direction = _direction(slope, _slope_threshold(field), previous)
+        setattr(state, f'{field}_direction', direction)
+        if direction != previous and direction != 'steady':
+            insights.append(_trend_insight(state, field, direction, slope))
+    return insights
+
+
+def _locked_state(user_id):
+    state = UserTrendState.objects.select_for_update().filter(user_id=user_id).first()
+    if state is None:
+        UserTrendState.objects.get_or_create(user_id=user_id)
+        state = UserTrendState.objects.select_for_update().get(user_id=user_id)
+    return state
+
+
+def _rebuild(state):
+    """Refold the state from the user's recent readings; False if they have none"""
+    since = timezone.now() - timedelta(days=RECOMPUTE_HALF_LIVES * settings.INSIGHTS_TREND_HALF_LIFE_DAYS)
+    readings = (
+        BloodPressureReading.objects.filter(user_id=state.user_id, recorded_at__gte=since)
+        .order_by('recorded_at', 'id').values('recorded_at', *TREND_FIELDS)
+    )
+    for field in SUM_FIELDS:
+        setattr(state, field, 0.0)
+    state.reading_count = 0
+    state.last_recorded_at = state.systolic_level = state.diastolic_level = None
+    for reading in readings.iterator():
+        _add_reading(state, reading['recorded_at'], reading)
+    return state.reading_count > 0
+
+
+def record_reading(user_id, recorded_at, systolic, diastolic):
+    """Fold a newly created reading into the user's trend state"""
+    with transaction.atomic():
+        state = _locked_state(user_id)
+        if state.last_recorded_at is not None and recorded_at < state.last_recorded_at:
+            _rebuild(state)
+        else:
+            _add_reading(state, recorded_at, {'systolic': systolic, 'diastolic': diastolic})
+        insights = _update_directions(state)
+        state.save()
+        save_insights(insights)
+
+
+def recompute_trend(user_id):
+    """Rebuild the user's trend state after readings were edited, deleted or bulk-inserted"""
+    with transaction.atomic():
+        state = UserTrendState.objects.select_for_update().filter(user_id=user_id).first()
+        if state is None:
+            if not BloodPressureReading.objects.filter(user_id=user_id).exists():
+                # Also the case while the user is being deleted
+                return
+            state = _locked_state(user_id)
+        if not _rebuild(state):
+            state.delete()
+            return
+        insights = _update_directions(state)
+        state.save()
+        save_insights(insights)
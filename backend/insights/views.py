@@ -3,16 +3,32 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
+from itaku_backend.filters import IndexedFilter
+from itaku_backend.conditional import ConditionalGetMixin
+from itaku_backend.response_cache import ResponseCacheMixin
 from .models import UserInsight
 from .serializers import UserInsightSerializer
 
 User = get_user_model()
 
 
-class UserInsightViewSet(viewsets.ModelViewSet):
+class UserInsightViewSet(ResponseCacheMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for viewing and managing AI-generated insights"""
+    cache_resource = 'insights'
     serializer_class = UserInsightSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('-generated_at', '-id')
+    ordering_options = {
+        '-generated_at': ('-generated_at', '-id'),
+        'generated_at': ('generated_at', 'id'),
+    }
+    indexed_filters = {
+        'user': IndexedFilter('user', admin_only=True, example='1'),
+        'start': IndexedFilter('generated_at', 'gte', kind='start', example='2024-01-01'),
+        'end': IndexedFilter('generated_at', 'lt', kind='end', example='2024-12-31'),
+        'severity': IndexedFilter('severity', kind='choice', choices=['low', 'medium', 'high'], example='high'),
+        'is_read': IndexedFilter('is_read', kind='bool', example='false'),
+    }
 
     def get_queryset(self):
         # Admin users can see all insights, regular users see only their own
@@ -0,0 +1,107 @@
+"""
+Conditional GET support for API views.
+
+Views compute a cheap validator (a response cache version lookup or one
+aggregate query) before building the response; viewsets get this for list and retrieve from
+ConditionalGetMixin. If the client's If-None-Match / If-Modified-Since
+still match, a 304 is returned without running the expensive queries or
+serializing anything.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from .response_cache import page_key
+
+logger = logging.getLogger(__name__)
+
+
+def make_etag(*parts):
+    """Quoted ETag derived from the validator parts (anything with a stable str())"""
+    digest = hashlib.sha256('|'.join(str(part) for part in parts).encode()).hexdigest()[:32]
+    return quote_etag(digest)
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    A 304 response if the client's cached copy is current, else None.
+    ``last_modified`` is a datetime or None.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    """
+    Add ETag/Last-Modified to a per-user response and make clients
+    revalidate it on every use.
+    """
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET for a viewset's list and retrieve actions.
+
+    A list's ETag comes from the response cache versions of the view's
+    ``cache_resource`` when the response cache is enabled: every write
+    bumps them, so no query is needed. Otherwise it is the row count and
+    latest ``conditional_timestamp_field`` of the filtered queryset (one
+    aggregate query over the user's rows), and staff lists, which would
+    count the whole table, go without validators. The ETag also covers the
+    user and the full path, so every filter, ordering and cursor has its
+    own. Deletes change the count but not the latest timestamp, so lists
+    only answer If-None-Match; Last-Modified is sent for information. A
+    detail validator is the object's own timestamp and honours both
+    headers. Either way the 304 is returned before anything is serialized.
+    """
+    conditional_timestamp_field = 'updated_at'
+
+    def list_validators(self, request):
+        """(ETag, Last-Modified) of a list page, or (None, None) to skip conditional GET"""
+        resource = getattr(self, 'cache_resource', None)
+        if resource and settings.RESPONSE_CACHE_ENABLED:
+            try:
+                return make_etag(request.user.pk, page_key(resource, request)), None
+            except Exception:
+                logger.warning('Response cache versions unavailable for %s', resource, exc_info=True)
+        if request.user.is_staff or request.user.is_superuser:
+            return None, None
+        stats = self.filter_queryset(self.get_queryset()).order_by().aggregate(
+            count=Count('pk'), latest=Max(self.conditional_timestamp_field)
+        )
+        etag = make_etag(request.user.pk, request.get_full_path(), stats['count'], stats['latest'])
+        return etag, stats['latest']
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = self.list_validators(request)
+        if etag is None:
+            return super().list(request, *args, **kwargs)
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+        response = super().list(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        last_modified = getattr(instance, self.conditional_timestamp_field)
+        etag = make_etag(request.user.pk, request.get_full_path(), instance.pk, last_modified)
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+        response = Response(self.get_serializer(instance).data)
+        return set_validators(response, etag, last_modified)
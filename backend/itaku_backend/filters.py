@@ -0,0 +1,122 @@
+"""
+Declarative, index-backed query parameter filters for the API viewsets.
+
+Viewsets list their filters in ``indexed_filters``; only filters that an
+index can serve belong there (``manage.py check_filter_indexes`` verifies
+every combination with EXPLAIN). Unknown parameters are ignored.
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+def parse_range_bound(value, tzinfo=None, end=False):
+    """
+    Parse an ISO date or datetime query parameter into an aware datetime.
+    A bare date used as an end bound covers that whole day.
+    """
+    day = parse_date(value)
+    if day is not None:
+        if end:
+            day += timedelta(days=1)
+        parsed = datetime.combine(day, time.min)
+    else:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(value)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, tzinfo)
+    return parsed
+
+
+def _parse_int(value):
+    return int(value)
+
+
+def _parse_bool(value):
+    lowered = value.lower()
+    if lowered in ('true', '1', 'yes'):
+        return True
+    if lowered in ('false', '0', 'no'):
+        return False
+    raise ValueError(value)
+
+
+def _parse_date(value):
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+
+class IndexedFilter:
+    """
+    One allowlisted query parameter.
+
+    ``kind`` selects the parser: ``int``, ``bool``, ``date``, ``start``/``end``
+    (datetime range bounds) or ``choice`` (one of ``choices``).
+    ``example`` is the value used when EXPLAINing the filter.
+    """
+    parsers = {
+        'int': _parse_int,
+        'bool': _parse_bool,
+        'date': _parse_date,
+        'start': parse_range_bound,
+        'end': lambda value: parse_range_bound(value, end=True),
+    }
+
+    def __init__(self, field, lookup='exact', kind='int', choices=None, example=None, admin_only=False):
+        self.field = field
+        self.lookup = lookup
+        self.kind = kind
+        self.choices = choices
+        self.example = example
+        self.admin_only = admin_only
+
+    def parse(self, value):
+        if self.kind == 'choice':
+            if value not in self.choices:
+                raise ValueError(value)
+            return value
+        return self.parsers[self.kind](value)
+
+    def filter_kwargs(self, value):
+        """Keyword arguments for ``filter()`` matching a parsed value"""
+        if self.kind == 'bool':
+            # "col IN (true)" rather than a bare "WHERE col", which SQLite
+            # cannot match to an index
+            return {f'{self.field}__in': [value]}
+        return {f'{self.field}__{self.lookup}': value}
+
+    def apply(self, queryset, value):
+        return queryset.filter(**self.filter_kwargs(self.parse(value)))
+
+
+class IndexedFilterBackend(BaseFilterBackend):
+    """Applies a view's ``indexed_filters`` from the request query string"""
+
+    def filter_queryset(self, request, queryset, view):
+        for indexed_filter, value in self.lookups(request, view):
+            queryset = queryset.filter(**indexed_filter.filter_kwargs(value))
+        return queryset
+
+    def lookups(self, request, view):
+        """(filter, parsed value) for each filter present in the query string"""
+        is_admin = request.user.is_staff or request.user.is_superuser
+        lookups = []
+        for param, indexed_filter in getattr(view, 'indexed_filters', {}).items():
+            value = request.query_params.get(param)
+            if value in (None, '') or (indexed_filter.admin_only and not is_admin):
+                continue
+            try:
+                lookups.append((indexed_filter, indexed_filter.parse(value)))
+            except (ValueError, TypeError):
+                if indexed_filter.kind == 'choice':
+                    message = f'Must be one of: {", ".join(indexed_filter.choices)}.'
+                else:
+                    message = f'Invalid value for {indexed_filter.kind} filter.'
+                raise ValidationError({param: [message]})
+        return lookups
@@ -0,0 +1,190 @@
+"""
+Keyset (cursor) pagination shared by all list endpoints.
+
+Unlike PageNumberPagination this never runs COUNT(*) or OFFSET: each page
+is "rows after the last row of the previous page" in a fixed ordering, so
+it is a single index range scan and deep pages cost the same as the first.
+"""
+import base64
+import json
+from collections import OrderedDict
+from operator import attrgetter
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Cursor paginator keyed on several columns.
+
+    Views choose the ordering with a ``cursor_ordering`` tuple (e.g.
+    ``('user', '-recorded_at', '-id')``); otherwise the model's
+    ``Meta.ordering`` is used. Views may also allowlist alternative,
+    index-backed orderings in ``ordering_options`` that clients select with
+    ``?ordering=``. ``id`` is always appended as the final tie-breaker so the
+    ordering is total and pages never skip or repeat rows.
+
+    Views whose rows partly live outside the table (archived readings) can
+    define ``get_extra_page_rows(ordering, values, reverse, limit)``; the
+    instances it returns, in the same order and keyset, are merged into
+    each page.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset, view, request.query_params.get(self.ordering_query_param))
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+
+        values, reverse = self.decode_cursor(request)
+        if values is not None:
+            queryset = queryset.filter(self.keyset_filter(values, reverse))
+        order_by = self.order_by_columns(self.model, self.ordering, reverse)
+        results = list(queryset.order_by(*order_by)[:self.page_size + 1])
+        get_extra_rows = getattr(view, 'get_extra_page_rows', None)
+        if get_extra_rows is not None:
+            extra = get_extra_rows(self.ordering, values, reverse, self.page_size + 1)
+            if extra:
+                results = self._sorted(results + extra, order_by)[:self.page_size + 1]
+
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next = values is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = values is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    @staticmethod
+    def get_ordering(queryset, view, requested=None):
+        options = getattr(view, 'ordering_options', {})
+        if requested and requested not in options:
+            raise ValidationError({'ordering': [f'Must be one of: {", ".join(options) or "(none)"}.']})
+        ordering = list(
+            options.get(requested)
+            or getattr(view, 'cursor_ordering', None)
+            or queryset.model._meta.ordering
+            or []
+        )
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering.append('-id')
+        return ordering
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    # Cursor encoding
+
+    def _field(self, name):
+        name = name.lstrip('-')
+        return self.model._meta.pk if name == 'pk' else self.model._meta.get_field(name)
+
+    @classmethod
+    def order_by_columns(cls, model, ordering, reverse=False):
+        """
+        The order_by() arguments of a page query: column names (user_id, not
+        user) so foreign keys don't pull in the related model's default
+        ordering, flipped for pages before the cursor.
+        """
+        columns = []
+        for name in ordering:
+            field = model._meta.pk if name.lstrip('-') == 'pk' else model._meta.get_field(name.lstrip('-'))
+            column = ('-' if name.startswith('-') else '') + field.attname
+            columns.append(cls._flip(column) if reverse else column)
+        return columns
+
+    @staticmethod
+    def _sorted(rows, order_by):
+        # One stable sort per column, least significant first
+        for field in reversed(order_by):
+            rows.sort(key=attrgetter(field.lstrip('-')), reverse=field.startswith('-'))
+        return rows
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def encode_cursor(self, instance, reverse):
+        values = []
+        for name in self.ordering:
+            value = attrgetter(self._field(name).attname)(instance)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        token = base64.urlsafe_b64encode(json.dumps({'v': values, 'r': reverse}).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            raw_values = payload['v']
+            if len(raw_values) != len(self.ordering):
+                raise ValueError
+            values = [self._field(name).to_python(value) for name, value in zip(self.ordering, raw_values)]
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return values, bool(payload.get('r'))
+
+    def keyset_filter(self, values, reverse):
+        """
+        Rows strictly after ``values`` in the ordering (before, if reverse):
+        (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z) ...
+        """
+        condition = Q()
+        equal = Q()
+        for name, value in zip(self.ordering, values):
+            descending = name.startswith('-') != reverse
+            field = self._field(name).attname
+            condition |= equal & Q(**{f"{field}__{'lt' if descending else 'gt'}": value})
+            equal &= Q(**{field: value})
+        return condition
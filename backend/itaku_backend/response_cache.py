@@ -0,0 +1,174 @@
+"""
+Versioned cache of serialized list pages.
+
+A cached page is keyed by (resource, scope, versions, full URL): the scope
+is the user ID, or 'staff' for admins (who list every user's rows). Each
+scope has a version counter per resource, plus one resource-wide epoch.
+A write bumps the owner's version and the staff version: two increments,
+with no key scans. Mass updates (management commands) bump the epoch, which
+invalidates every scope at once. Entries under old versions are never read
+again and expire after RESPONSE_CACHE_TIMEOUT.
+
+Version counters start at the current time in milliseconds rather than 0.
+A counter evicted by the cache backend therefore never restarts at a value
+whose old pages are still cached.
+
+The cache is the 'default' alias. Pages are only cached when
+RESPONSE_CACHE_ENABLED, which defaults to on when REDIS_CACHE_URL is set:
+a per-process local-memory cache never sees the bumps made by Celery
+workers or other web processes. If the cache backend fails, requests are
+served uncached rather than failing. Hit, miss and error counters per resource
+are kept in the cache and reported by cache_stats().
+"""
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+CACHED_RESOURCES = ('readings', 'health_factors', 'medications', 'insights')
+STATS_EVENTS = ('hits', 'misses', 'errors')
+STAFF_SCOPE = 'staff'
+# Validators and caching headers replayed on a hit
+CACHED_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control', 'Vary')
+
+
+def _version_key(resource, scope):
+    return f'respcache:version:{resource}:{scope}'
+
+
+def _epoch_key(resource):
+    return _version_key(resource, 'epoch')
+
+
+def _initial_version():
+    return int(time.time() * 1000)
+
+
+def _incr(key, initial=1):
+    # cache.incr() raises on missing keys; add() only succeeds if it is missing
+    if not cache.add(key, initial, None):
+        cache.incr(key)
+
+
+def _count(resource, event):
+    try:
+        _incr(f'respcache:stats:{resource}:{event}')
+    except Exception:
+        logger.warning('Could not count response cache %s for %s', event, resource, exc_info=True)
+
+
+def request_scope(request):
+    user = request.user
+    return STAFF_SCOPE if user.is_staff or user.is_superuser else str(user.pk)
+
+
+def _versions(resource, scope):
+    keys = [_epoch_key(resource), _version_key(resource, scope)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def page_key(resource, request):
+    """Cache key of the list page ``request`` asks for, at the current versions"""
+    scope = request_scope(request)
+    epoch, version = _versions(resource, scope)
+    url = hashlib.sha256(request.build_absolute_uri().encode()).hexdigest()[:32]
+    return f'respcache:page:{resource}:{scope}:{epoch}:{version}:{url}'
+
+
+def _bump(keys):
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return
+    try:
+        for key in keys:
+            _incr(key, _initial_version())
+    except Exception:
+        logger.warning('Could not bump response cache versions %s', keys, exc_info=True)
+
+
+def bump_user_versions(resource, user_ids):
+    """Invalidate the cached pages of ``user_ids`` (and staff) after commit"""
+    keys = [_version_key(resource, user_id) for user_id in sorted(set(user_ids))]
+    if keys:
+        keys.append(_version_key(resource, STAFF_SCOPE))
+        transaction.on_commit(lambda: _bump(keys))
+
+
+def bump_resource_epoch(resource):
+    """Invalidate every cached page of ``resource`` after commit"""
+    transaction.on_commit(lambda: _bump([_epoch_key(resource)]))
+
+
+def cache_stats():
+    """{resource: {'hits', 'misses', 'errors', 'hit_rate'}} since the counters were created"""
+    keys = [f'respcache:stats:{resource}:{event}' for resource in CACHED_RESOURCES for event in STATS_EVENTS]
+    values = cache.get_many(keys)
+    stats = {}
+    for resource in CACHED_RESOURCES:
+        counts = {event: values.get(f'respcache:stats:{resource}:{event}', 0) for event in STATS_EVENTS}
+        lookups = counts['hits'] + counts['misses']
+        counts['hit_rate'] = round(counts['hits'] / lookups, 3) if lookups else None
+        stats[resource] = counts
+    return stats
+
+
+class ResponseCacheMixin:
+    """
+    Serve a viewset's list pages from the versioned response cache.
+
+    Views name their ``cache_resource``; writes to the underlying model are
+    turned into version bumps by signal handlers (see accounts/signals.py),
+    and bulk paths that skip signals call bump_user_versions() themselves.
+    Put it before ConditionalGetMixin: the page's ETag and Last-Modified are
+    cached with it, so a conditional GET that hits the cache needs no
+    database query at all.
+    """
+    cache_resource = None
+
+    def list(self, request, *args, **kwargs):
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return super().list(request, *args, **kwargs)
+        try:
+            key = page_key(self.cache_resource, request)
+            entry = cache.get(key)
+        except Exception:
+            logger.warning('Response cache unavailable for %s', self.cache_resource, exc_info=True)
+            _count(self.cache_resource, 'errors')
+            return super().list(request, *args, **kwargs)
+
+        if entry is not None:
+            _count(self.cache_resource, 'hits')
+            headers = entry['headers']
+            response = None
+            if 'ETag' in headers:
+                # Lists only answer If-None-Match (see ConditionalGetMixin)
+                response = get_conditional_response(request, etag=headers['ETag'])
+            if response is None:
+                response = Response(entry['data'])
+            for name, value in headers.items():
+                response[name] = value
+            return response
+
+        _count(self.cache_resource, 'misses')
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            entry = {
+                'data': response.data,
+                'headers': {name: response[name] for name in CACHED_HEADERS if response.has_header(name)},
+            }
+            try:
+                cache.set(key, entry, settings.RESPONSE_CACHE_TIMEOUT)
+            except Exception:
+                logger.warning('Could not store a %s page in the response cache', self.cache_resource, exc_info=True)
+        return response
@@ -141,6 +141,19 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Login cost is dominated by password hashing. The first hasher hashes new
+# and upgraded passwords (and verifies every pbkdf2_sha256 hash); its
+# iteration count is tunable, and existing hashes are rehashed at the new
+# count on each user's next login. The others only verify older hashes.
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=600000, cast=int)
+PASSWORD_HASHERS = [
+    'accounts.hashers.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
@@ -174,12 +187,15 @@ AUTH_USER_MODEL = 'accounts.User'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_FILTER_BACKENDS': (
+        'itaku_backend.filters.IndexedFilterBackend',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'itaku_backend.pagination.KeysetCursorPagination',
     'PAGE_SIZE': 20,
 }
 
@@ -191,6 +207,16 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
 }
 
+# Authenticated requests resolve the user from an in-process LRU of
+# JWT_USER_CACHE_SIZE users (kept JWT_USER_CACHE_LOCAL_TTL seconds, the
+# longest another process may act on a stale user), then the shared cache
+# (JWT_USER_CACHE_TIMEOUT seconds), then the database.
+JWT_USER_CACHE_SIZE = config('JWT_USER_CACHE_SIZE', default=4096, cast=int)
+JWT_USER_CACHE_LOCAL_TTL = config('JWT_USER_CACHE_LOCAL_TTL', default=30, cast=int)
+JWT_USER_CACHE_TIMEOUT = config('JWT_USER_CACHE_TIMEOUT', default=300, cast=int)
+# Embed is_staff/is_superuser claims in issued tokens for clients to read
+JWT_USER_CLAIMS = config('JWT_USER_CLAIMS', default=False, cast=bool)
+
 # CORS Settings
 # For production, add your frontend domain here
 cors_origins = config(
@@ -223,4 +249,100 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
+# Record STARTED, so a running task is not mistaken for a lost one
+CELERY_TASK_TRACK_STARTED = True
+# Run tasks inline (no broker needed) for local development
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=False, cast=bool)
+CELERY_BEAT_SCHEDULE = {
+    'evict-expired-pdf-reports': {
+        'task': 'readings.tasks.evict_expired_pdf_reports',
+        'schedule': timedelta(hours=1),
+    },
+    'maintain-reading-partitions': {
+        'task': 'readings.tasks.maintain_reading_partitions',
+        'schedule': timedelta(days=1),
+    },
+    'generate-insights': {
+        'task': 'insights.tasks.generate_insights',
+        'schedule': timedelta(hours=1),
+    },
+    'dispatch-bp-reminders': {
+        'task': 'notifications.tasks.dispatch_bp_reminders',
+        'schedule': timedelta(minutes=1),
+    },
+}
+
+# BP reminders claimed (and rescheduled) per transaction, then sent and logged, by dispatch_bp_reminders
+BP_REMINDER_CHUNK_SIZE = config('BP_REMINDER_CHUNK_SIZE', default=500, cast=int)
+
+# Cache: Redis when REDIS_CACHE_URL is set (shared by every worker),
+# otherwise per-process local memory
+REDIS_CACHE_URL = config('REDIS_CACHE_URL', default='')
+if REDIS_CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'itaku-backend',
+        }
+    }
+
+# Revoked refresh tokens (rotation revokes the old one) live in Redis at
+# TOKEN_REVOCATION_REDIS_URL. Each process checks them against a Bloom
+# filter synced every TOKEN_REVOCATION_SYNC_SECONDS, sized for
+# TOKEN_REVOCATION_BLOOM_CAPACITY revocations per refresh token lifetime.
+TOKEN_REVOCATION_REDIS_URL = config('TOKEN_REVOCATION_REDIS_URL', default=REDIS_CACHE_URL or CELERY_BROKER_URL)
+TOKEN_REVOCATION_SYNC_SECONDS = config('TOKEN_REVOCATION_SYNC_SECONDS', default=5, cast=float)
+TOKEN_REVOCATION_BLOOM_CAPACITY = config('TOKEN_REVOCATION_BLOOM_CAPACITY', default=100000, cast=int)
+TOKEN_REVOCATION_BLOOM_ERROR_RATE = config('TOKEN_REVOCATION_BLOOM_ERROR_RATE', default=0.001, cast=float)
+
+# Seconds a serialized list page stays in the response cache; writes bump
+# the owner's version so stale pages are never served before that
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+# The response cache needs a cache shared by every process (Redis): version
+# bumps made in Celery workers or other web processes never reach a
+# per-process local-memory cache, which would keep serving stale pages
+RESPONSE_CACHE_ENABLED = config('RESPONSE_CACHE_ENABLED', default=bool(REDIS_CACHE_URL), cast=bool)
+
+# Seconds the admin dashboard summary (/api/admin/summary/) stays cached;
+# writes through the models drop it earlier
+ADMIN_SUMMARY_CACHE_TIMEOUT = config('ADMIN_SUMMARY_CACHE_TIMEOUT', default=60, cast=int)
+
+# PDF Reports
+# Cached report artifacts are reused until the readings change, and evicted after this many seconds
+PDF_REPORT_TTL = config('PDF_REPORT_TTL', default=24 * 60 * 60, cast=int)
+# A requested report that no worker has started after this many seconds is
+# reported as expired (no worker running, or the broker lost the task);
+# reports already rendering are never expired
+PDF_REPORT_PENDING_TIMEOUT = config('PDF_REPORT_PENDING_TIMEOUT', default=5 * 60, cast=int)
+
+# Monthly partitioning of the readings table (PostgreSQL, opt-in via
+# `manage.py partition_readings --convert`). Partitions older than the
+# retention window are detached; leave it unset to keep everything.
+READINGS_PARTITION_MONTHS_AHEAD = config('READINGS_PARTITION_MONTHS_AHEAD', default=3, cast=int)
+READINGS_PARTITION_RETAIN_MONTHS = config('READINGS_PARTITION_RETAIN_MONTHS', default=None, cast=lambda v: int(v) if v else None)
+
+# Columnar cold storage: `manage.py archive_readings` moves readings older
+# than READINGS_ARCHIVE_AFTER_DAYS into NumPy files under this directory
+READINGS_ARCHIVE_DIR = config('READINGS_ARCHIVE_DIR', default=str(BASE_DIR / 'archive' / 'readings'))
+READINGS_ARCHIVE_AFTER_DAYS = config('READINGS_ARCHIVE_AFTER_DAYS', default=730, cast=int)
+
+# Incremental trend tracking (insights/trends.py): readings lose half their
+# weight in the trend line every INSIGHTS_TREND_HALF_LIFE_DAYS, and a slope
+# beyond the threshold (mmHg per week) creates a trend insight
+INSIGHTS_TREND_HALF_LIFE_DAYS = config('INSIGHTS_TREND_HALF_LIFE_DAYS', default=14, cast=float)
+INSIGHTS_TREND_EWMA_ALPHA = config('INSIGHTS_TREND_EWMA_ALPHA', default=0.2, cast=float)
+INSIGHTS_TREND_SYSTOLIC_SLOPE = config('INSIGHTS_TREND_SYSTOLIC_SLOPE', default=2.0, cast=float)
+INSIGHTS_TREND_DIASTOLIC_SLOPE = config('INSIGHTS_TREND_DIASTOLIC_SLOPE', default=1.5, cast=float)
+
+# Batch insight generation (insights/generation.py) runs one task per shard
+# of this many user IDs, and never scans readings older than the catch-up window
+INSIGHTS_SHARD_SIZE = config('INSIGHTS_SHARD_SIZE', default=5000, cast=int)
+INSIGHTS_MAX_CATCHUP_DAYS = config('INSIGHTS_MAX_CATCHUP_DAYS', default=7, cast=int)
 
@@ -4,16 +4,23 @@ URL configuration for itaku_backend project.
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from accounts.serializers import CustomTokenObtainPairSerializer
+from accounts.serializers import CustomTokenObtainPairSerializer, CustomTokenRefreshSerializer
+from accounts.views import admin_summary, admin_cache_stats, dashboard
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
+class CustomTokenRefreshView(TokenRefreshView):
+    serializer_class = CustomTokenRefreshSerializer
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
     path('api/auth/', include('accounts.urls')),
+    path('api/admin/summary/', admin_summary, name='admin_summary'),
+    path('api/admin/cache-stats/', admin_cache_stats, name='admin_cache_stats'),
+    path('api/dashboard/', dashboard, name='dashboard'),
     path('api/readings/', include('readings.urls')),
     path('api/health-factors/', include('health_factors.urls')),
     path('api/insights/', include('insights.urls')),
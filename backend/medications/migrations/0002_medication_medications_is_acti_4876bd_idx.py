@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("medications", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="medication",
+            index=models.Index(
+                fields=["-is_active", "-start_date"],
+                name="medications_is_acti_4876bd_idx",
+            ),
+        ),
+    ]
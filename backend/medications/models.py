@@ -42,6 +42,7 @@ class Medication(models.Model):
         indexes = [
             models.Index(fields=['user', '-is_active']),
             models.Index(fields=['user', '-start_date']),
+            models.Index(fields=['-is_active', '-start_date']),
         ]
 
     def __str__(self):
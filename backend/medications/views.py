@@ -3,6 +3,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
+from itaku_backend.filters import IndexedFilter
+from itaku_backend.response_cache import ResponseCacheMixin
 from .models import Medication, MedicationLog
 from .serializers import (
     MedicationSerializer,
@@ -13,10 +15,15 @@ from .serializers import (
 User = get_user_model()
 
 
-class MedicationViewSet(viewsets.ModelViewSet):
+class MedicationViewSet(ResponseCacheMixin, viewsets.ModelViewSet):
     """ViewSet for managing medications"""
+    cache_resource = 'medications'
     serializer_class = MedicationSerializer
     permission_classes = [IsAuthenticated]
+    indexed_filters = {
+        'user': IndexedFilter('user', admin_only=True, example='1'),
+        'is_active': IndexedFilter('is_active', kind='bool', example='true'),
+    }
 
     def get_queryset(self):
         # Admin users can see all medications, regular users see only their own
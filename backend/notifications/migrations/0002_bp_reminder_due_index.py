@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notificationpreferences",
+            index=models.Index(
+                fields=["bp_reminder_enabled", "bp_reminder_time"],
+                name="notificatio_bp_remi_07d383_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:20
+
+from django.db import migrations, models
+from django.utils import timezone
+import notifications.schedule
+
+
+def schedule_existing_reminders(apps, schema_editor):
+    NotificationPreferences = apps.get_model("notifications", "NotificationPreferences")
+    now = timezone.now()
+    preferences = list(NotificationPreferences.objects.filter(bp_reminder_enabled=True))
+    for preference in preferences:
+        preference.next_reminder_at = notifications.schedule.next_reminder_at(
+            now, preference.bp_reminder_time, preference.bp_reminder_frequency
+        )
+    NotificationPreferences.objects.bulk_update(
+        preferences, ["next_reminder_at"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0002_bp_reminder_due_index"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="notificationpreferences",
+            name="notificatio_bp_remi_07d383_idx",
+        ),
+        migrations.AddField(
+            model_name="notificationpreferences",
+            name="next_reminder_at",
+            field=models.DateTimeField(
+                blank=True,
+                editable=False,
+                help_text="When the next BP reminder is due (empty when reminders are off)",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="notificationpreferences",
+            name="timezone",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="IANA time zone of the reminder time, e.g. 'Africa/Nairobi' (blank: UTC)",
+                max_length=64,
+                validators=[notifications.schedule.validate_zone_name],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notificationpreferences",
+            index=models.Index(
+                fields=["next_reminder_at"], name="notificatio_next_re_815fc1_idx"
+            ),
+        ),
+        migrations.RunPython(schedule_existing_reminders, migrations.RunPython.noop),
+    ]
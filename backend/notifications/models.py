@@ -1,5 +1,8 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from .schedule import next_reminder_at, validate_zone_name
 
 User = get_user_model()
 
@@ -30,6 +33,19 @@ class NotificationPreferences(models.Model):
         default='09:00',
         help_text="Preferred time for BP reminders (24-hour format)"
     )
+    timezone = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        validators=[validate_zone_name],
+        help_text="IANA time zone of the reminder time, e.g. 'Africa/Nairobi' (blank: UTC)"
+    )
+    next_reminder_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="When the next BP reminder is due (empty when reminders are off)"
+    )
     medication_reminder_enabled = models.BooleanField(
         default=True,
         help_text="Receive reminders for medications"
@@ -44,10 +60,46 @@ class NotificationPreferences(models.Model):
     class Meta:
         verbose_name = "Notification Preferences"
         verbose_name_plural = "Notification Preferences"
+        indexes = [
+            # Serves the due-reminder claim in reminders.py
+            models.Index(fields=['next_reminder_at']),
+        ]
+
+    SCHEDULE_FIELDS = ('bp_reminder_enabled', 'bp_reminder_frequency', 'bp_reminder_time', 'timezone')
 
     def __str__(self):
         return f"{self.user.email} - Notification Preferences"
 
+    def schedule_next_reminder(self, after, previous=None):
+        """Set next_reminder_at to the first reminder after ``after`` (see schedule.py)"""
+        if not self.bp_reminder_enabled:
+            self.next_reminder_at = None
+            return
+        reminder_time = self._meta.get_field('bp_reminder_time').to_python(self.bp_reminder_time)
+        self.next_reminder_at = next_reminder_at(
+            after, reminder_time, self.bp_reminder_frequency, self.timezone, previous
+        )
+
+    def _schedule_changed(self):
+        if self.pk is None or (self.bp_reminder_enabled and self.next_reminder_at is None):
+            return True
+        stored = type(self).objects.filter(pk=self.pk).values(*self.SCHEDULE_FIELDS).first()
+        return stored is None or any(
+            stored[field] != self._meta.get_field(field).to_python(getattr(self, field))
+            for field in self.SCHEDULE_FIELDS
+        )
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or set(self.SCHEDULE_FIELDS) & set(update_fields):
+            # Other edits keep the current schedule, so they can't bring a
+            # weekly reminder forward
+            if self._schedule_changed():
+                self.schedule_next_reminder(timezone.now())
+                if update_fields is not None:
+                    kwargs['update_fields'] = set(update_fields) | {'next_reminder_at'}
+        super().save(*args, **kwargs)
+
 
 class NotificationLog(models.Model):
     """Log of sent notifications"""
@@ -0,0 +1,135 @@
+"""
+Bulk BP reminder dispatch.
+
+Each preferences row stores when its next reminder is due (next_reminder_at,
+see schedule.py), so finding due users is an index range scan. Workers
+claim BP_REMINDER_CHUNK_SIZE due rows at a time with SELECT ... FOR UPDATE
+SKIP LOCKED and move their next_reminder_at on in the same short
+transaction. Several workers can therefore dispatch at once without sending
+a reminder twice. The claim commits before anything is sent, so the row
+locks are never held across SMTP round trips. A worker killed mid-chunk
+skips the rest of that chunk's reminders rather than resending the ones
+already delivered. Each chunk is then rendered in one go, sent over one
+SMTP connection reused for the whole run, and its results written with a
+single NotificationLog bulk_create.
+
+A failed send is logged and the user's schedule moves on to the next
+reminder.
+"""
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import NotificationLog, NotificationPreferences
+
+BP_REMINDER_SUBJECT = "Reminder: Take Your Blood Pressure Reading ❤️"
+
+
+def bp_reminder_message(name):
+    return f"""
+Hello {name},
+
+This is a friendly reminder to take your daily blood pressure reading.
+
+Tracking your BP regularly helps you:
+- Monitor your cardiovascular health
+- Identify patterns and trends
+- Share accurate data with your healthcare provider
+
+Log in to Moyo to record your reading: {getattr(settings, 'FRONTEND_URL', 'https://moyo.app')}
+
+Stay healthy!
+The Moyo Team ❤️
+    """.strip()
+
+
+def claim_due_preferences(now, limit):
+    """
+    Lock up to ``limit`` preferences whose reminder is due at ``now``,
+    skipping rows locked by other workers. Call inside a transaction.
+    """
+    return list(
+        NotificationPreferences.objects.select_for_update(skip_locked=True, of=('self',))
+        .filter(next_reminder_at__lte=now)
+        .select_related('user')
+        .only(
+            'user_id', 'bp_reminder_enabled', 'bp_reminder_frequency', 'bp_reminder_time',
+            'timezone', 'next_reminder_at',
+            'user__email', 'user__first_name', 'user__username', 'user__is_active',
+        )
+        .order_by('next_reminder_at')[:limit]
+    )
+
+
+def _send_each(connection, messages):
+    """
+    Send ``messages`` over ``connection``; returns one error string per
+    message ('' when it was sent). Messages go one per call so a failure
+    is attributed to its recipient and nothing before it is resent.
+    """
+    errors = []
+    for message in messages:
+        try:
+            connection.send_messages([message])
+            errors.append('')
+        except Exception as e:
+            errors.append(str(e) or e.__class__.__name__)
+            # The SMTP session may be broken; start a fresh one
+            connection.close()
+            try:
+                connection.open()
+            except Exception:
+                # The next send opens its own connection (or fails and is logged)
+                pass
+    return errors
+
+
+def send_bp_reminders(now=None, chunk_size=None):
+    """
+    Send the BP reminders due at ``now`` (default: the current time) and
+    schedule the next ones. Returns counts of the reminders sent and failed.
+    """
+    now = now or timezone.now()
+    chunk_size = chunk_size or settings.BP_REMINDER_CHUNK_SIZE
+
+    sent = failed = 0
+    with get_connection(fail_silently=False) as connection:
+        while True:
+            with transaction.atomic():
+                preferences = claim_due_preferences(now, chunk_size)
+                if not preferences:
+                    break
+                for preference in preferences:
+                    preference.schedule_next_reminder(now, previous=preference.next_reminder_at)
+                NotificationPreferences.objects.bulk_update(preferences, ['next_reminder_at'])
+
+            # Inactive users' schedules move on without a send
+            recipients = [preference for preference in preferences if preference.user.is_active]
+            bodies = [
+                bp_reminder_message(preference.user.first_name or preference.user.username)
+                for preference in recipients
+            ]
+            messages = [
+                EmailMessage(
+                    BP_REMINDER_SUBJECT, body, settings.DEFAULT_FROM_EMAIL, [preference.user.email],
+                    connection=connection,
+                )
+                for preference, body in zip(recipients, bodies)
+            ]
+            errors = _send_each(connection, messages)
+            NotificationLog.objects.bulk_create([
+                NotificationLog(
+                    user_id=preference.user_id,
+                    notification_type='bp_reminder',
+                    subject=BP_REMINDER_SUBJECT,
+                    message=body if not error else '',
+                    sent_successfully=not error,
+                    error_message=error,
+                )
+                for preference, body, error in zip(recipients, bodies, errors)
+            ])
+            chunk_failed = sum(1 for error in errors if error)
+            failed += chunk_failed
+            sent += len(errors) - chunk_failed
+    return {'sent': sent, 'failed': failed}
@@ -0,0 +1,62 @@
+"""
+BP reminder schedule: when a user's next reminder is due.
+
+Reminders go out at the user's bp_reminder_time in their time zone (UTC
+when none is set):
+- daily: every day
+- twice_weekly: every Monday and Thursday
+- weekly / biweekly: 7 / 14 days after the previous reminder (the first one
+  on the next day the time comes round)
+
+NotificationPreferences stores the result in next_reminder_at, recomputed
+whenever the schedule fields change and after each send, so the dispatcher
+only reads an index range.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.core.exceptions import ValidationError
+
+# Days between a reminder and the earliest next one
+MIN_GAP_DAYS = {
+    'daily': 1,
+    'twice_weekly': 1,
+    'weekly': 7,
+    'biweekly': 14,
+}
+TWICE_WEEKLY_DAYS = (0, 3)  # Monday, Thursday
+
+
+def reminder_zone(name):
+    """ZoneInfo for a stored time zone name; UTC when blank"""
+    return ZoneInfo(name) if name else dt_timezone.utc
+
+
+def validate_zone_name(name):
+    try:
+        reminder_zone(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValidationError('Unknown time zone.')
+
+
+def next_reminder_at(after, reminder_time, frequency, zone_name='', previous=None):
+    """
+    The first reminder instant later than ``after`` (an aware datetime).
+    ``previous`` is the scheduled time of the reminder just sent, if any; the
+    next one then comes at least the frequency's minimum gap later.
+    """
+    zone = reminder_zone(zone_name)
+    first_day = after.astimezone(zone).date()
+    if previous is not None:
+        first_day = max(first_day, previous.astimezone(zone).date() + timedelta(days=MIN_GAP_DAYS[frequency]))
+    # Twice weekly needs at most a week to reach a reminder day; one extra
+    # day covers a time already passed today
+    for offset in range(8):
+        day = first_day + timedelta(days=offset)
+        if frequency == 'twice_weekly' and day.weekday() not in TWICE_WEEKLY_DAYS:
+            continue
+        # A time skipped by a DST change resolves to the matching instant after it
+        candidate = datetime.combine(day, reminder_time, tzinfo=zone).astimezone(dt_timezone.utc)
+        if candidate > after:
+            return candidate
+    raise AssertionError('no reminder day within 8 days')
@@ -15,12 +15,14 @@ class NotificationPreferencesSerializer(serializers.ModelSerializer):
             'bp_reminder_enabled',
             'bp_reminder_frequency',
             'bp_reminder_time',
+            'timezone',
+            'next_reminder_at',
             'medication_reminder_enabled',
             'insight_notifications_enabled',
             'created_at',
             'updated_at',
         ]
-        read_only_fields = ['user', 'created_at', 'updated_at']
+        read_only_fields = ['user', 'next_reminder_at', 'created_at', 'updated_at']
 
 
 class NotificationLogSerializer(serializers.ModelSerializer):
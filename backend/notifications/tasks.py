@@ -5,13 +5,20 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import timedelta
 from .models import NotificationPreferences, NotificationLog
+from .reminders import BP_REMINDER_SUBJECT, bp_reminder_message, send_bp_reminders
 
 User = get_user_model()
 
 
+@shared_task
+def dispatch_bp_reminders():
+    """Send every due BP reminder over one SMTP connection (see reminders.py)"""
+    return send_bp_reminders()
+
+
 @shared_task
 def send_bp_reminder_email(user_id):
-    """Send BP reading reminder email to a user"""
+    """Send BP reading reminder email to one user, regardless of schedule"""
     try:
         user = User.objects.get(pk=user_id)
         preferences = NotificationPreferences.objects.filter(user=user).first()
@@ -19,26 +26,12 @@ def send_bp_reminder_email(user_id):
         if not preferences or not preferences.bp_reminder_enabled:
             return
         
-        subject = "Reminder: Take Your Blood Pressure Reading ❤️"
-        message = f"""
-Hello {user.first_name or user.username},
-
-This is a friendly reminder to take your daily blood pressure reading.
-
-Tracking your BP regularly helps you:
-- Monitor your cardiovascular health
-- Identify patterns and trends
-- Share accurate data with your healthcare provider
-
-Log in to Moyo to record your reading: {getattr(settings, 'FRONTEND_URL', 'https://moyo.app')}
-
-Stay healthy!
-The Moyo Team ❤️
-        """
+        subject = BP_REMINDER_SUBJECT
+        message = bp_reminder_message(user.first_name or user.username)
         
         send_mail(
             subject,
-            message.strip(),
+            message,
             settings.DEFAULT_FROM_EMAIL,
             [user.email],
             fail_silently=False,
@@ -44,6 +44,7 @@ class NotificationLogViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for viewing notification logs (read-only)"""
     serializer_class = NotificationLogSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('-sent_at', '-id')
 
     def get_queryset(self):
         # Admin users can see all logs, regular users see only their own
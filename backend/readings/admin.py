@@ -6,7 +6,7 @@ from .models import BloodPressureReading
 @admin.register(BloodPressureReading)
 class BloodPressureReadingAdmin(admin.ModelAdmin):
     list_display = ('user', 'bp_display', 'category_badge', 'heart_rate', 'recorded_at', 'has_notes')
-    list_filter = ('recorded_at', 'created_at', 'user')
+    list_filter = ('category', 'recorded_at', 'created_at', 'user')
     search_fields = ('user__email', 'user__username', 'notes')
     readonly_fields = ('created_at', 'updated_at', 'category_display')
     date_hierarchy = 'recorded_at'
@@ -59,6 +59,7 @@ class BloodPressureReadingAdmin(admin.ModelAdmin):
             color, label
         )
     category_badge.short_description = 'Category'
+    category_badge.admin_order_field = 'category'
     
     def category_display(self, obj):
         """Display category in readonly field"""
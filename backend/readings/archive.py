@@ -0,0 +1,515 @@
+"""
+Columnar cold storage for old readings.
+
+``manage.py archive_readings`` moves each user's readings older than a
+cutoff out of the readings table into a segment: one ``.npy`` file per
+column (int16 pressures and heart rate, int64 epoch microseconds for
+timestamps) plus a sparse ``notes.json``, indexed by a
+ReadingArchiveSegment row. Files are read back memory-mapped, so only the
+pages a query touches are loaded.
+
+ArchivedReadings is the read side: a small, queryset-like object that the
+list, aggregate, series, export and PDF report paths (and the daily
+rollups) merge with the hot table, so archived history stays queryable
+through the same API.
+"""
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import groupby
+from operator import attrgetter
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldError
+from django.db import connection, transaction
+from django.db.models import Count, Max, Sum
+
+from accounts.summary import invalidate_admin_summary
+from itaku_backend.response_cache import bump_user_versions
+from .models import BloodPressureReading, ReadingArchiveSegment, BP_CATEGORY_CHOICES
+
+User = get_user_model()
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MISSING_HEART_RATE = -1
+
+ARCHIVE_COLUMNS = {
+    'id': np.int64,
+    'recorded_at': np.int64,
+    'created_at': np.int64,
+    'updated_at': np.int64,
+    'systolic': np.int16,
+    'diastolic': np.int16,
+    'heart_rate': np.int16,
+}
+TIMESTAMP_COLUMNS = ('recorded_at', 'created_at', 'updated_at')
+BP_CATEGORIES = [value for value, _ in BP_CATEGORY_CHOICES]
+
+# Model field names the archive can order and filter on, and their columns
+ARCHIVE_FIELDS = {'user': 'user_id', 'user_id': 'user_id', 'id': 'id', 'pk': 'id', 'recorded_at': 'recorded_at'}
+
+# Local period start of a naive local datetime, per aggregate bucket
+PERIOD_STARTS = {
+    'day': lambda local: local.replace(hour=0, minute=0, second=0, microsecond=0),
+    'week': lambda local: (local - timedelta(days=local.weekday())).replace(hour=0, minute=0, second=0, microsecond=0),
+    'month': lambda local: local.replace(day=1, hour=0, minute=0, second=0, microsecond=0),
+}
+# Every UTC offset in use is a multiple of 15 minutes, so all instants in
+# one quarter hour fall into the same local day, week and month
+PERIOD_QUANTUM = 15 * 60 * 1_000_000
+
+
+def to_micros(value):
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(value):
+    return EPOCH + timedelta(microseconds=int(value))
+
+
+def archive_root():
+    return Path(settings.READINGS_ARCHIVE_DIR)
+
+
+def segment_dir(segment):
+    return archive_root() / str(segment.user_id) / segment.name
+
+
+def categorize_array(systolic, diastolic):
+    """Vectorized categorize_bp()"""
+    systolic = np.asarray(systolic)
+    diastolic = np.asarray(diastolic)
+    return np.select(
+        [
+            (systolic < 120) & (diastolic < 80),
+            (systolic < 130) & (diastolic < 80),
+            (systolic < 140) | (diastolic < 90),
+        ],
+        ['normal', 'elevated', 'high_stage1'],
+        default='high_stage2',
+    )
+
+
+def combine_stats(first, second):
+    """Merge two reading statistics dicts (as built by ArchivedReadings.summarize())"""
+    combined = {}
+    for key in first.keys() | second.keys():
+        a, b = first.get(key), second.get(key)
+        if a is None or b is None:
+            combined[key] = b if a is None else a
+        elif key.endswith('_min'):
+            combined[key] = min(a, b)
+        elif key.endswith('_max'):
+            combined[key] = max(a, b)
+        else:
+            combined[key] = a + b
+    return combined
+
+
+def _group_stats(groups, size, systolic, diastolic, heart_rate):
+    """Per-group count, sums, sums of squares, min/max and category counts"""
+    stats = {'reading_count': np.bincount(groups, minlength=size)}
+    for field, values in (('systolic', systolic), ('diastolic', diastolic), ('heart_rate', heart_rate)):
+        values = values.astype(np.int64)
+        present = values != MISSING_HEART_RATE if field == 'heart_rate' else slice(None)
+        member, values = groups[present], values[present]
+        if field == 'heart_rate':
+            stats['heart_rate_count'] = np.bincount(member, minlength=size)
+        stats[f'{field}_sum'] = np.bincount(member, weights=values, minlength=size)
+        stats[f'{field}_sum_sq'] = np.bincount(member, weights=values * values, minlength=size)
+        minimum = np.full(size, np.iinfo(np.int64).max)
+        maximum = np.full(size, np.iinfo(np.int64).min)
+        np.minimum.at(minimum, member, values)
+        np.maximum.at(maximum, member, values)
+        stats[f'{field}_min'] = minimum
+        stats[f'{field}_max'] = maximum
+    categories = categorize_array(systolic, diastolic)
+    for category in BP_CATEGORIES:
+        stats[f'{category}_count'] = np.bincount(groups[categories == category], minlength=size)
+
+    rows = []
+    for index in range(size):
+        row = {key: int(round(float(values[index]))) for key, values in stats.items()}
+        for field, count in (('systolic', 'reading_count'), ('diastolic', 'reading_count'),
+                             ('heart_rate', 'heart_rate_count')):
+            if not row[count]:
+                row[f'{field}_min'] = row[f'{field}_max'] = None
+        rows.append(row)
+    return rows
+
+
+def _period_groups(recorded_at, bucket, tzinfo):
+    """(period starts, group index of each reading) for aggregate buckets"""
+    quanta, inverse = np.unique(np.asarray(recorded_at) // PERIOD_QUANTUM, return_inverse=True)
+    period_start = PERIOD_STARTS[bucket]
+    starts = []
+    for quantum in quanta:
+        local = from_micros(quantum * PERIOD_QUANTUM).astimezone(tzinfo)
+        starts.append(period_start(local.replace(tzinfo=None)))
+    periods, period_of_quantum = np.unique(np.array(starts, dtype='datetime64[us]'), return_inverse=True)
+    aware = [
+        datetime.fromisoformat(str(period)).replace(tzinfo=tzinfo)
+        for period in periods
+    ]
+    return aware, period_of_quantum[inverse]
+
+
+class ArchivedReadings:
+    """
+    Read-only, queryset-like view over archived readings.
+
+    ``filter()`` supports the lookups the readings API uses: ``user`` /
+    ``user_id`` (exact, in, gte, lte), ``recorded_at`` (exact, gt, gte, lt,
+    lte) and ``category`` (exact). Segments outside a ``recorded_at`` range
+    are skipped without opening their files.
+    """
+
+    def __init__(self, segments=None, lookups=()):
+        self.segments = ReadingArchiveSegment.objects.all() if segments is None else segments
+        self.lookups = tuple(lookups)
+
+    def filter(self, **kwargs):
+        segments = self.segments
+        lookups = list(self.lookups)
+        for key, value in kwargs.items():
+            field, _, lookup = key.partition('__')
+            lookup = lookup or 'exact'
+            column = ARCHIVE_FIELDS.get(field, field)
+            if column == 'user_id' and lookup in ('exact', 'in', 'gte', 'lte'):
+                segments = segments.filter(**{f'user_id__{lookup}': value})
+            elif column == 'recorded_at' and lookup in ('exact', 'gt', 'gte', 'lt', 'lte'):
+                if lookup in ('exact', 'gt', 'gte'):
+                    segments = segments.filter(**{f'last_recorded_at__{"gte" if lookup == "exact" else lookup}': value})
+                if lookup in ('exact', 'lt', 'lte'):
+                    segments = segments.filter(**{f'first_recorded_at__{"lte" if lookup == "exact" else lookup}': value})
+                lookups.append((column, lookup, to_micros(value)))
+            elif column == 'category' and lookup == 'exact':
+                lookups.append((column, lookup, value))
+            else:
+                raise FieldError(f'Archived readings cannot be filtered on {key}')
+        return ArchivedReadings(segments, lookups)
+
+    def _bounds(self, recorded_at):
+        """[start, end) slice of a segment's sorted recorded_at within the recorded_at lookups"""
+        start, end = 0, len(recorded_at)
+        for column, lookup, value in self.lookups:
+            if column != 'recorded_at':
+                continue
+            if lookup in ('exact', 'gte'):
+                start = max(start, int(np.searchsorted(recorded_at, value, 'left')))
+            if lookup == 'gt':
+                start = max(start, int(np.searchsorted(recorded_at, value, 'right')))
+            if lookup in ('exact', 'lte'):
+                end = min(end, int(np.searchsorted(recorded_at, value, 'right')))
+            if lookup == 'lt':
+                end = min(end, int(np.searchsorted(recorded_at, value, 'left')))
+        return start, end
+
+    def _open(self, segment, fields):
+        """Memory-mapped columns of one segment that ``fields`` and the lookups need"""
+        directory = segment_dir(segment)
+        needed = set(fields) | {'id', 'recorded_at'}
+        if any(column == 'category' for column, _, _ in self.lookups):
+            needed |= {'systolic', 'diastolic'}
+        return {name: np.load(directory / f'{name}.npy', mmap_mode='r') for name in needed}
+
+    def _category_mask(self, columns):
+        categories = [value for column, _, value in self.lookups if column == 'category']
+        if not categories:
+            return None
+        category = categorize_array(columns['systolic'], columns['diastolic'])
+        return np.logical_and.reduce([category == value for value in categories])
+
+    def _load(self, segment, fields):
+        """Memory-mapped columns of one segment, with the lookups applied"""
+        columns = self._open(segment, fields)
+        start, end = self._bounds(columns['recorded_at'])
+        if start >= end:
+            return None
+        columns = {name: values[start:end] for name, values in columns.items()}
+        mask = self._category_mask(columns)
+        if mask is not None:
+            columns = {name: values[mask] for name, values in columns.items()}
+        return columns
+
+    def _seek(self, segment, fields, bound, descending, limit):
+        """
+        Up to ``limit`` matching rows of one segment next to the cursor
+        ``bound`` (``(recorded_at, id)`` in microseconds, or None): the
+        first ones after it in (recorded_at, id) order, or the last ones
+        before it when ``descending``. The cursor position is found by
+        binary search, and only windows from there on are read.
+        """
+        columns = self._open(segment, fields)
+        recorded_at = columns['recorded_at']
+        start, end = self._bounds(recorded_at)
+        if bound is not None:
+            if descending:
+                end = min(end, int(np.searchsorted(recorded_at, bound[0], 'right')))
+            else:
+                start = max(start, int(np.searchsorted(recorded_at, bound[0], 'left')))
+        parts, found, step = [], 0, max(limit, 1)
+        while start < end and found < limit:
+            if descending:
+                window, end = slice(max(start, end - step), end), max(start, end - step)
+            else:
+                window, start = slice(start, min(end, start + step)), min(end, start + step)
+            part = {name: np.asarray(values[window]) for name, values in columns.items()}
+            mask = self._category_mask(part)
+            if mask is None:
+                mask = np.ones(len(part['id']), dtype=bool)
+            if bound is not None:
+                part_recorded_at, part_id = part['recorded_at'], part['id']
+                if descending:
+                    mask &= (part_recorded_at < bound[0]) | ((part_recorded_at == bound[0]) & (part_id < bound[1]))
+                else:
+                    mask &= (part_recorded_at > bound[0]) | ((part_recorded_at == bound[0]) & (part_id > bound[1]))
+            part = {name: values[mask] for name, values in part.items()}
+            parts.append(part)
+            found += len(part['id'])
+            # Widen the window when a category filter left it short
+            step *= 2
+        if not found:
+            return None
+        if descending:
+            parts.reverse()
+        columns = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+        window = slice(-limit, None) if descending else slice(None, limit)
+        return {name: values[window] for name, values in columns.items()}
+
+    def _notes(self, segments):
+        notes = {}
+        for segment in segments:
+            path = segment_dir(segment) / 'notes.json'
+            if path.exists():
+                notes.update({int(pk): note for pk, note in json.loads(path.read_text()).items()})
+        return notes
+
+    def blocks(self, fields=ARCHIVE_COLUMNS, descending_users=False, notes=False):
+        """
+        Yield ``(user_id, columns, notes)`` per user, with the user's rows
+        sorted by (recorded_at, id) across all of their segments.
+        """
+        segments = self.segments.order_by('-user_id' if descending_users else 'user_id', 'first_recorded_at')
+        for user_id, group in groupby(segments, key=attrgetter('user_id')):
+            group = list(group)
+            parts = [part for part in (self._load(segment, fields) for segment in group) if part is not None]
+            parts = [part for part in parts if len(part['id'])]
+            if not parts:
+                continue
+            if len(parts) == 1:
+                columns = parts[0]
+            else:
+                columns = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+                order = np.lexsort((columns['id'], columns['recorded_at']))
+                columns = {name: values[order] for name, values in columns.items()}
+            yield user_id, columns, (self._notes(group) if notes else {})
+
+    def columns(self, fields):
+        """All matching rows' columns concatenated (in user, recorded_at order)"""
+        parts = [columns for _, columns, _ in self.blocks(fields)]
+        if not parts:
+            return {name: np.empty(0, dtype=ARCHIVE_COLUMNS[name]) for name in set(fields) | {'id', 'recorded_at'}}
+        return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+    def iter_summaries(self, bucket, tzinfo):
+        """
+        Yield ``(user_id, period start, stats)`` with the DailyRollup
+        statistics (count, sums, sums of squares, min/max, category counts)
+        per bucket, by user and then period.
+        """
+        for user_id, columns, _ in self.blocks(['systolic', 'diastolic', 'heart_rate']):
+            periods, groups = _period_groups(columns['recorded_at'], bucket, tzinfo)
+            stats = _group_stats(groups, len(periods), columns['systolic'], columns['diastolic'], columns['heart_rate'])
+            for period, row in zip(periods, stats):
+                yield user_id, period, row
+
+    def summarize(self, bucket, tzinfo):
+        """``{(user_id, period start): stats}`` of iter_summaries()"""
+        return {(user_id, period): row for user_id, period, row in self.iter_summaries(bucket, tzinfo)}
+
+    def segment_stats(self):
+        """
+        Number, total rows and newest id of the matching segments: changes
+        whenever readings are archived or archived segments go away.
+        """
+        return self.segments.order_by().aggregate(segments=Count('id'), rows=Sum('row_count'), latest=Max('id'))
+
+    def user_emails(self):
+        """{user_id: email} of the users with matching segments"""
+        return dict(User.objects.filter(pk__in=self.segments.values('user_id')).values_list('pk', 'email'))
+
+    def iter_rows(self):
+        """Yield export dicts (as iter_readings_keyset()) in (user, -recorded_at, -id) order"""
+        emails = self.user_emails()
+        for user_id, columns, notes in self.blocks(notes=True):
+            for index in range(len(columns['id']) - 1, -1, -1):
+                yield self._row(user_id, emails.get(user_id), columns, notes, index)
+
+    @staticmethod
+    def _row(user_id, email, columns, notes, index):
+        pk = int(columns['id'][index])
+        systolic = int(columns['systolic'][index])
+        diastolic = int(columns['diastolic'][index])
+        heart_rate = int(columns['heart_rate'][index])
+        return {
+            'id': pk,
+            'user': user_id,
+            'user_email': email,
+            'systolic': systolic,
+            'diastolic': diastolic,
+            'heart_rate': None if heart_rate == MISSING_HEART_RATE else heart_rate,
+            'recorded_at': from_micros(columns['recorded_at'][index]),
+            'notes': notes.get(pk, ''),
+            'created_at': from_micros(columns['created_at'][index]),
+            'updated_at': from_micros(columns['updated_at'][index]),
+            'category': str(categorize_array(systolic, diastolic)),
+        }
+
+    def page(self, ordering, values, reverse, limit):
+        """
+        Up to ``limit`` archived readings as unsaved model instances flagged
+        ``archived`` (they cannot be edited or deleted), in the keyset
+        paginator's order: ``ordering`` (e.g. ``['user',
+        '-recorded_at', '-id']``, flipped when ``reverse``), strictly after
+        the cursor ``values`` when given.
+
+        Each segment is sorted by (recorded_at, id), so the ordering must be
+        an optional ``user`` followed by ``recorded_at`` and ``id`` in the
+        same direction; each segment is then read only around the cursor.
+        """
+        order = []
+        for name in ordering:
+            column = ARCHIVE_FIELDS.get(name.lstrip('-'))
+            if column is None:
+                raise FieldError(f'Archived readings cannot be ordered by {name}')
+            order.append((column, name.startswith('-') != reverse))
+        by_user = order[0][0] == 'user_id'
+        keys = order[1:] if by_user else order
+        if [column for column, _ in keys] != ['recorded_at', 'id'] or keys[0][1] != keys[1][1]:
+            raise FieldError('Archived readings can only be ordered by user, recorded_at and id')
+        descending = keys[0][1]
+
+        archived, cursor_user, bound = self, None, None
+        if values is not None:
+            if by_user:
+                cursor_user, values = int(values[0]), values[1:]
+                archived = archived.filter(**{f'user_id__{"lte" if order[0][1] else "gte"}': cursor_user})
+            bound = (to_micros(values[0]), int(values[1]))
+
+        segments = archived.segments.order_by(
+            '-user_id' if by_user and order[0][1] else 'user_id', 'first_recorded_at'
+        )
+        rows = []
+        for user_id, group in groupby(segments, key=attrgetter('user_id')):
+            group = list(group)
+            user_bound = bound if not by_user or user_id == cursor_user else None
+            parts = [part for part in (
+                archived._seek(segment, ARCHIVE_COLUMNS, user_bound, descending, limit) for segment in group
+            ) if part is not None]
+            if not parts:
+                continue
+            columns = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+            sort = np.lexsort((columns['id'], columns['recorded_at']))
+            sort = sort[::-1][:limit] if descending else sort[:limit]
+            notes = self._notes(group)
+            rows.extend((user_id, columns, notes, index) for index in sort)
+            if by_user and len(rows) >= limit:
+                break
+
+        if not by_user:
+            rows.sort(key=lambda row: (int(row[1]['recorded_at'][row[3]]), int(row[1]['id'][row[3]])),
+                      reverse=descending)
+        rows = rows[:limit]
+
+        users = User.objects.in_bulk({row[0] for row in rows})
+        instances = []
+        for user_id, columns, notes, index in rows:
+            row = self._row(user_id, None, columns, notes, index)
+            row.pop('user_email')
+            instance = BloodPressureReading(user=users.get(row.pop('user')), **row)
+            instance.user_id = user_id
+            instance.archived = True
+            instances.append(instance)
+        return instances
+
+
+def write_segment(user_id, rows):
+    """
+    Write ``rows`` (value dicts of one user's readings, ordered by
+    recorded_at and id) as a new segment directory. Returns the unsaved
+    ReadingArchiveSegment describing it.
+    """
+    first, last = rows[0]['recorded_at'], rows[-1]['recorded_at']
+    segment = ReadingArchiveSegment(
+        user_id=user_id,
+        name=f'{first:%Y%m%d}-{last:%Y%m%d}-{uuid.uuid4().hex[:8]}',
+        row_count=len(rows),
+        first_recorded_at=first,
+        last_recorded_at=last,
+    )
+    directory = segment_dir(segment)
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    # Write into a temporary directory and rename it into place, so readers
+    # never see a partial segment
+    staging = directory.with_name(f'.{segment.name}.tmp')
+    staging.mkdir()
+    try:
+        for name, dtype in ARCHIVE_COLUMNS.items():
+            if name in TIMESTAMP_COLUMNS:
+                values = [to_micros(row[name]) for row in rows]
+            elif name == 'heart_rate':
+                values = [MISSING_HEART_RATE if row[name] is None else row[name] for row in rows]
+            else:
+                values = [row[name] for row in rows]
+            np.save(staging / f'{name}.npy', np.array(values, dtype=dtype))
+        notes = {str(row['id']): row['notes'] for row in rows if row['notes']}
+        if notes:
+            (staging / 'notes.json').write_text(json.dumps(notes))
+        os.rename(staging, directory)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return segment
+
+
+def archive_user_readings(user_id, before):
+    """
+    Move one user's readings recorded before ``before`` into a new archive
+    segment. Returns the number of readings archived.
+
+    The readings are locked from the read until their delete commits, so an
+    edit made meanwhile waits instead of being deleted unarchived. Daily
+    rollups are left alone: they already cover these readings, and later
+    refreshes merge the archive back in.
+    """
+    readings = BloodPressureReading.objects.filter(user_id=user_id, recorded_at__lt=before)
+    segment = None
+    try:
+        with transaction.atomic():
+            rows = list(readings.select_for_update().order_by('recorded_at', 'id').values('notes', *ARCHIVE_COLUMNS))
+            if not rows:
+                return 0
+            segment = write_segment(user_id, rows)
+            segment.save()
+            ids = [row['id'] for row in rows]
+            # A plain DELETE rather than QuerySet.delete(): the per-row
+            # delete signals would only recompute rollups and trends the
+            # move leaves unchanged, so the caches are invalidated here
+            table = connection.ops.quote_name(BloodPressureReading._meta.db_table)
+            with connection.cursor() as cursor:
+                for start in range(0, len(ids), 1000):
+                    chunk = ids[start:start + 1000]
+                    cursor.execute(f'DELETE FROM {table} WHERE id IN ({", ".join(["%s"] * len(chunk))})', chunk)
+            bump_user_versions('readings', [user_id])
+            transaction.on_commit(invalidate_admin_summary)
+    except BaseException:
+        if segment is not None:
+            shutil.rmtree(segment_dir(segment), ignore_errors=True)
+        raise
+    return len(rows)
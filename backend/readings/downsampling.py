@@ -0,0 +1,107 @@
+"""
+Largest-Triangle-Three-Buckets (LTTB) downsampling of reading time series.
+
+Charts only need a few hundred points to look identical to the full
+history, so the ``series`` endpoint sends at most N points per range. LTTB
+keeps the point of each bucket that forms the largest triangle with its
+neighbours, which preserves spikes that averaging would flatten.
+"""
+import numpy as np
+
+from .models import categorize_bp
+from .archive import MISSING_HEART_RATE, categorize_array, from_micros, to_micros
+
+SERIES_FIELDS = ('recorded_at', 'systolic', 'diastolic', 'heart_rate', 'category')
+
+
+def _normalize(values):
+    """Scale each column to 0..1 so systolic, diastolic and HR weigh equally"""
+    valid = ~np.isnan(values)
+    has_values = valid.any(axis=0)
+    filled = np.where(valid, values, 0.0)
+    low = np.where(has_values, np.where(valid, values, np.inf).min(axis=0), 0.0)
+    high = np.where(has_values, np.where(valid, values, -np.inf).max(axis=0), 1.0)
+    span = np.where(high > low, high - low, 1.0)
+    return np.where(valid, (filled - low) / span, np.nan)
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Indices of the ``threshold`` points LTTB selects from ``x`` (ascending,
+    shape (n,)) and ``y`` (shape (n, k), NaN for missing values).
+
+    The triangle area of a candidate is summed over all ``k`` columns, so
+    a spike in any one series keeps its point. Bucket averages are computed
+    for all buckets at once; only the choice of each bucket's point, which
+    depends on the previous choice, runs per bucket.
+    """
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1][:threshold])
+
+    # threshold - 2 buckets over the interior points 1..n-2
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    starts = edges[:-1]
+    counts = np.diff(edges)
+
+    valid = ~np.isnan(y)
+    filled = np.where(valid, y, 0.0)
+    avg_x = np.add.reduceat(x[:-1], starts) / counts
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_y = np.add.reduceat(filled[:-1], starts, axis=0) / np.add.reduceat(valid[:-1], starts, axis=0)
+
+    # The third vertex of bucket i is the average of bucket i + 1 (the last
+    # point for the final bucket)
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.vstack([avg_y[1:], y[-1:]])
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    anchor = 0
+    for bucket, (start, end) in enumerate(zip(starts, edges[1:])):
+        area = np.abs(
+            (x[anchor] - next_x[bucket]) * (y[start:end] - y[anchor])
+            - (x[anchor] - x[start:end])[:, None] * (next_y[bucket] - y[anchor])
+        )
+        anchor = start + int(np.argmax(np.nansum(area, axis=1)))
+        selected[bucket + 1] = anchor
+    return selected
+
+
+def downsample_readings(queryset, threshold, archived=None):
+    """
+    Return ``(total, points)``: the number of readings in ``queryset`` (plus
+    the matching ``archived`` readings) and at most ``threshold`` of them,
+    chosen with LTTB, in time order.
+    """
+    rows = list(queryset.order_by('recorded_at', 'id').values_list(*SERIES_FIELDS))
+    cold = archived.columns(['systolic', 'diastolic', 'heart_rate']) if archived is not None else None
+    cold_count = len(cold['id']) if cold is not None else 0
+    if not rows and not cold_count:
+        return 0, []
+
+    times = np.fromiter((to_micros(row[0]) for row in rows), dtype=np.int64, count=len(rows))
+    values = np.array([row[1:4] for row in rows], dtype=float).reshape(len(rows), 3)
+    categories = np.array([row[4] or categorize_bp(row[1], row[2]) for row in rows], dtype=object)
+    if cold_count:
+        heart_rate = np.where(cold['heart_rate'] == MISSING_HEART_RATE, np.nan, cold['heart_rate'])
+        times = np.concatenate([times, cold['recorded_at']])
+        values = np.vstack([values, np.column_stack([cold['systolic'], cold['diastolic'], heart_rate])])
+        categories = np.concatenate([categories, categorize_array(cold['systolic'], cold['diastolic'])])
+        order = np.argsort(times, kind='stable')
+        times, values, categories = times[order], values[order], categories[order]
+
+    points = []
+    for index in lttb_indices(times / 1e6, _normalize(values), threshold):
+        systolic, diastolic, heart_rate = values[index]
+        points.append({
+            'recorded_at': from_micros(times[index]),
+            'systolic': int(systolic),
+            'diastolic': int(diastolic),
+            'heart_rate': None if np.isnan(heart_rate) else int(heart_rate),
+            'category': str(categories[index]),
+        })
+    return len(times), points
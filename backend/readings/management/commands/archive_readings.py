@@ -0,0 +1,58 @@
+"""
+Django management command to move old readings into columnar cold storage
+(see readings/archive.py). Archived readings stay visible in the readings
+list, aggregate, series, export and PDF report endpoints.
+
+Usage: python manage.py archive_readings [--before YYYY-MM-DD] [--user ID ...]
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from readings.models import BloodPressureReading
+from readings.archive import archive_user_readings
+
+
+class Command(BaseCommand):
+    help = 'Archive readings older than a cutoff into per-user columnar files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--before',
+            help=f'Archive readings recorded before this date '
+                 f'(default: {settings.READINGS_ARCHIVE_AFTER_DAYS} days ago)',
+        )
+        parser.add_argument(
+            '--user',
+            type=int,
+            nargs='+',
+            dest='users',
+            help='Only archive these user IDs (default: all users)',
+        )
+
+    def handle(self, *args, **options):
+        if options['before']:
+            day = parse_date(options['before'])
+            if day is None:
+                raise CommandError('--before must be a date (YYYY-MM-DD)')
+        else:
+            day = timezone.localdate() - timedelta(days=settings.READINGS_ARCHIVE_AFTER_DAYS)
+        before = timezone.make_aware(datetime.combine(day, time.min))
+
+        readings = BloodPressureReading.objects.filter(recorded_at__lt=before)
+        if options['users']:
+            readings = readings.filter(user_id__in=options['users'])
+        user_ids = sorted(set(readings.values_list('user_id', flat=True).distinct()))
+
+        total = 0
+        for user_id in user_ids:
+            count = archive_user_readings(user_id, before)
+            total += count
+            self.stdout.write(f'User {user_id}: archived {count} readings')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Archived {total} readings recorded before {day} for {len(user_ids)} users'
+        ))
@@ -0,0 +1,71 @@
+"""
+Django management command to recompute the stored BP category of readings
+(after manual SQL edits or a change to the category rules). Migration 0004
+already filled the rows that existed when the column was added.
+
+Each chunk is a single UPDATE over an id range with a CASE expression
+mirroring categorize_bp(), so no readings are loaded into Python. The
+daily rollups of the users whose readings were touched are then rebuilt,
+since their category counts read the stored column.
+
+Usage: python manage.py backfill_bp_category [--chunk-size N] [--all]
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Case, When, Value, Max, Min
+
+from accounts.summary import invalidate_admin_summary
+from itaku_backend.response_cache import bump_resource_epoch
+
+from readings.models import BloodPressureReading, BP_CATEGORY_CONDITIONS
+from readings.rollups import rebuild_rollups
+
+# Users whose rollups are rebuilt per transaction (as in rebuild_daily_rollups)
+ROLLUP_CHUNK_SIZE = 200
+
+
+class Command(BaseCommand):
+    help = 'Backfill the stored BP category column of blood pressure readings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Number of reading IDs updated per statement (default: 5000)',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recompute every reading, not only those without a category',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        category = Case(
+            *[When(condition, then=Value(name)) for name, condition in BP_CATEGORY_CONDITIONS.items()],
+            default=Value(''),
+        )
+
+        readings = BloodPressureReading.objects.order_by()
+        if not options['all']:
+            readings = readings.filter(category='')
+        bounds = readings.aggregate(first=Min('id'), last=Max('id'))
+        if bounds['first'] is None:
+            self.stdout.write(self.style.SUCCESS('✅ All readings already have a category'))
+            return
+        user_ids = list(readings.values_list('user_id', flat=True).distinct().order_by('user_id'))
+
+        total = 0
+        for start in range(bounds['first'], bounds['last'] + 1, chunk_size):
+            end = start + chunk_size
+            total += readings.filter(id__gte=start, id__lt=end).update(category=category)
+            self.stdout.write(f'Updated IDs {start}-{min(end, bounds["last"] + 1) - 1}')
+
+        # update() skips signals: refresh the category counts and the caches by hand
+        for start in range(0, len(user_ids), ROLLUP_CHUNK_SIZE):
+            rebuild_rollups(user_ids[start:start + ROLLUP_CHUNK_SIZE])
+        self.stdout.write(f'Rebuilt the daily rollups of {len(user_ids)} users')
+        bump_resource_epoch('readings')
+        invalidate_admin_summary()
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Backfilled the category of {total} readings'))
@@ -0,0 +1,141 @@
+"""
+Django management command to benchmark PDF report rendering.
+Renders synthetic readings (no database access) at increasing row counts
+and reports render time, page output size and peak RSS for each run.
+
+Usage: python manage.py benchmark_pdf_report --rows 1000 10000 100000
+"""
+import multiprocessing
+import os
+import queue as queue_module
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from readings.utils import render_pdf_report
+
+
+def _synthetic_readings(count, users):
+    """Yield reading dicts in report order: per user, newest first"""
+    rng = random.Random(42)
+    start = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+    per_user = max(count // users, 1)
+    produced = 0
+    for user_id in range(1, users + 1):
+        for i in range(per_user):
+            if produced >= count:
+                return
+            produced += 1
+            systolic = rng.randint(100, 170)
+            diastolic = rng.randint(60, 105)
+            yield {
+                'user_email': f'patient{user_id}@patient.example.com',
+                'recorded_at': start - timedelta(hours=8 * i),
+                'systolic': systolic,
+                'diastolic': diastolic,
+                'heart_rate': rng.randint(55, 100),
+                'notes': 'After morning walk' if i % 7 == 0 else '',
+            }
+
+
+def _synthetic_summaries(count, users):
+    """Yield one month summary row per user per ~90 readings"""
+    months = max(count // users // 90, 1)
+    start = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+    for user_id in range(1, users + 1):
+        for m in range(months):
+            yield {
+                'patient': f'patient{user_id}@patient.example.com',
+                'month': start - timedelta(days=30 * m),
+                'count': 90,
+                'avg_systolic': 128.4, 'min_systolic': 104, 'max_systolic': 166,
+                'avg_diastolic': 82.1, 'min_diastolic': 61, 'max_diastolic': 101,
+                'avg_heart_rate': 72.5,
+            }
+
+
+def _wait_for_result(process, queue, poll_seconds=1):
+    """The child's result, or CommandError if it exits without one (e.g. OOM-killed)"""
+    while True:
+        try:
+            return queue.get(timeout=poll_seconds)
+        except queue_module.Empty:
+            if process.exitcode is None:
+                continue
+        # Exited: the result may have been queued just before it did
+        try:
+            return queue.get(timeout=poll_seconds)
+        except queue_module.Empty:
+            raise CommandError(f'Render process exited with code {process.exitcode} without a result')
+
+
+def _ru_maxrss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _render(count, users, queue):
+    fd, path = tempfile.mkstemp(suffix='.pdf')
+    os.close(fd)
+    try:
+        started = time.perf_counter()
+        render_pdf_report(
+            path,
+            'Moyo - Benchmark Report',
+            _synthetic_summaries(count, users),
+            _synthetic_readings(count, users),
+            multi_user=users > 1,
+        )
+        elapsed = time.perf_counter() - started
+        queue.put((elapsed, os.path.getsize(path), _ru_maxrss_mb()))
+    finally:
+        os.remove(path)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark PDF report render time and peak RSS against row count'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            nargs='+',
+            default=[1000, 10000, 50000, 100000],
+            help='Row counts to render (default: 1000 10000 50000 100000)',
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=1,
+            help='Number of patients the rows are spread across (default: 1)',
+        )
+
+    def handle(self, *args, **options):
+        users = options['users']
+        # Each size renders in a fresh process so peak RSS is not inherited
+        # from a previous, larger run
+        ctx = multiprocessing.get_context('fork')
+
+        self.stdout.write(self.style.SUCCESS('='*60))
+        self.stdout.write(self.style.SUCCESS('PDF Report Rendering Benchmark'))
+        self.stdout.write(self.style.SUCCESS('='*60))
+        self.stdout.write(f"{'rows':>10} {'seconds':>10} {'rows/s':>10} {'pdf MB':>10} {'peak RSS MB':>12}")
+
+        for count in [0] + options['rows']:
+            queue = ctx.Queue()
+            process = ctx.Process(target=_render, args=(count, users, queue))
+            process.start()
+            try:
+                elapsed, size, peak = _wait_for_result(process, queue)
+            finally:
+                process.join()
+            rate = f'{count / elapsed:,.0f}' if count else '-'
+            self.stdout.write(
+                f'{count:>10,} {elapsed:>10.2f} {rate:>10} {size / (1024 * 1024):>10.2f} {peak:>12.1f}'
+            )
@@ -0,0 +1,138 @@
+"""
+Django management command to verify that every allowlisted API filter
+combination is served by an index.
+
+For each viewset with ``indexed_filters`` it builds the list query for
+every filter subset and scope (admin / patient) and runs EXPLAIN: the bare
+filter query must be answered with an index condition, and the paginated
+query (for every ordering option, in both paging directions, ordered by
+the same columns KeysetCursorPagination sends) must not contain a
+sequential scan. On PostgreSQL sequential scans are disabled for the EXPLAIN, so a
+Seq Scan in the plan means no index can serve the query at all.
+
+Usage: python manage.py check_filter_indexes
+"""
+from itertools import combinations
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+
+from itaku_backend.pagination import KeysetCursorPagination
+from readings.views import BloodPressureReadingViewSet
+from health_factors.views import HealthFactorViewSet
+from insights.views import UserInsightViewSet
+from medications.views import MedicationViewSet
+
+User = get_user_model()
+
+VIEWSETS = [
+    BloodPressureReadingViewSet,
+    HealthFactorViewSet,
+    UserInsightViewSet,
+    MedicationViewSet,
+]
+
+
+def explain(queryset):
+    """Return the query plan of a queryset as a list of text lines"""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            with transaction.atomic():
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'EXPLAIN {sql}', params)
+                return [row[0] for row in cursor.fetchall()]
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+    raise CommandError(f'EXPLAIN checks are not supported on {connection.vendor}')
+
+
+def has_sequential_scan(plan):
+    for line in plan:
+        if 'Seq Scan' in line:
+            return True
+        # SQLite: "SCAN <table>" without an index is a full table scan
+        if line.startswith('SCAN ') and 'USING' not in line:
+            return True
+    return False
+
+
+def uses_index_condition(plan):
+    """True if the plan looks rows up through an index rather than walking one"""
+    for line in plan:
+        if 'Index Cond' in line or line.startswith('SEARCH '):
+            return True
+    return False
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN every allowlisted filter combination and fail on sequential scans'
+
+    def handle(self, *args, **options):
+        scopes = {
+            'admin': User(pk=1, is_staff=True, is_superuser=True),
+            'patient': User(pk=1, is_staff=False, is_superuser=False),
+        }
+        checked = 0
+        failures = []
+
+        for viewset in VIEWSETS:
+            filters = viewset.indexed_filters
+            orderings = [None] + list(getattr(viewset, 'ordering_options', {}))
+            for scope, user in scopes.items():
+                view = viewset()
+                view.request = SimpleNamespace(user=user, query_params={})
+                view.action = 'list'
+                base = view.get_queryset()
+                allowed = [name for name, f in filters.items() if scope == 'admin' or not f.admin_only]
+
+                for size in range(len(allowed) + 1):
+                    for names in combinations(allowed, size):
+                        queryset = base
+                        for name in names:
+                            queryset = filters[name].apply(queryset, filters[name].example)
+                        label = f"{viewset.__name__} [{scope}] filters={','.join(names) or '-'}"
+                        if names:
+                            plan = explain(queryset.order_by())
+                            if not uses_index_condition(plan) or has_sequential_scan(plan):
+                                self._fail(failures, label, plan)
+                            else:
+                                self._pass(label, options)
+                            checked += 1
+
+                        for ordering in orderings:
+                            fields = KeysetCursorPagination.get_ordering(queryset, view, ordering)
+                            for reverse in (False, True):
+                                columns = KeysetCursorPagination.order_by_columns(queryset.model, fields, reverse)
+                                paged = queryset.order_by(*columns)[:KeysetCursorPagination.page_size + 1]
+                                plan = explain(paged)
+                                checked += 1
+                                paged_label = (
+                                    f"{label} ordering={ordering or 'default'}"
+                                    f"{' (previous page)' if reverse else ''}"
+                                )
+                                if has_sequential_scan(plan):
+                                    self._fail(failures, paged_label, plan)
+                                else:
+                                    self._pass(paged_label, options)
+
+        for label, plan in failures:
+            self.stdout.write('')
+            self.stdout.write(self.style.ERROR(label))
+            for line in plan:
+                self.stdout.write(f'    {line}')
+
+        if failures:
+            raise CommandError(f'{len(failures)} of {checked} filter combinations are not index-backed')
+        self.stdout.write(self.style.SUCCESS(f'✅ All {checked} filter combinations are index-backed'))
+
+    def _fail(self, failures, label, plan):
+        failures.append((label, plan))
+        self.stdout.write(self.style.ERROR(f'❌ {label}'))
+
+    def _pass(self, label, options):
+        if options['verbosity'] > 1:
+            self.stdout.write(f'✅ {label}')
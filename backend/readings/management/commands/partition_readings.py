@@ -0,0 +1,69 @@
+"""
+Django management command to manage PostgreSQL monthly partitions of the
+readings table (see readings/partitioning.py).
+
+--convert rebuilds the table as a partitioned table (one-off, opt-in; it
+copies every row under an exclusive lock). Afterwards each run pre-creates
+the coming months and, with --retain-months, detaches older months.
+The readings.tasks.maintain_reading_partitions beat task does the same daily.
+
+Usage: python manage.py partition_readings [--convert] [--months-ahead N]
+       [--retain-months N [--drop]]
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from readings.partitioning import (
+    PartitioningError,
+    convert_to_partitioned,
+    create_partitions,
+    detach_partitions,
+    is_partitioned,
+)
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming and detach expired monthly partitions of the readings table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Convert the readings table to a partitioned table first',
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=settings.READINGS_PARTITION_MONTHS_AHEAD,
+            help='Months of partitions to keep ready ahead of the current one',
+        )
+        parser.add_argument(
+            '--retain-months',
+            type=int,
+            default=settings.READINGS_PARTITION_RETAIN_MONTHS,
+            help='Detach partitions older than this many months (default: keep all)',
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            help='Drop detached partitions instead of keeping them as archive tables',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options['convert']:
+                self.stdout.write('Converting readings table to monthly partitions...')
+                count = convert_to_partitioned(options['months_ahead'])
+                self.stdout.write(self.style.SUCCESS(f'✅ Converted, {count} monthly partitions created'))
+            elif not is_partitioned():
+                raise CommandError('The readings table is not partitioned; run with --convert first')
+
+            for name in create_partitions(options['months_ahead']):
+                self.stdout.write(f'Created {name}')
+            if options['retain_months']:
+                for name in detach_partitions(options['retain_months'], drop=options['drop']):
+                    self.stdout.write(f"{'Dropped' if options['drop'] else 'Detached'} {name}")
+        except PartitioningError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS('✅ Reading partitions are up to date'))
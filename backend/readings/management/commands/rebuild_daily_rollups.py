@@ -0,0 +1,48 @@
+"""
+Django management command to rebuild the DailyRollup table from raw
+readings and health factors (backfill, or repair after manual SQL edits).
+
+Usage: python manage.py rebuild_daily_rollups [--user ID ...] [--chunk-size N]
+"""
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+
+from readings.rollups import rebuild_rollups
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-user daily rollups of readings and health factors'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            nargs='+',
+            dest='users',
+            help='Only rebuild these user IDs (default: all users)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=200,
+            help='Number of users rebuilt per transaction (default: 200)',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+        if options['users']:
+            user_ids = user_ids.filter(pk__in=options['users'])
+        user_ids = list(user_ids)
+
+        total_rows = 0
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            total_rows += rebuild_rollups(chunk)
+            self.stdout.write(f'Rebuilt users {start + 1}-{start + len(chunk)} of {len(user_ids)}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Rebuilt {total_rows} daily rollup rows for {len(user_ids)} users'
+        ))
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("readings", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("reading_count", models.IntegerField(default=0)),
+                ("systolic_sum", models.BigIntegerField(default=0)),
+                ("systolic_sum_sq", models.BigIntegerField(default=0)),
+                ("systolic_min", models.IntegerField(blank=True, null=True)),
+                ("systolic_max", models.IntegerField(blank=True, null=True)),
+                ("diastolic_sum", models.BigIntegerField(default=0)),
+                ("diastolic_sum_sq", models.BigIntegerField(default=0)),
+                ("diastolic_min", models.IntegerField(blank=True, null=True)),
+                ("diastolic_max", models.IntegerField(blank=True, null=True)),
+                ("heart_rate_count", models.IntegerField(default=0)),
+                ("heart_rate_sum", models.BigIntegerField(default=0)),
+                ("heart_rate_sum_sq", models.BigIntegerField(default=0)),
+                ("heart_rate_min", models.IntegerField(blank=True, null=True)),
+                ("heart_rate_max", models.IntegerField(blank=True, null=True)),
+                ("normal_count", models.IntegerField(default=0)),
+                ("elevated_count", models.IntegerField(default=0)),
+                ("high_stage1_count", models.IntegerField(default=0)),
+                ("high_stage2_count", models.IntegerField(default=0)),
+                ("sleep_quality", models.IntegerField(blank=True, null=True)),
+                ("stress_level", models.IntegerField(blank=True, null=True)),
+                ("exercise_duration", models.IntegerField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_rollups",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-date"],
+                "indexes": [
+                    models.Index(
+                        fields=["user", "-date"], name="readings_da_user_id_8b9d5e_idx"
+                    )
+                ],
+                "unique_together": {("user", "date")},
+            },
+        ),
+    ]
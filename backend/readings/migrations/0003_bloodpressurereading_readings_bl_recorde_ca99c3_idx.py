@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("readings", "0002_dailyrollup"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bloodpressurereading",
+            index=models.Index(
+                fields=["-recorded_at"], name="readings_bl_recorde_ca99c3_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:46
+
+from django.db import migrations, models
+from django.db.models import Case, Max, Min, Q, Value, When
+
+# Reading IDs updated per statement, as in backfill_bp_category
+BACKFILL_CHUNK_SIZE = 5000
+
+# categorize_bp() as of this migration, so later rule changes don't alter it
+CATEGORY_CONDITIONS = {
+    "normal": Q(systolic__lt=120, diastolic__lt=80),
+    "elevated": Q(systolic__gte=120, systolic__lt=130, diastolic__lt=80),
+    "high_stage1": (Q(systolic__lt=140) | Q(diastolic__lt=90)) & ~Q(systolic__lt=130, diastolic__lt=80),
+    "high_stage2": Q(systolic__gte=140, diastolic__gte=90),
+}
+
+
+def backfill_category(apps, schema_editor):
+    # Fill existing rows before anything (daily rollups, filters) reads the
+    # column; rollups built earlier counted categories from systolic/diastolic
+    # and stay correct. One UPDATE per id range, each committed on its own
+    # (the migration is not atomic), so no lock is held across the table.
+    BloodPressureReading = apps.get_model("readings", "BloodPressureReading")
+    readings = BloodPressureReading.objects.filter(category="").order_by()
+    bounds = readings.aggregate(first=Min("id"), last=Max("id"))
+    if bounds["first"] is None:
+        return
+    category = Case(
+        *[When(condition, then=Value(name)) for name, condition in CATEGORY_CONDITIONS.items()],
+        default=Value(""),
+    )
+    for start in range(bounds["first"], bounds["last"] + 1, BACKFILL_CHUNK_SIZE):
+        readings.filter(id__gte=start, id__lt=start + BACKFILL_CHUNK_SIZE).update(category=category)
+
+
+class Migration(migrations.Migration):
+    # Let each backfill chunk commit separately
+    atomic = False
+
+    dependencies = [
+        ("readings", "0003_bloodpressurereading_readings_bl_recorde_ca99c3_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bloodpressurereading",
+            name="category",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("normal", "Normal"),
+                    ("elevated", "Elevated"),
+                    ("high_stage1", "High Stage 1"),
+                    ("high_stage2", "High Stage 2"),
+                ],
+                default="",
+                editable=False,
+                help_text="BP category, kept in sync with systolic/diastolic on save",
+                max_length=20,
+            ),
+        ),
+        migrations.RunPython(backfill_category, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="bloodpressurereading",
+            index=models.Index(
+                fields=["user", "category", "-recorded_at"],
+                name="readings_bl_user_id_54773b_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="bloodpressurereading",
+            index=models.Index(
+                fields=["category", "-recorded_at"],
+                name="readings_bl_categor_e6ca7f_idx",
+            ),
+        ),
+    ]
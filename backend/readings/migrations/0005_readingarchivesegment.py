@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("readings", "0004_bloodpressurereading_category"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReadingArchiveSegment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=64, unique=True)),
+                ("row_count", models.IntegerField()),
+                ("first_recorded_at", models.DateTimeField()),
+                ("last_recorded_at", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reading_archive_segments",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["user", "first_recorded_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["user", "first_recorded_at"],
+                        name="readings_re_user_id_c2f50f_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("readings", "0005_readingarchivesegment"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bloodpressurereading",
+            index=models.Index(
+                fields=["user", "-updated_at"], name="readings_bl_user_id_282b01_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,86 @@
+from django.db import migrations, transaction
+from django.db.models import Count, F, Max, Min, Sum, Q
+from django.db.models.functions import TruncDate
+
+# Users backfilled per transaction, as in rebuild_daily_rollups
+BACKFILL_CHUNK_SIZE = 200
+
+# readings.rollups.ROLLUP_AGGREGATES as of this migration
+ROLLUP_AGGREGATES = {
+    "reading_count": Count("id"),
+    "systolic_sum": Sum("systolic"),
+    "systolic_sum_sq": Sum(F("systolic") * F("systolic")),
+    "systolic_min": Min("systolic"),
+    "systolic_max": Max("systolic"),
+    "diastolic_sum": Sum("diastolic"),
+    "diastolic_sum_sq": Sum(F("diastolic") * F("diastolic")),
+    "diastolic_min": Min("diastolic"),
+    "diastolic_max": Max("diastolic"),
+    "heart_rate_count": Count("heart_rate"),
+    "heart_rate_sum": Sum("heart_rate"),
+    "heart_rate_sum_sq": Sum(F("heart_rate") * F("heart_rate")),
+    "heart_rate_min": Min("heart_rate"),
+    "heart_rate_max": Max("heart_rate"),
+    **{
+        f"{category}_count": Count("id", filter=Q(category=category))
+        for category in ("normal", "elevated", "high_stage1", "high_stage2")
+    },
+}
+FACTOR_FIELDS = ["sleep_quality", "stress_level", "exercise_duration"]
+
+
+def backfill_daily_rollups(apps, schema_editor):
+    # Build the rollups of users who have readings or health factors but no
+    # rollup rows yet. Users with archived readings are left to
+    # rebuild_daily_rollups, which reads the archive files.
+    BloodPressureReading = apps.get_model("readings", "BloodPressureReading")
+    DailyRollup = apps.get_model("readings", "DailyRollup")
+    HealthFactor = apps.get_model("health_factors", "HealthFactor")
+    ReadingArchiveSegment = apps.get_model("readings", "ReadingArchiveSegment")
+
+    user_ids = (
+        set(BloodPressureReading.objects.values_list("user_id", flat=True).distinct().order_by())
+        | set(HealthFactor.objects.values_list("user_id", flat=True).distinct().order_by())
+    )
+    user_ids -= set(DailyRollup.objects.values_list("user_id", flat=True).distinct().order_by())
+    user_ids -= set(ReadingArchiveSegment.objects.values_list("user_id", flat=True).distinct().order_by())
+    user_ids = sorted(user_ids)
+
+    for start in range(0, len(user_ids), BACKFILL_CHUNK_SIZE):
+        chunk = user_ids[start:start + BACKFILL_CHUNK_SIZE]
+        rollups = {}
+        grouped = (
+            BloodPressureReading.objects.filter(user_id__in=chunk)
+            .order_by()
+            .annotate(day=TruncDate("recorded_at"))
+            .values("user_id", "day")
+            .annotate(**ROLLUP_AGGREGATES)
+        )
+        for row in grouped.iterator():
+            key = (row.pop("user_id"), row.pop("day"))
+            row["heart_rate_sum"] = row["heart_rate_sum"] or 0
+            row["heart_rate_sum_sq"] = row["heart_rate_sum_sq"] or 0
+            rollups[key] = DailyRollup(user_id=key[0], date=key[1], **row)
+        factors = HealthFactor.objects.filter(user_id__in=chunk).values("user_id", "date", *FACTOR_FIELDS)
+        for factor in factors.iterator():
+            key = (factor["user_id"], factor["date"])
+            rollup = rollups.get(key) or DailyRollup(user_id=key[0], date=key[1])
+            for field in FACTOR_FIELDS:
+                setattr(rollup, field, factor[field])
+            rollups[key] = rollup
+        # Each chunk commits on its own (the migration is not atomic)
+        with transaction.atomic():
+            DailyRollup.objects.bulk_create(rollups.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("readings", "0006_updated_at_indexes"),
+        ("health_factors", "0002_healthfactor_health_fact_date_f896e7_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_daily_rollups, migrations.RunPython.noop),
+    ]
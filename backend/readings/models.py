@@ -1,8 +1,37 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+BP_CATEGORY_CHOICES = [
+    ('normal', 'Normal'),
+    ('elevated', 'Elevated'),
+    ('high_stage1', 'High Stage 1'),
+    ('high_stage2', 'High Stage 2'),
+]
+
+
+def categorize_bp(systolic, diastolic):
+    """Returns BP category based on AHA guidelines"""
+    if systolic < 120 and diastolic < 80:
+        return 'normal'
+    elif systolic < 130 and diastolic < 80:
+        return 'elevated'
+    elif systolic < 140 or diastolic < 90:
+        return 'high_stage1'
+    else:
+        return 'high_stage2'
+
+
+# SQL equivalents of categorize_bp(), used to backfill the category column
+BP_CATEGORY_CONDITIONS = {
+    'normal': Q(systolic__lt=120, diastolic__lt=80),
+    'elevated': Q(systolic__gte=120, systolic__lt=130, diastolic__lt=80),
+    'high_stage1': (Q(systolic__lt=140) | Q(diastolic__lt=90)) & ~Q(systolic__lt=130, diastolic__lt=80),
+    'high_stage2': Q(systolic__gte=140, diastolic__gte=90),
+}
+
 
 class BloodPressureReading(models.Model):
     """Blood pressure reading model"""
@@ -12,6 +41,14 @@ class BloodPressureReading(models.Model):
     heart_rate = models.IntegerField(null=True, blank=True, help_text="Heart rate in BPM")
     recorded_at = models.DateTimeField(help_text="When the reading was taken")
     notes = models.TextField(blank=True, help_text="Optional notes or context")
+    category = models.CharField(
+        max_length=20,
+        choices=BP_CATEGORY_CHOICES,
+        blank=True,
+        default='',
+        editable=False,
+        help_text="BP category, kept in sync with systolic/diastolic on save"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -19,19 +56,87 @@ class BloodPressureReading(models.Model):
         ordering = ['-recorded_at']
         indexes = [
             models.Index(fields=['user', '-recorded_at']),
+            models.Index(fields=['-recorded_at']),
+            models.Index(fields=['user', 'category', '-recorded_at']),
+            models.Index(fields=['category', '-recorded_at']),
+            # Latest change per user, the list's conditional GET validator
+            models.Index(fields=['user', '-updated_at']),
         ]
 
     def __str__(self):
         return f"{self.user.email} - {self.systolic}/{self.diastolic} @ {self.recorded_at}"
 
+    def save(self, *args, **kwargs):
+        self.category = categorize_bp(self.systolic, self.diastolic)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'systolic', 'diastolic'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'category'}
+        super().save(*args, **kwargs)
+
     def get_category(self):
         """Returns BP category based on AHA guidelines"""
-        if self.systolic < 120 and self.diastolic < 80:
-            return 'normal'
-        elif self.systolic < 130 and self.diastolic < 80:
-            return 'elevated'
-        elif self.systolic < 140 or self.diastolic < 90:
-            return 'high_stage1'
-        else:
-            return 'high_stage2'
+        return self.category or categorize_bp(self.systolic, self.diastolic)
 
+
+class DailyRollup(models.Model):
+    """
+    Pre-aggregated per-user, per-day reading statistics joined with that
+    day's health factors. Maintained by readings.rollups; never edit by hand.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_rollups')
+    date = models.DateField()
+    reading_count = models.IntegerField(default=0)
+    systolic_sum = models.BigIntegerField(default=0)
+    systolic_sum_sq = models.BigIntegerField(default=0)
+    systolic_min = models.IntegerField(null=True, blank=True)
+    systolic_max = models.IntegerField(null=True, blank=True)
+    diastolic_sum = models.BigIntegerField(default=0)
+    diastolic_sum_sq = models.BigIntegerField(default=0)
+    diastolic_min = models.IntegerField(null=True, blank=True)
+    diastolic_max = models.IntegerField(null=True, blank=True)
+    heart_rate_count = models.IntegerField(default=0)
+    heart_rate_sum = models.BigIntegerField(default=0)
+    heart_rate_sum_sq = models.BigIntegerField(default=0)
+    heart_rate_min = models.IntegerField(null=True, blank=True)
+    heart_rate_max = models.IntegerField(null=True, blank=True)
+    normal_count = models.IntegerField(default=0)
+    elevated_count = models.IntegerField(default=0)
+    high_stage1_count = models.IntegerField(default=0)
+    high_stage2_count = models.IntegerField(default=0)
+    sleep_quality = models.IntegerField(null=True, blank=True)
+    stress_level = models.IntegerField(null=True, blank=True)
+    exercise_duration = models.IntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date']
+        unique_together = ['user', 'date']
+        indexes = [
+            models.Index(fields=['user', '-date']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email} - {self.date} ({self.reading_count} readings)"
+
+
+class ReadingArchiveSegment(models.Model):
+    """
+    One batch of a user's old readings moved out of the readings table into
+    columnar files by readings.archive. The files live in
+    READINGS_ARCHIVE_DIR/<user id>/<name>/; this row is their index.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reading_archive_segments')
+    name = models.CharField(max_length=64, unique=True)
+    row_count = models.IntegerField()
+    first_recorded_at = models.DateTimeField()
+    last_recorded_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['user', 'first_recorded_at']
+        indexes = [
+            models.Index(fields=['user', 'first_recorded_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email} - {self.row_count} readings ({self.first_recorded_at:%Y-%m-%d} to {self.last_recorded_at:%Y-%m-%d})"
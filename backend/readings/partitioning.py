@@ -0,0 +1,244 @@
+"""
+Opt-in PostgreSQL declarative partitioning of the readings table by
+``recorded_at`` month.
+
+The table keeps its name and columns, so the BloodPressureReading model,
+its migrations and every query keep working; PostgreSQL routes inserts to
+the right month and prunes partitions for date-bounded queries. Each month
+is its own table with its own indexes, so vacuum works on small tables and
+retention is a DETACH instead of a bulk DELETE.
+
+Layout:
+    readings_bloodpressurereading           partitioned parent
+    readings_bloodpressurereading_p2024_01  one partition per UTC month
+    readings_bloodpressurereading_default   catches rows outside every month;
+                                            drained when their month is created
+
+Partitioned tables need the partition key in the primary key, so the
+primary key becomes (id, recorded_at); ids still come from one sequence.
+"""
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import BloodPressureReading
+
+PARTITION_NAME_RE = re.compile(r'_p(\d{4})_(\d{2})$')
+INDEX_TABLE_RE = re.compile(r' ON (?:ONLY )?\S+ USING ')
+
+
+class PartitioningError(Exception):
+    pass
+
+
+def _table():
+    return BloodPressureReading._meta.db_table
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_start(month):
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _current_month():
+    today = timezone.now().astimezone(dt_timezone.utc).date()
+    return today.replace(day=1)
+
+
+def partition_name(month):
+    return f'{_table()}_p{month.year:04d}_{month.month:02d}'
+
+
+def default_partition_name():
+    return f'{_table()}_default'
+
+
+def _check_vendor():
+    if connection.vendor != 'postgresql':
+        raise PartitioningError(f'Partitioning requires PostgreSQL (this database is {connection.vendor})')
+
+
+def is_partitioned():
+    """True if the readings table is a partitioned table"""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid '
+            'WHERE c.relname = %s AND pg_table_is_visible(c.oid)',
+            [_table()],
+        )
+        return cursor.fetchone() is not None
+
+
+def monthly_partitions():
+    """{month: partition name} of the attached monthly partitions"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i '
+            'JOIN pg_class c ON c.oid = i.inhrelid '
+            'JOIN pg_class p ON p.oid = i.inhparent '
+            'WHERE p.relname = %s AND pg_table_is_visible(p.oid)',
+            [_table()],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME_RE.search(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def convert_to_partitioned(months_ahead=3):
+    """
+    Rebuild the readings table as a partitioned table, copying every row.
+
+    Runs in one transaction holding an exclusive lock on the table, so
+    schedule it in a maintenance window. Raises PartitioningError if the
+    table is already partitioned. Returns the number of partitions created.
+    """
+    _check_vendor()
+    if is_partitioned():
+        raise PartitioningError(f'{_table()} is already partitioned')
+
+    table = _table()
+    legacy = f'{table}_unpartitioned'
+    sequence = f'{table}_id_seq'
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {_quote(table)} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'SELECT min(recorded_at), max(recorded_at) FROM {_quote(table)}')
+        first, last = cursor.fetchone()
+        cursor.execute(f'ALTER TABLE {_quote(table)} RENAME TO {_quote(legacy)}')
+
+        # Same columns and defaults; id gets a plain sequence below, once
+        # the old table and its identity/serial sequence are dropped
+        cursor.execute(
+            f'CREATE TABLE {_quote(table)} '
+            f'(LIKE {_quote(legacy)} INCLUDING DEFAULTS INCLUDING STORAGE INCLUDING COMMENTS) '
+            f'PARTITION BY RANGE (recorded_at)'
+        )
+        # A serial default would still point at the old table's sequence
+        cursor.execute(f'ALTER TABLE {_quote(table)} ALTER COLUMN id DROP DEFAULT')
+        cursor.execute(f'CREATE TABLE {_quote(default_partition_name())} PARTITION OF {_quote(table)} DEFAULT')
+
+        current = _current_month()
+        month = min(first.astimezone(dt_timezone.utc).date().replace(day=1), current) if first else current
+        through = _add_months(current, months_ahead)
+        if last:
+            through = max(through, last.astimezone(dt_timezone.utc).date().replace(day=1))
+        created = 0
+        while month <= through:
+            cursor.execute(
+                f'CREATE TABLE {_quote(partition_name(month))} PARTITION OF {_quote(table)} '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                [_month_start(month), _month_start(_add_months(month, 1))],
+            )
+            created += 1
+            month = _add_months(month, 1)
+
+        cursor.execute(f'INSERT INTO {_quote(table)} SELECT * FROM {_quote(legacy)}')
+
+        # Keep the old table's indexes, foreign keys and checks under their
+        # migration names, so later migrations still find them
+        cursor.execute(
+            'SELECT pg_get_indexdef(indexrelid) FROM pg_index WHERE indrelid = %s::regclass AND NOT indisprimary',
+            [_quote(legacy)],
+        )
+        indexes = [INDEX_TABLE_RE.sub(f' ON {_quote(table)} USING ', row[0], count=1) for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype IN ('c', 'f')",
+            [_quote(legacy)],
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(f'DROP TABLE {_quote(legacy)}')
+
+        # Constraint and index names are free again now that the old table is gone
+        cursor.execute(f'CREATE SEQUENCE {_quote(sequence)} OWNED BY {_quote(table)}.id')
+        cursor.execute(f'SELECT setval(%s, coalesce(max(id), 0) + 1, false) FROM {_quote(table)}', [sequence])
+        cursor.execute(f"ALTER TABLE {_quote(table)} ALTER COLUMN id SET DEFAULT nextval('{sequence}'::regclass)")
+        cursor.execute(f'ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(table + "_pkey")} PRIMARY KEY (id, recorded_at)')
+        for definition in indexes:
+            cursor.execute(definition)
+        for name, definition in constraints:
+            cursor.execute(f'ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(name)} {definition}')
+    return created
+
+
+def create_partitions(months_ahead=3):
+    """
+    Make sure monthly partitions exist from the current month through
+    ``months_ahead`` months ahead, plus any month that has rows sitting in
+    the default partition (which are moved into their new partition).
+    Returns the names of the partitions created.
+    """
+    _check_vendor()
+    table = _table()
+    default = default_partition_name()
+    existing = monthly_partitions()
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', recorded_at AT TIME ZONE 'UTC')::date FROM {_quote(default)}"
+        )
+        months = {row[0] for row in cursor.fetchall()}
+    current = _current_month()
+    months.update(_add_months(current, offset) for offset in range(months_ahead + 1))
+
+    created = []
+    for month in sorted(months - set(existing)):
+        name = partition_name(month)
+        bounds = [_month_start(month), _month_start(_add_months(month, 1))]
+        # Build the month as a standalone table, move its rows out of the
+        # default partition, then attach it; attaching creates its indexes
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE {_quote(name)} (LIKE {_quote(table)} INCLUDING DEFAULTS INCLUDING STORAGE)'
+            )
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {_quote(default)} '
+                f'WHERE recorded_at >= %s AND recorded_at < %s RETURNING *) '
+                f'INSERT INTO {_quote(name)} SELECT * FROM moved',
+                bounds,
+            )
+            cursor.execute(
+                f'ALTER TABLE {_quote(table)} ATTACH PARTITION {_quote(name)} FOR VALUES FROM (%s) TO (%s)',
+                bounds,
+            )
+        created.append(name)
+    return created
+
+
+def detach_partitions(retain_months, drop=False):
+    """
+    Detach the monthly partitions older than the last ``retain_months``
+    months (the current month included). Detached partitions stay as plain
+    tables for archiving unless ``drop`` is set. Returns their names.
+
+    Daily rollups of the detached months are kept, so aggregates over old
+    history remain available.
+    """
+    _check_vendor()
+    cutoff = _add_months(_current_month(), -(retain_months - 1))
+    detached = []
+    for month, name in sorted(monthly_partitions().items()):
+        if month >= cutoff:
+            break
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {_quote(_table())} DETACH PARTITION {_quote(name)}')
+            if drop:
+                cursor.execute(f'DROP TABLE {_quote(name)}')
+        detached.append(name)
+    return detached
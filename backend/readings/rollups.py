@@ -0,0 +1,143 @@
+"""
+Maintenance of the DailyRollup fact table.
+
+Every write path (model saves/deletes via signals, bulk ingest, the
+rebuild command) funnels into refresh_rollups() or rebuild_rollups(),
+which recompute only the affected (user, day) rows from the raw tables
+(and the columnar archive, see readings.archive).
+A day holds a handful of readings, so a refresh is one small index range
+scan, and min/max stay correct after updates and deletes.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Q, Count, Sum, Min, Max, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from health_factors.models import HealthFactor
+from .models import BloodPressureReading, DailyRollup, BP_CATEGORY_CONDITIONS
+from .archive import ArchivedReadings, combine_stats
+
+ROLLUP_AGGREGATES = {
+    'reading_count': Count('id'),
+    'systolic_sum': Sum('systolic'),
+    'systolic_sum_sq': Sum(F('systolic') * F('systolic')),
+    'systolic_min': Min('systolic'),
+    'systolic_max': Max('systolic'),
+    'diastolic_sum': Sum('diastolic'),
+    'diastolic_sum_sq': Sum(F('diastolic') * F('diastolic')),
+    'diastolic_min': Min('diastolic'),
+    'diastolic_max': Max('diastolic'),
+    'heart_rate_count': Count('heart_rate'),
+    'heart_rate_sum': Sum('heart_rate'),
+    'heart_rate_sum_sq': Sum(F('heart_rate') * F('heart_rate')),
+    'heart_rate_min': Min('heart_rate'),
+    'heart_rate_max': Max('heart_rate'),
+    **{
+        f'{category}_count': Count('id', filter=Q(category=category))
+        for category in BP_CATEGORY_CONDITIONS
+    },
+}
+FACTOR_FIELDS = ['sleep_quality', 'stress_level', 'exercise_duration']
+ROLLUP_FIELDS = list(ROLLUP_AGGREGATES) + FACTOR_FIELDS
+
+
+def reading_day(recorded_at):
+    """Calendar day a reading is rolled up under (in the current time zone)"""
+    return timezone.localdate(recorded_at)
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _build_rollups(readings, factors, archived=None):
+    """
+    Merge grouped reading aggregates, archived readings and health factors
+    into DailyRollup rows
+    """
+    stats = {}
+    grouped = (
+        readings.order_by()
+        .annotate(day=TruncDate('recorded_at'))
+        .values('user_id', 'day')
+        .annotate(**ROLLUP_AGGREGATES)
+    )
+    for row in grouped.iterator():
+        stats[(row.pop('user_id'), row.pop('day'))] = row
+    if archived is not None:
+        for (user_id, period), row in archived.summarize('day', timezone.get_current_timezone()).items():
+            key = (user_id, period.date())
+            stats[key] = combine_stats(stats[key], row) if key in stats else row
+
+    rollups = {}
+    for (user_id, day), row in stats.items():
+        values = {key: (value if value is not None else _default(key)) for key, value in row.items()}
+        rollups[(user_id, day)] = DailyRollup(user_id=user_id, date=day, **values)
+    for factor in factors.values('user_id', 'date', *FACTOR_FIELDS).iterator():
+        key = (factor['user_id'], factor['date'])
+        rollup = rollups.get(key) or DailyRollup(user_id=key[0], date=key[1])
+        for field in FACTOR_FIELDS:
+            setattr(rollup, field, factor[field])
+        rollups[key] = rollup
+    return rollups
+
+
+def _default(field):
+    return DailyRollup._meta.get_field(field).get_default()
+
+
+def _upsert(rollups, batch_size=1000):
+    DailyRollup.objects.bulk_create(
+        rollups,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['user', 'date'],
+        update_fields=ROLLUP_FIELDS + ['updated_at'],
+    )
+
+
+def refresh_rollups(user_id, days):
+    """Recompute the rollup rows of one user for the given days"""
+    days = sorted(set(days))
+    if not days:
+        return
+    # One index range per run of consecutive days
+    ranges = Q()
+    run_start = previous = days[0]
+    for day in days[1:] + [None]:
+        if day is not None and day == previous + timedelta(days=1):
+            previous = day
+            continue
+        ranges |= Q(recorded_at__gte=_day_start(run_start),
+                    recorded_at__lt=_day_start(previous + timedelta(days=1)))
+        run_start = previous = day
+    readings = BloodPressureReading.objects.filter(ranges, user_id=user_id)
+    factors = HealthFactor.objects.filter(user_id=user_id, date__in=days)
+    archived = ArchivedReadings().filter(
+        user_id=user_id,
+        recorded_at__gte=_day_start(days[0]),
+        recorded_at__lt=_day_start(days[-1] + timedelta(days=1)),
+    )
+    rollups = {
+        day: rollup for (_, day), rollup in _build_rollups(readings, factors, archived).items()
+        if day in days
+    }
+    with transaction.atomic():
+        DailyRollup.objects.filter(user_id=user_id, date__in=days).exclude(date__in=rollups).delete()
+        if rollups:
+            _upsert(list(rollups.values()))
+
+
+def rebuild_rollups(user_ids):
+    """Replace all rollup rows of the given users from the raw tables"""
+    rollups = _build_rollups(
+        BloodPressureReading.objects.filter(user_id__in=user_ids),
+        HealthFactor.objects.filter(user_id__in=user_ids),
+        ArchivedReadings().filter(user_id__in=user_ids),
+    )
+    with transaction.atomic():
+        DailyRollup.objects.filter(user_id__in=user_ids).delete()
+        DailyRollup.objects.bulk_create(rollups.values(), batch_size=1000)
+    return len(rollups)
@@ -4,32 +4,53 @@ from .models import BloodPressureReading
 
 User = get_user_model()
 
+SYSTOLIC_RANGE = (50, 250)
+DIASTOLIC_RANGE = (30, 200)
+HEART_RATE_RANGE = (30, 200)
+
+
+def validate_systolic_value(value):
+    if value < SYSTOLIC_RANGE[0] or value > SYSTOLIC_RANGE[1]:
+        raise serializers.ValidationError("Systolic pressure must be between 50 and 250")
+    return value
+
+
+def validate_diastolic_value(value):
+    if value < DIASTOLIC_RANGE[0] or value > DIASTOLIC_RANGE[1]:
+        raise serializers.ValidationError("Diastolic pressure must be between 30 and 200")
+    return value
+
+
+def validate_heart_rate_value(value):
+    if value is not None and (value < HEART_RATE_RANGE[0] or value > HEART_RATE_RANGE[1]):
+        raise serializers.ValidationError("Heart rate must be between 30 and 200")
+    return value
+
 
 class BloodPressureReadingSerializer(serializers.ModelSerializer):
     category = serializers.CharField(read_only=True)
     user_email = serializers.EmailField(source='user.email', read_only=True)
     user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), required=False)
+    # Archived readings (see readings.archive) are listed but read-only
+    archived = serializers.SerializerMethodField()
 
     class Meta:
         model = BloodPressureReading
         fields = ['id', 'user', 'user_email', 'systolic', 'diastolic', 'heart_rate', 'recorded_at', 
-                  'notes', 'created_at', 'updated_at', 'category']
+                  'notes', 'created_at', 'updated_at', 'category', 'archived']
         read_only_fields = ['id', 'created_at', 'updated_at', 'category', 'user_email']
 
     def validate_systolic(self, value):
-        if value < 50 or value > 250:
-            raise serializers.ValidationError("Systolic pressure must be between 50 and 250")
-        return value
+        return validate_systolic_value(value)
 
     def validate_diastolic(self, value):
-        if value < 30 or value > 200:
-            raise serializers.ValidationError("Diastolic pressure must be between 30 and 200")
-        return value
+        return validate_diastolic_value(value)
 
     def validate_heart_rate(self, value):
-        if value is not None and (value < 30 or value > 200):
-            raise serializers.ValidationError("Heart rate must be between 30 and 200")
-        return value
+        return validate_heart_rate_value(value)
+
+    def get_archived(self, instance):
+        return getattr(instance, 'archived', False)
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
@@ -41,3 +62,11 @@ class BloodPressureReadingSerializer(serializers.ModelSerializer):
         user = validated_data.pop('user', None) or self.context['request'].user
         return BloodPressureReading.objects.create(user=user, **validated_data)
 
+
+class BloodPressureReadingBulkItemSerializer(serializers.Serializer):
+    """Lightweight per-row validator for bulk ingest (no DB lookups)"""
+    systolic = serializers.IntegerField(validators=[validate_systolic_value])
+    diastolic = serializers.IntegerField(validators=[validate_diastolic_value])
+    heart_rate = serializers.IntegerField(required=False, allow_null=True, validators=[validate_heart_rate_value])
+    recorded_at = serializers.DateTimeField()
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
@@ -0,0 +1,76 @@
+"""
+Signal handlers keeping DailyRollup in sync with readings and health factors.
+Refreshes run after commit so they aggregate committed data only.
+"""
+import shutil
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from health_factors.models import HealthFactor
+from .models import BloodPressureReading, ReadingArchiveSegment
+from .rollups import refresh_rollups, reading_day
+from .archive import segment_dir
+
+
+def _schedule_refresh(user_id, days):
+    transaction.on_commit(partial(refresh_rollups, user_id, days))
+
+
+def _remember_previous(sender, instance, field, to_day):
+    # Remember where an existing row lived so a moved row also refreshes its old day
+    instance._rollup_previous = None
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).values('user_id', field).first()
+        if previous:
+            instance._rollup_previous = (previous['user_id'], to_day(previous[field]))
+
+
+def _refresh_current_and_previous(instance, day):
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous and previous != (instance.user_id, day):
+        _schedule_refresh(previous[0], [previous[1]])
+    _schedule_refresh(instance.user_id, [day])
+
+
+def _field_value(instance, field):
+    # Values assigned in code may still be strings until the row is reloaded
+    return instance._meta.get_field(field).to_python(getattr(instance, field))
+
+
+@receiver(pre_save, sender=BloodPressureReading)
+def remember_reading_day(sender, instance, **kwargs):
+    _remember_previous(sender, instance, 'recorded_at', reading_day)
+
+
+@receiver(post_save, sender=BloodPressureReading)
+def refresh_reading_rollup(sender, instance, **kwargs):
+    _refresh_current_and_previous(instance, reading_day(_field_value(instance, 'recorded_at')))
+
+
+@receiver(post_delete, sender=BloodPressureReading)
+def refresh_deleted_reading_rollup(sender, instance, **kwargs):
+    _schedule_refresh(instance.user_id, [reading_day(_field_value(instance, 'recorded_at'))])
+
+
+@receiver(pre_save, sender=HealthFactor)
+def remember_factor_day(sender, instance, **kwargs):
+    _remember_previous(sender, instance, 'date', lambda date: date)
+
+
+@receiver(post_save, sender=HealthFactor)
+def refresh_factor_rollup(sender, instance, **kwargs):
+    _refresh_current_and_previous(instance, _field_value(instance, 'date'))
+
+
+@receiver(post_delete, sender=HealthFactor)
+def refresh_deleted_factor_rollup(sender, instance, **kwargs):
+    _schedule_refresh(instance.user_id, [_field_value(instance, 'date')])
+
+
+@receiver(post_delete, sender=ReadingArchiveSegment)
+def remove_archive_segment_files(sender, instance, **kwargs):
+    # Segment rows go away with their user; take the columnar files along
+    transaction.on_commit(partial(shutil.rmtree, segment_dir(instance), ignore_errors=True))
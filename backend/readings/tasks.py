@@ -0,0 +1,47 @@
+from celery import shared_task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from .models import BloodPressureReading
+from .archive import ArchivedReadings
+from .partitioning import is_partitioned, create_partitions, detach_partitions
+from .utils import generate_pdf_report, report_path, cached_report, evict_expired_reports
+
+User = get_user_model()
+
+
+@shared_task
+def generate_pdf_report_task(user_id, report_id):
+    """Render a user's PDF report into the content-addressed report cache"""
+    user = User.objects.get(pk=user_id)
+    if cached_report(user.id, report_id):
+        return report_id
+
+    # Admin users get every reading, regular users only their own, archived
+    # readings included
+    if user.is_staff or user.is_superuser:
+        readings = BloodPressureReading.objects.all().select_related('user')
+        archived = ArchivedReadings()
+    else:
+        readings = BloodPressureReading.objects.filter(user=user)
+        archived = ArchivedReadings().filter(user_id=user.id)
+
+    generate_pdf_report(readings, user, report_path(user.id, report_id), archived)
+    evict_expired_reports()
+    return report_id
+
+
+@shared_task
+def evict_expired_pdf_reports():
+    """Remove cached PDF reports older than PDF_REPORT_TTL"""
+    return evict_expired_reports()
+
+
+@shared_task
+def maintain_reading_partitions():
+    """Pre-create upcoming reading partitions and detach expired ones (no-op unless partitioned)"""
+    if not is_partitioned():
+        return []
+    changed = create_partitions(settings.READINGS_PARTITION_MONTHS_AHEAD)
+    if settings.READINGS_PARTITION_RETAIN_MONTHS:
+        changed += detach_partitions(settings.READINGS_PARTITION_RETAIN_MONTHS)
+    return changed
@@ -0,0 +1,59 @@
+from datetime import datetime, timezone as dt_timezone
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from .models import BloodPressureReading
+from .partitioning import convert_to_partitioned, is_partitioned, monthly_partitions
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Partitioning requires PostgreSQL')
+class ConvertToPartitionedTests(TestCase):
+    """convert_to_partitioned() on a populated readings table"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='patient', email='patient@example.com', password='s3cret-pass')
+        self.readings = [
+            BloodPressureReading.objects.create(
+                user=self.user, systolic=systolic, diastolic=80, recorded_at=recorded_at
+            )
+            for systolic, recorded_at in (
+                (118, datetime(2024, 1, 15, 8, tzinfo=dt_timezone.utc)),
+                (135, datetime(2024, 3, 2, 20, tzinfo=dt_timezone.utc)),
+            )
+        ]
+
+    def _constraints(self):
+        with connection.cursor() as cursor:
+            return connection.introspection.get_constraints(cursor, BloodPressureReading._meta.db_table)
+
+    @staticmethod
+    def _secondary(constraints):
+        return {name: info for name, info in constraints.items() if not info['primary_key']}
+
+    def test_conversion_keeps_rows_indexes_and_foreign_keys(self):
+        before = self._constraints()
+        self.assertGreater(convert_to_partitioned(months_ahead=1), 0)
+        after = self._constraints()
+
+        self.assertTrue(is_partitioned())
+        self.assertIn(datetime(2024, 1, 1).date(), monthly_partitions())
+        self.assertEqual(
+            sorted(BloodPressureReading.objects.values_list('id', 'systolic')),
+            sorted((reading.id, reading.systolic) for reading in self.readings),
+        )
+        # Same indexes and foreign keys, under the same names
+        self.assertEqual(self._secondary(before), self._secondary(after))
+        self.assertEqual(
+            [info['columns'] for info in after.values() if info['primary_key']], [['id', 'recorded_at']]
+        )
+
+        # New rows keep drawing ids from the sequence
+        reading = BloodPressureReading.objects.create(
+            user=self.user, systolic=120, diastolic=78, recorded_at=datetime(2024, 2, 1, tzinfo=dt_timezone.utc)
+        )
+        self.assertGreater(reading.id, max(existing.id for existing in self.readings))
@@ -1,71 +1,484 @@
 import os
+import csv
+import json
+import time
+import heapq
+import hashlib
+import tempfile
+from itertools import groupby
+from xml.sax.saxutils import escape
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, Count, Max
+from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfdoc import PDFStream, PDFArray, PDFName, PDFZCompress
+from reportlab.pdfgen.canvas import Canvas
 from django.conf import settings
+from django.utils import timezone
+from .models import categorize_bp, BP_CATEGORY_CONDITIONS
+from .rollups import ROLLUP_AGGREGATES
+from .archive import combine_stats
 
+AGGREGATE_BUCKETS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
 
-def generate_pdf_report(readings, user):
-    """Generate a PDF report of blood pressure readings"""
-    # Create a temporary file path
-    filename = f'moyo_report_{user.id}.pdf'
-    filepath = os.path.join(settings.BASE_DIR, 'temp', filename)
-    
-    # Ensure temp directory exists
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    
-    # Create the PDF document
-    doc = SimpleDocTemplate(filepath, pagesize=letter)
-    elements = []
+EXPORT_FIELDS = ['id', 'user_id', 'user__email', 'systolic', 'diastolic', 'heart_rate',
+                 'recorded_at', 'notes', 'created_at', 'updated_at', 'category']
+EXPORT_COLUMNS = ['id', 'user', 'user_email', 'systolic', 'diastolic', 'heart_rate',
+                  'recorded_at', 'notes', 'created_at', 'updated_at', 'category']
+
+
+def report_fingerprint(readings, user, archived=None):
+    """
+    Content key for a PDF report: changes whenever a reading in scope is
+    added, removed or edited, or ``archived`` readings are added or
+    removed, so unchanged data maps to the same artifact.
+    """
+    stats = readings.aggregate(count=Count('id'), latest=Max('updated_at'))
+    latest = stats['latest'].isoformat() if stats['latest'] else ''
+    scope = 'all' if user.is_staff or user.is_superuser else 'own'
+    raw = f"{user.id}:{scope}:{user.get_full_name() or user.email}:{stats['count']}:{latest}"
+    if archived is not None:
+        segments = archived.segment_stats()
+        raw += f":{segments['segments']}:{segments['rows'] or 0}:{segments['latest'] or ''}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def report_dir():
+    return os.path.join(settings.BASE_DIR, 'temp', 'reports')
+
+
+def report_path(user_id, report_id):
+    """Path of the cached PDF for a report id, or None if the id is malformed"""
+    if not report_id or len(report_id) != 32 or any(c not in '0123456789abcdef' for c in report_id):
+        return None
+    return os.path.join(report_dir(), str(user_id), f'{report_id}.pdf')
+
+
+def cached_report(user_id, report_id):
+    """Return the path of a cached report if it exists and has not expired"""
+    path = report_path(user_id, report_id)
+    if not path or not os.path.exists(path):
+        return None
+    if time.time() - os.path.getmtime(path) > settings.PDF_REPORT_TTL:
+        return None
+    return path
+
+
+def _requested_path(user_id, report_id):
+    return os.path.splitext(report_path(user_id, report_id))[0] + '.requested'
+
+
+def mark_report_requested(user_id, report_id):
+    """
+    Record when a report's render task was (re)queued, as a marker file
+    beside the report so every web process sees it
+    """
+    path = _requested_path(user_id, report_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a'):
+        pass
+    os.utime(path)
+
+
+def report_requested_at(user_id, report_id):
+    """Epoch seconds of the last mark_report_requested(), or None"""
+    try:
+        return os.path.getmtime(_requested_path(user_id, report_id))
+    except FileNotFoundError:
+        return None
+
+
+def evict_expired_reports():
+    """Delete cached reports older than PDF_REPORT_TTL; returns the number removed"""
+    removed = 0
+    cutoff = time.time() - settings.PDF_REPORT_TTL
+    for root, dirs, files in os.walk(report_dir()):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+REPORT_ROWS_PER_TABLE = 40
+REPORT_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+READING_COLUMNS = ['Date', 'Systolic', 'Diastolic', 'Heart Rate', 'Notes']
+READING_COL_WIDTHS = [100, 55, 55, 50, 208]
+SUMMARY_COLUMNS = ['Month', 'Readings', 'Avg BP', 'Systolic Range', 'Diastolic Range', 'Avg HR']
+SUMMARY_COL_WIDTHS = [78, 62, 78, 90, 90, 70]
+
+
+class _LazyStory(list):
+    """
+    Flowable list for doc.build() that pulls from a generator on demand.
+
+    reportlab consumes the story from the front and only looks a few
+    flowables ahead, so keeping a small buffer filled means the whole
+    report never has to exist in memory at once.
+    """
+
+    def __init__(self, flowables, lookahead=8):
+        super().__init__()
+        self._source = iter(flowables)
+        self._lookahead = lookahead
+
+    def _fill(self):
+        while self._source is not None and list.__len__(self) < self._lookahead:
+            try:
+                list.append(self, next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+
+class _CompressingCanvas(Canvas):
+    """
+    Canvas that deflates each page's content stream as soon as the page is
+    finished. reportlab otherwise keeps every page stream uncompressed in
+    memory until save(), which dominates memory on very long reports.
+    """
+
+    def showPage(self):
+        super().showPage()
+        page = self._doc.Pages.pages[-1]
+        if page.stream and not page.Contents:
+            stream = PDFStream(content=PDFZCompress.encode(page.stream))
+            stream.dictionary['Filter'] = PDFArray([PDFName(PDFZCompress.pdfname)])
+            stream.__Comment__ = 'page stream'
+            page.Contents = stream
+            page.stream = None
+
+
+def _chunked_tables(rows, header, col_widths, patient_style=None):
+    """Yield fixed-width tables of at most REPORT_ROWS_PER_TABLE rows.
+
+    ``rows`` yields ``(patient, cells)`` pairs; when ``patient_style`` is set
+    a heading is emitted each time the patient changes.
+    """
+    current_patient = object()
+    data = []
+    for patient, cells in rows:
+        if patient_style is not None and patient != current_patient:
+            if data:
+                yield _report_table(data, header, col_widths)
+                data = []
+            yield Paragraph(f"<b>Patient: {escape(str(patient))}</b>", patient_style)
+            current_patient = patient
+        data.append(cells)
+        if len(data) >= REPORT_ROWS_PER_TABLE:
+            yield _report_table(data, header, col_widths)
+            data = []
+    if data:
+        yield _report_table(data, header, col_widths)
+
+
+def _report_table(data, header, col_widths):
+    table = Table([header] + data, colWidths=col_widths, repeatRows=1)
+    table.setStyle(REPORT_TABLE_STYLE)
+    return table
+
+
+def _report_story(title, summary_rows, reading_rows, multi_user):
     styles = getSampleStyleSheet()
-    
+    patient_style = styles['Heading3'] if multi_user else None
+
     # Title
-    title = Paragraph(f"<b>Moyo - Blood Pressure Report for {user.get_full_name() or user.email}</b>", 
-                     styles['Heading1'])
-    elements.append(title)
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Table data
-    data = [['Date', 'Systolic', 'Diastolic', 'Heart Rate', 'Notes']]
-    
-    for reading in readings:
-        data.append([
-            reading.recorded_at.strftime('%Y-%m-%d %H:%M'),
-            str(reading.systolic),
-            str(reading.diastolic),
-            str(reading.heart_rate) if reading.heart_rate else 'N/A',
-            reading.notes[:50] if reading.notes else ''
-        ])
-    
-    # Create table
-    table = Table(data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    
-    elements.append(table)
-    
+    yield Paragraph(f"<b>{escape(title)}</b>", styles['Heading1'])
+    yield Spacer(1, 0.2*inch)
+
+    # Per-month summary pages come first so the overview doesn't require
+    # paging through the raw data
+    yield Paragraph("<b>Monthly Summary</b>", styles['Heading2'])
+    for table in _chunked_tables(
+        ((row['patient'], [
+            row['month'].strftime('%Y-%m'),
+            str(row['count']),
+            f"{row['avg_systolic']:.0f}/{row['avg_diastolic']:.0f}",
+            f"{row['min_systolic']}-{row['max_systolic']}",
+            f"{row['min_diastolic']}-{row['max_diastolic']}",
+            f"{row['avg_heart_rate']:.0f}" if row['avg_heart_rate'] is not None else 'N/A',
+        ]) for row in summary_rows),
+        SUMMARY_COLUMNS, SUMMARY_COL_WIDTHS, patient_style,
+    ):
+        yield table
+        yield Spacer(1, 0.1*inch)
+    yield PageBreak()
+
+    # Raw readings
+    yield Paragraph("<b>All Readings</b>", styles['Heading2'])
+    for table in _chunked_tables(
+        ((row['user_email'], [
+            row['recorded_at'].strftime('%Y-%m-%d %H:%M'),
+            str(row['systolic']),
+            str(row['diastolic']),
+            str(row['heart_rate']) if row['heart_rate'] else 'N/A',
+            row['notes'][:50] if row['notes'] else ''
+        ]) for row in reading_rows),
+        READING_COLUMNS, READING_COL_WIDTHS, patient_style,
+    ):
+        yield table
+
     # Medical disclaimer
-    elements.append(Spacer(1, 0.3*inch))
-    disclaimer = Paragraph(
+    yield Spacer(1, 0.3*inch)
+    yield Paragraph(
         "<i><b>Medical Disclaimer:</b> This report is for informational purposes only and is not "
         "a substitute for professional medical advice. Please consult with a healthcare provider "
         "for any concerns about your blood pressure.</i>",
         styles['Normal']
     )
-    elements.append(disclaimer)
+
+
+def render_pdf_report(filepath, title, summary_rows, reading_rows, multi_user=False):
+    """
+    Render a report from row iterators in bounded memory.
+
+    ``summary_rows`` yields dicts shaped like ``monthly_summaries()`` output
+    and ``reading_rows`` dicts shaped like ``iter_readings_keyset()`` output;
+    both are consumed lazily while the document is laid out.
+    """
+    doc = SimpleDocTemplate(filepath, pagesize=letter)
+    doc.build(
+        _LazyStory(_report_story(title, summary_rows, reading_rows, multi_user)),
+        canvasmaker=_CompressingCanvas,
+    )
+    return filepath
+
+
+def monthly_summaries(readings, archived=None):
+    """
+    Per-user, per-month reading statistics computed in a single SQL query,
+    merged with the matching ``archived`` readings, by user and newest month
+    first. Rows are merged as they stream, so memory stays flat.
+    """
+    rows = (
+        readings.order_by()
+        .annotate(month=TruncMonth('recorded_at'))
+        .values('user_id', 'user__email', 'month')
+        .annotate(**ROLLUP_AGGREGATES)
+        .order_by('user_id', '-month')
+    )
+    stats = ((row.pop('user_id'), row.pop('month'), row.pop('user__email'), row) for row in rows.iterator())
+    if archived is not None:
+        stats = heapq.merge(
+            stats,
+            _archived_monthly_stats(archived),
+            key=lambda item: (item[0], -item[1].timestamp()),
+        )
+    # The same user and month may come from both sides
+    for (user_id, _), group in groupby(stats, key=lambda item: (item[0], item[1].timestamp())):
+        group = list(group)
+        _, month, email, row = group[0]
+        for _, _, _, other in group[1:]:
+            row = combine_stats(row, other)
+        count = row['reading_count']
+        yield {
+            'user_id': user_id,
+            'patient': email,
+            'month': month,
+            'count': count,
+            'avg_systolic': row['systolic_sum'] / count,
+            'min_systolic': row['systolic_min'],
+            'max_systolic': row['systolic_max'],
+            'avg_diastolic': row['diastolic_sum'] / count,
+            'min_diastolic': row['diastolic_min'],
+            'max_diastolic': row['diastolic_max'],
+            'avg_heart_rate': (
+                row['heart_rate_sum'] / row['heart_rate_count'] if row['heart_rate_count'] else None
+            ),
+        }
+
+
+def _archived_monthly_stats(archived):
+    """archived.iter_summaries() by month, as (user_id, month, email, stats), newest month first per user"""
+    emails = archived.user_emails()
+    summaries = archived.iter_summaries('month', timezone.get_current_timezone())
+    for user_id, group in groupby(summaries, key=lambda item: item[0]):
+        for _, month, stats in reversed(list(group)):
+            yield user_id, month, emails.get(user_id), stats
+
+
+def generate_pdf_report(readings, user, filepath=None, archived=None):
+    """Generate a PDF report of blood pressure readings (and ``archived`` readings)"""
+    if filepath is None:
+        filepath = report_path(user.id, report_fingerprint(readings, user, archived))
+    
+    # Ensure output directory exists
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    
+    # Render into a private temp file and move it into place atomically so
+    # concurrent exports never see (or clobber) a half-written report
+    fd, tmp_path = tempfile.mkstemp(suffix='.pdf', dir=os.path.dirname(filepath))
+    os.close(fd)
     
-    # Build PDF
-    doc.build(elements)
+    try:
+        render_pdf_report(
+            tmp_path,
+            f"Moyo - Blood Pressure Report for {user.get_full_name() or user.email}",
+            monthly_summaries(readings, archived),
+            iter_export_rows(readings, archived=archived),
+            multi_user=user.is_staff or user.is_superuser,
+        )
+        os.replace(tmp_path, filepath)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
     
     return filepath
 
+
+def iter_readings_keyset(queryset, chunk_size=2000):
+    """
+    Yield readings as dicts in (user, -recorded_at, -id) order, fetching one
+    keyset-bounded chunk at a time so memory stays flat for any table size.
+    """
+    queryset = queryset.order_by('user_id', '-recorded_at', '-id').values(*EXPORT_FIELDS)
+    last = None
+    while True:
+        chunk = queryset
+        if last is not None:
+            user_id, recorded_at, pk = last
+            chunk = chunk.filter(
+                Q(user_id__gt=user_id)
+                | Q(user_id=user_id, recorded_at__lt=recorded_at)
+                | Q(user_id=user_id, recorded_at=recorded_at, id__lt=pk)
+            )
+        rows = list(chunk[:chunk_size])
+        if not rows:
+            return
+        for row in rows:
+            yield {
+                'id': row['id'],
+                'user': row['user_id'],
+                'user_email': row['user__email'],
+                'systolic': row['systolic'],
+                'diastolic': row['diastolic'],
+                'heart_rate': row['heart_rate'],
+                'recorded_at': row['recorded_at'],
+                'notes': row['notes'],
+                'created_at': row['created_at'],
+                'updated_at': row['updated_at'],
+                # Rows saved before the category column existed may not be backfilled yet
+                'category': row['category'] or categorize_bp(row['systolic'], row['diastolic']),
+            }
+        if len(rows) < chunk_size:
+            return
+        tail = rows[-1]
+        last = (tail['user_id'], tail['recorded_at'], tail['id'])
+
+
+class _Echo:
+    """File-like object whose write() just returns the value, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def iter_export_rows(queryset, chunk_size=2000, archived=None):
+    """
+    iter_readings_keyset() merged with the matching ``archived`` readings,
+    in the same (user, -recorded_at, -id) order.
+    """
+    rows = iter_readings_keyset(queryset, chunk_size)
+    if archived is None:
+        return rows
+    return heapq.merge(
+        rows,
+        archived.iter_rows(),
+        key=lambda row: (row['user'], -row['recorded_at'].timestamp(), -row['id']),
+    )
+
+
+def stream_readings_csv(queryset, chunk_size=2000, archived=None):
+    """Yield CSV lines (header first) for the given readings queryset (and archived readings)"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in iter_export_rows(queryset, chunk_size, archived):
+        yield writer.writerow([
+            row[column].isoformat() if hasattr(row[column], 'isoformat') else row[column]
+            for column in EXPORT_COLUMNS
+        ])
+
+
+def stream_readings_ndjson(queryset, chunk_size=2000, archived=None):
+    """Yield one JSON document per line for the given readings queryset (and archived readings)"""
+    for row in iter_export_rows(queryset, chunk_size, archived):
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def aggregate_readings(queryset, bucket='day', tzinfo=None, archived=None):
+    """
+    Per-bucket min/avg/max of systolic, diastolic and heart rate plus a BP
+    category histogram from the stored category column, computed in one
+    GROUP BY query and merged with the matching ``archived`` readings.
+    """
+    trunc = AGGREGATE_BUCKETS[bucket]
+    rows = (
+        queryset.order_by()
+        .annotate(period=trunc('recorded_at', tzinfo=tzinfo))
+        .values('period')
+        .annotate(**ROLLUP_AGGREGATES)
+    )
+    periods = {row.pop('period'): row for row in rows}
+    if archived is not None:
+        for (_, period), stats in archived.summarize(bucket, tzinfo).items():
+            periods[period] = combine_stats(periods[period], stats) if period in periods else stats
+    return [_aggregate_row(period, periods[period]) for period in sorted(periods)]
+
+
+def _average(total, count):
+    return round(total / count, 1) if count else None
+
+
+def _aggregate_row(period, stats):
+    count = stats['reading_count']
+    return {
+        'period': period,
+        'count': count,
+        'systolic': {
+            'min': stats['systolic_min'],
+            'avg': _average(stats['systolic_sum'], count),
+            'max': stats['systolic_max'],
+        },
+        'diastolic': {
+            'min': stats['diastolic_min'],
+            'avg': _average(stats['diastolic_sum'], count),
+            'max': stats['diastolic_max'],
+        },
+        'heart_rate': {
+            'min': stats['heart_rate_min'],
+            'avg': _average(stats['heart_rate_sum'] or 0, stats['heart_rate_count']),
+            'max': stats['heart_rate_max'],
+        },
+        'categories': {
+            category: stats[f'{category}_count'] for category in BP_CATEGORY_CONDITIONS
+        },
+    }
@@ -2,18 +2,67 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from .models import BloodPressureReading
-from .serializers import BloodPressureReadingSerializer
-from .utils import generate_pdf_report
+from django.db import transaction
+from django.http import StreamingHttpResponse, FileResponse
+from django.utils import timezone
+from celery.result import AsyncResult
+from functools import partial
+import time
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from itaku_backend.filters import IndexedFilter, IndexedFilterBackend, parse_range_bound
+from itaku_backend.conditional import ConditionalGetMixin
+from itaku_backend.response_cache import ResponseCacheMixin, bump_user_versions
+from accounts.summary import invalidate_admin_summary
+from insights.trends import recompute_trend
+from .models import BloodPressureReading, BP_CATEGORY_CHOICES, categorize_bp
+from .serializers import BloodPressureReadingSerializer, BloodPressureReadingBulkItemSerializer
+from .utils import (
+    AGGREGATE_BUCKETS,
+    aggregate_readings,
+    report_fingerprint,
+    report_path,
+    cached_report,
+    mark_report_requested,
+    report_requested_at,
+    stream_readings_csv,
+    stream_readings_ndjson,
+)
+from .rollups import refresh_rollups, reading_day
+from .downsampling import downsample_readings
+from .archive import ArchivedReadings
+from .tasks import generate_pdf_report_task
 
 User = get_user_model()
 
 
-class BloodPressureReadingViewSet(viewsets.ModelViewSet):
+class BloodPressureReadingViewSet(ResponseCacheMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for managing blood pressure readings"""
+    cache_resource = 'readings'
     serializer_class = BloodPressureReadingSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('user', '-recorded_at', '-id')
+    ordering_options = {
+        '-recorded_at': ('user', '-recorded_at', '-id'),
+        'recorded_at': ('user', 'recorded_at', 'id'),
+    }
+    indexed_filters = {
+        'user': IndexedFilter('user', admin_only=True, example='1'),
+        'start': IndexedFilter('recorded_at', 'gte', kind='start', example='2024-01-01'),
+        'end': IndexedFilter('recorded_at', 'lt', kind='end', example='2024-12-31'),
+        'category': IndexedFilter(
+            'category',
+            kind='choice',
+            choices=[value for value, _ in BP_CATEGORY_CHOICES],
+            example='high_stage2',
+        ),
+    }
+    bulk_max_items = 5000
+    bulk_batch_size = 500
+    export_chunk_size = 2000
+    series_default_points = 500
+    series_max_points = 5000
 
     def get_queryset(self):
         # Admin users can see all readings, regular users see only their own
@@ -21,6 +70,25 @@ class BloodPressureReadingViewSet(viewsets.ModelViewSet):
             return BloodPressureReading.objects.all().select_related('user')
         return BloodPressureReading.objects.filter(user=self.request.user)
 
+    def get_archived_readings(self):
+        """The archived counterpart of get_queryset(), with the same scoping"""
+        if self.request.user.is_staff or self.request.user.is_superuser:
+            return ArchivedReadings()
+        return ArchivedReadings().filter(user_id=self.request.user.id)
+
+    def filter_archived_readings(self, archived):
+        """Apply the request's indexed filters to archived readings"""
+        for indexed_filter, value in IndexedFilterBackend().lookups(self.request, self):
+            archived = archived.filter(**indexed_filter.filter_kwargs(value))
+        return archived
+
+    def get_extra_page_rows(self, ordering, values, reverse, limit):
+        # Merge archived readings into list pages (see KeysetCursorPagination)
+        if self.action != 'list':
+            return []
+        archived = self.filter_archived_readings(self.get_archived_readings())
+        return archived.page(ordering, values, reverse, limit)
+
     def perform_create(self, serializer):
         # Allow admin to specify user, otherwise use request user
         user_id = self.request.data.get('user')
@@ -30,21 +98,263 @@ class BloodPressureReadingViewSet(viewsets.ModelViewSet):
         else:
             serializer.save(user=self.request.user)
 
-    @action(detail=False, methods=['get'], url_path='export-pdf')
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Create many readings in one request.
+
+        Accepts either a list of readings or ``{"user": <id>, "readings": [...]}``
+        (``user`` is only honoured for admins). Valid rows are inserted in a
+        single transaction; invalid rows are reported back by index.
+        """
+        payload = request.data
+        user = request.user
+        if isinstance(payload, dict):
+            user_id = payload.get('user')
+            if (request.user.is_staff or request.user.is_superuser) and user_id:
+                try:
+                    user = User.objects.get(pk=user_id)
+                except (User.DoesNotExist, ValueError):
+                    return Response({'user': ['User not found.']}, status=status.HTTP_400_BAD_REQUEST)
+            payload = payload.get('readings')
+
+        if not isinstance(payload, list):
+            return Response(
+                {'detail': 'Expected a list of readings or an object with a "readings" list.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(payload) > self.bulk_max_items:
+            return Response(
+                {'detail': f'At most {self.bulk_max_items} readings can be submitted at once.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        readings = []
+        errors = []
+        for index, row in enumerate(payload):
+            item = BloodPressureReadingBulkItemSerializer(data=row)
+            if item.is_valid():
+                reading = BloodPressureReading(user=user, **item.validated_data)
+                # bulk_create() skips save(), so set the category here
+                reading.category = categorize_bp(reading.systolic, reading.diastolic)
+                readings.append(reading)
+            else:
+                errors.append({'index': index, 'errors': item.errors})
+
+        with transaction.atomic():
+            BloodPressureReading.objects.bulk_create(readings, batch_size=self.bulk_batch_size)
+            # bulk_create skips signals, so refresh the daily rollups, trend,
+            # cached pages and admin summary explicitly
+            refresh_rollups(user.id, [reading_day(reading.recorded_at) for reading in readings])
+            if readings:
+                transaction.on_commit(partial(recompute_trend, user.id))
+                bump_user_versions('readings', [user.id])
+                transaction.on_commit(invalidate_admin_summary)
+
+        return Response({
+            'created': len(readings),
+            'failed': len(errors),
+            'errors': errors,
+        }, status=status.HTTP_201_CREATED if readings or not errors else status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['get'])
+    def aggregate(self, request):
+        """
+        Daily/weekly/monthly rollups of readings computed in SQL.
+
+        Query params: ``bucket`` (day, week or month), ``start`` and ``end``
+        (ISO dates or datetimes), ``tz`` (IANA name used for bucket
+        boundaries) and, for admins, ``user``.
+        """
+        params = request.query_params
+        bucket = params.get('bucket', 'day')
+        if bucket not in AGGREGATE_BUCKETS:
+            return Response({'bucket': [f'Must be one of: {", ".join(AGGREGATE_BUCKETS)}.']},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            tzinfo = ZoneInfo(params['tz']) if params.get('tz') else timezone.get_current_timezone()
+        except (ZoneInfoNotFoundError, ValueError):
+            return Response({'tz': ['Unknown time zone.']}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            user_id = self._admin_user_id(params)
+        except ValueError:
+            return Response({'user': ['Must be an integer.']}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            lookups, start, end = self._range_lookups(params, tzinfo, user_id)
+        except ValueError:
+            return Response({'detail': 'start and end must be ISO dates or datetimes.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.get_queryset().filter(**lookups)
+        archived = self.get_archived_readings().filter(**lookups)
+
+        return Response({
+            'bucket': bucket,
+            'start': start,
+            'end': end,
+            'results': aggregate_readings(queryset, bucket, tzinfo, archived),
+        })
+
+    @action(detail=False, methods=['get'])
+    def series(self, request):
+        """
+        Readings of a time range downsampled with LTTB for charting.
+
+        Query params: ``points`` (maximum number of points returned, default
+        500), ``start`` and ``end`` (ISO dates or datetimes), ``tz`` (IANA
+        name used for bare dates) and, for admins, ``user``.
+        """
+        params = request.query_params
+        try:
+            points = int(params.get('points', self.series_default_points))
+        except ValueError:
+            points = 0
+        if not 3 <= points <= self.series_max_points:
+            return Response({'points': [f'Must be an integer between 3 and {self.series_max_points}.']},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            tzinfo = ZoneInfo(params['tz']) if params.get('tz') else timezone.get_current_timezone()
+        except (ZoneInfoNotFoundError, ValueError):
+            return Response({'tz': ['Unknown time zone.']}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            user_id = self._admin_user_id(params)
+        except ValueError:
+            return Response({'user': ['Must be an integer.']}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            lookups, start, end = self._range_lookups(params, tzinfo, user_id)
+        except ValueError:
+            return Response({'detail': 'start and end must be ISO dates or datetimes.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.get_queryset().filter(**lookups)
+        archived = self.get_archived_readings().filter(**lookups)
+
+        total, results = downsample_readings(queryset, points, archived)
+        return Response({
+            'start': start,
+            'end': end,
+            'total': total,
+            'results': results,
+        })
+
+    def _admin_user_id(self, params):
+        """The ``user`` param of an admin request (None otherwise); raises ValueError if not an integer"""
+        user = self.request.user
+        if params.get('user') and (user.is_staff or user.is_superuser):
+            return int(params['user'])
+        return None
+
+    def _range_lookups(self, params, tzinfo, user_id=None):
+        """
+        Filter lookups for the ``start``/``end`` params (and ``user_id``),
+        with the parsed bounds; raises ValueError on bad dates.
+        """
+        lookups = {}
+        start = parse_range_bound(params['start'], tzinfo) if params.get('start') else None
+        end = parse_range_bound(params['end'], tzinfo, end=True) if params.get('end') else None
+        if start:
+            lookups['recorded_at__gte'] = start
+        if end:
+            lookups['recorded_at__lt'] = end
+        if user_id is not None:
+            lookups['user_id'] = user_id
+        return lookups, start, end
+
+    def _report_status(self, report_id):
+        if cached_report(self.request.user.id, report_id):
+            return 'ready'
+        state = AsyncResult(report_id).state
+        if state == 'FAILURE':
+            return 'failed'
+        if state == 'STARTED':
+            return 'running'
+        if state == 'SUCCESS':
+            # Rendered, but the file has been evicted since
+            return 'expired'
+        # Celery reports unknown tasks as PENDING too: give up on a task no
+        # worker has started in time (or that was never requested)
+        requested_at = report_requested_at(self.request.user.id, report_id)
+        if requested_at is None or time.time() - requested_at > settings.PDF_REPORT_PENDING_TIMEOUT:
+            return 'expired'
+        return 'pending'
+
+    def _report_response(self, report_id, report_status):
+        return Response({
+            'report_id': report_id,
+            'status': report_status,
+        }, status=status.HTTP_202_ACCEPTED if report_status in ('pending', 'running') else status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get', 'post'], url_path='export-pdf')
     def export_pdf(self, request):
-        """Export all readings as PDF"""
-        readings = self.get_queryset()
-        pdf_file = generate_pdf_report(readings, request.user)
-        
-        from django.http import FileResponse
-        import os
-        
+        """
+        Export all readings as PDF.
+
+        POST requests a report and returns its ``report_id``; rendering runs
+        in a background task unless an identical report is already cached.
+        GET downloads the report named by ``?report_id=`` (or the current
+        report if it is cached), and otherwise behaves like POST.
+        """
+        report_id = request.query_params.get('report_id') if request.method == 'GET' else None
+        if report_id:
+            pdf_file = cached_report(request.user.id, report_id)
+            if not pdf_file:
+                return Response({'report_id': report_id, 'status': self._report_status(report_id)},
+                                status=status.HTTP_404_NOT_FOUND)
+        else:
+            report_id = report_fingerprint(self.get_queryset(), request.user, self.get_archived_readings())
+            pdf_file = cached_report(request.user.id, report_id)
+            if not pdf_file:
+                report_status = self._report_status(report_id)
+                if report_status in ('pending', 'running'):
+                    # Already queued or rendering: don't queue it twice
+                    return self._report_response(report_id, report_status)
+                # Drop a failed or finished run's state so polls see the new one
+                AsyncResult(report_id).forget()
+                mark_report_requested(request.user.id, report_id)
+                generate_pdf_report_task.apply_async(args=[request.user.id, report_id], task_id=report_id)
+                return self._report_response(report_id, self._report_status(report_id))
+
+        if request.method == 'POST':
+            return self._report_response(report_id, 'ready')
+
         response = FileResponse(
             open(pdf_file, 'rb'),
             content_type='application/pdf',
             filename='moyo_blood_pressure_report.pdf'
         )
-        # Clean up the temp file after sending
         response['Content-Disposition'] = 'attachment; filename="moyo_blood_pressure_report.pdf"'
         return response
 
+    @action(detail=False, methods=['get'], url_path='export-pdf/status')
+    def export_pdf_status(self, request):
+        """Poll the status of a report requested through export-pdf"""
+        report_id = request.query_params.get('report_id')
+        if not report_path(request.user.id, report_id):
+            return Response({'report_id': ['A valid report_id is required.']}, status=status.HTTP_400_BAD_REQUEST)
+        return self._report_response(report_id, self._report_status(report_id))
+
+    @action(detail=False, methods=['get'], url_path='export-csv')
+    def export_csv(self, request):
+        """Stream all readings as CSV"""
+        response = StreamingHttpResponse(
+            stream_readings_csv(
+                self.filter_queryset(self.get_queryset()),
+                self.export_chunk_size,
+                self.filter_archived_readings(self.get_archived_readings()),
+            ),
+            content_type='text/csv'
+        )
+        response['Content-Disposition'] = 'attachment; filename="moyo_blood_pressure_readings.csv"'
+        return response
+
+    @action(detail=False, methods=['get'], url_path='export-ndjson')
+    def export_ndjson(self, request):
+        """Stream all readings as newline-delimited JSON"""
+        response = StreamingHttpResponse(
+            stream_readings_ndjson(
+                self.filter_queryset(self.get_queryset()),
+                self.export_chunk_size,
+                self.filter_archived_readings(self.get_archived_readings()),
+            ),
+            content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = 'attachment; filename="moyo_blood_pressure_readings.ndjson"'
+        return response
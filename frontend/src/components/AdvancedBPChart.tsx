@@ -1,4 +1,4 @@
-import { useMemo, useState } from 'react'
+import { useEffect, useMemo, useState } from 'react'
 import {
   Chart as ChartJS,
   CategoryScale,
@@ -13,7 +13,8 @@ import {
 import { Line } from 'react-chartjs-2'
 import { Box, Typography, ButtonGroup, Button, Paper } from '@mui/material'
 import { BloodPressureReading } from '../types'
-import { format, subDays, subMonths, subYears, startOfDay, endOfDay } from 'date-fns'
+import apiClient from '../config/axios'
+import { format, subDays, subYears } from 'date-fns'
 
 ChartJS.register(
   CategoryScale,
@@ -32,14 +33,18 @@ interface AdvancedBPChartProps {
 
 type TimePeriod = '7d' | '30d' | '90d' | '1y' | 'all' | 'custom'
 
+// Upper bound on points drawn; the API downsamples longer ranges (LTTB)
+const MAX_CHART_POINTS = 500
+
 const AdvancedBPChart: React.FC<AdvancedBPChartProps> = ({ readings }) => {
   const [timePeriod, setTimePeriod] = useState<TimePeriod>('30d')
   const [customStartDate, setCustomStartDate] = useState<string>('')
   const [customEndDate, setCustomEndDate] = useState<string>('')
 
-  const filteredReadings = useMemo(() => {
-    if (readings.length === 0) return []
+  const [filteredReadings, setFilteredReadings] = useState<BloodPressureReading[]>([])
+  const [totalReadings, setTotalReadings] = useState(0)
 
+  useEffect(() => {
     let startDate: Date | null = null
     const now = new Date()
 
@@ -66,27 +71,33 @@ const AdvancedBPChart: React.FC<AdvancedBPChartProps> = ({ readings }) => {
         startDate = null
     }
 
-    let filtered = [...readings]
-
+    const params: Record<string, string | number> = {
+      points: MAX_CHART_POINTS,
+      tz: Intl.DateTimeFormat().resolvedOptions().timeZone,
+    }
     if (startDate) {
-      filtered = filtered.filter(
-        (r) => new Date(r.recorded_at) >= startOfDay(startDate!)
-      )
+      params.start = format(startDate, 'yyyy-MM-dd')
     }
-
     if (timePeriod === 'custom' && customEndDate) {
-      const endDate = endOfDay(new Date(customEndDate))
-      filtered = filtered.filter((r) => new Date(r.recorded_at) <= endDate)
+      params.end = customEndDate
     } else if (timePeriod !== 'all' && timePeriod !== 'custom') {
-      // Filter to end of today for non-custom periods
-      filtered = filtered.filter((r) => new Date(r.recorded_at) <= endOfDay(now))
+      params.end = format(now, 'yyyy-MM-dd')
     }
 
-    // Sort by date
-    return filtered.sort(
-      (a, b) =>
-        new Date(a.recorded_at).getTime() - new Date(b.recorded_at).getTime()
-    )
+    let cancelled = false
+    apiClient
+      .get('/api/readings/series/', { params })
+      .then((response) => {
+        if (!cancelled) {
+          setFilteredReadings(response.data.results)
+          setTotalReadings(response.data.total)
+        }
+      })
+      .catch((error) => console.error('Failed to fetch reading series:', error))
+    return () => {
+      cancelled = true
+    }
+    // readings is a dependency so the chart refreshes after adds/deletes
   }, [readings, timePeriod, customStartDate, customEndDate])
 
   const chartData = useMemo(() => {
@@ -173,7 +184,7 @@ const AdvancedBPChart: React.FC<AdvancedBPChartProps> = ({ readings }) => {
       },
       title: {
         display: true,
-        text: `Blood Pressure Trends (${filteredReadings.length} readings)`,
+        text: `Blood Pressure Trends (${totalReadings} readings)`,
       },
       tooltip: {
         callbacks: {
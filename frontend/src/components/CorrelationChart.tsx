@@ -1,26 +1,21 @@
-import { useMemo } from 'react'
+import { useEffect, useMemo, useState } from 'react'
 import {
   Chart as ChartJS,
   CategoryScale,
   LinearScale,
-  PointElement,
-  LineElement,
   BarElement,
   Title,
   Tooltip,
   Legend,
 } from 'chart.js'
-import { Scatter, Bar } from 'react-chartjs-2'
+import { Bar } from 'react-chartjs-2'
 import { Box, Typography, Paper, Tabs, Tab } from '@mui/material'
 import { BloodPressureReading, HealthFactor } from '../types'
-import { format, isSameDay } from 'date-fns'
-import { useState } from 'react'
+import apiClient from '../config/axios'
 
 ChartJS.register(
   CategoryScale,
   LinearScale,
-  PointElement,
-  LineElement,
   BarElement,
   Title,
   Tooltip,
@@ -32,116 +27,87 @@ interface CorrelationChartProps {
   healthFactors: HealthFactor[]
 }
 
+interface Coefficients {
+  pearson: number | null
+  spearman: number | null
+}
+
+interface FactorCorrelation {
+  levels: {
+    level: string
+    days: number
+    readings: number
+    systolic: number | null
+    diastolic: number | null
+  }[]
+  same_day: { days: number; systolic: Coefficients; diastolic: Coefficients }
+  next_day: { days: number; systolic: Coefficients; diastolic: Coefficients }
+}
+
+interface Correlations {
+  days: number
+  factors: Record<'sleep_quality' | 'stress_level' | 'exercise_duration', FactorCorrelation>
+}
+
+const FACTORS = [
+  { key: 'sleep_quality', label: 'Sleep Quality', axis: 'Sleep Quality (1-5)' },
+  { key: 'stress_level', label: 'Stress Level', axis: 'Stress Level (1-5)' },
+  { key: 'exercise_duration', label: 'Exercise', axis: 'Exercise Duration' },
+] as const
+
+const formatCoefficient = (value: number | null) =>
+  value === null ? 'n/a' : value.toFixed(2)
+
 const CorrelationChart: React.FC<CorrelationChartProps> = ({
   readings,
   healthFactors,
 }) => {
   const [activeTab, setActiveTab] = useState(0)
-
-  // Match readings with health factors by date
-  const matchedData = useMemo(() => {
-    if (readings.length === 0 || healthFactors.length === 0) return []
-
-    return readings
-      .map((reading) => {
-        const readingDate = new Date(reading.recorded_at)
-        const factor = healthFactors.find((f) =>
-          isSameDay(new Date(f.date), readingDate)
-        )
-
-        if (factor) {
-          return {
-            reading,
-            factor,
-            date: readingDate,
-          }
+  const [correlations, setCorrelations] = useState<Correlations | null>(null)
+
+  // Readings and factors are joined by day and correlated on the server;
+  // the props only trigger a refresh when the user adds or removes data
+  useEffect(() => {
+    let cancelled = false
+    apiClient
+      .get('/api/health-factors/correlations/')
+      .then((response) => {
+        if (!cancelled) {
+          setCorrelations(response.data)
         }
-        return null
       })
-      .filter((item): item is NonNullable<typeof item> => item !== null)
+      .catch((error) => console.error('Failed to fetch correlations:', error))
+    return () => {
+      cancelled = true
+    }
   }, [readings, healthFactors])
 
-  const sleepData = useMemo(() => {
-    if (matchedData.length === 0) return null
+  const factor = FACTORS[activeTab]
+  const current = correlations?.factors[factor.key]
+
+  const chartData = useMemo(() => {
+    if (!current) return null
 
     return {
-      labels: matchedData.map((d) => format(d.date, 'MMM dd')),
+      labels: current.levels.map((level) => level.level),
       datasets: [
         {
-          label: 'Average BP vs Sleep Quality',
-          data: matchedData.map((d) => ({
-            x: d.factor.sleep_quality || 0,
-            y: (d.reading.systolic + d.reading.diastolic) / 2,
-          })),
+          label: 'Average Systolic',
+          data: current.levels.map((level) => level.systolic),
           backgroundColor: 'rgba(75, 192, 192, 0.6)',
           borderColor: 'rgba(75, 192, 192, 1)',
         },
-      ],
-    }
-  }, [matchedData])
-
-  const stressData = useMemo(() => {
-    if (matchedData.length === 0) return null
-
-    return {
-      labels: matchedData.map((d) => format(d.date, 'MMM dd')),
-      datasets: [
         {
-          label: 'Average BP vs Stress Level',
-          data: matchedData.map((d) => ({
-            x: d.factor.stress_level || 0,
-            y: (d.reading.systolic + d.reading.diastolic) / 2,
-          })),
+          label: 'Average Diastolic',
+          data: current.levels.map((level) => level.diastolic),
           backgroundColor: 'rgba(255, 99, 132, 0.6)',
           borderColor: 'rgba(255, 99, 132, 1)',
         },
       ],
     }
-  }, [matchedData])
-
-  const exerciseData = useMemo(() => {
-    if (matchedData.length === 0) return null
-
-    // Group by exercise duration ranges
-    const ranges = [
-      { min: 0, max: 15, label: '0-15 min' },
-      { min: 16, max: 30, label: '16-30 min' },
-      { min: 31, max: 60, label: '31-60 min' },
-      { min: 61, max: 999, label: '60+ min' },
-    ]
-
-    const avgBPByRange = ranges.map((range) => {
-      const matching = matchedData.filter(
-        (d) =>
-          (d.factor.exercise_duration || 0) >= range.min &&
-          (d.factor.exercise_duration || 0) <= range.max
-      )
-
-      if (matching.length === 0) return 0
-
-      const avgBP =
-        matching.reduce(
-          (sum, d) => sum + (d.reading.systolic + d.reading.diastolic) / 2,
-          0
-        ) / matching.length
-
-      return avgBP
-    })
-
-    return {
-      labels: ranges.map((r) => r.label),
-      datasets: [
-        {
-          label: 'Average BP by Exercise Duration',
-          data: avgBPByRange,
-          backgroundColor: 'rgba(153, 102, 255, 0.6)',
-          borderColor: 'rgba(153, 102, 255, 1)',
-        },
-      ],
-    }
-  }, [matchedData])
+  }, [current])
 
-  const scatterOptions = {
+  const barOptions = {
     responsive: true,
     maintainAspectRatio: false,
     plugins: {
@@ -150,54 +116,36 @@ const CorrelationChart: React.FC<CorrelationChartProps> = ({
       },
       title: {
         display: true,
-        text: 'Correlation Analysis',
+        text: `Average BP by ${factor.label}`,
+      },
+      tooltip: {
+        callbacks: {
+          afterLabel: (context: any) => {
+            const level = current?.levels[context.dataIndex]
+            return level ? `${level.days} days, ${level.readings} readings` : ''
+          },
+        },
       },
     },
     scales: {
       x: {
         title: {
           display: true,
-          text: 'Health Factor Rating',
+          text: factor.axis,
         },
-        min: 0,
-        max: 6,
       },
       y: {
         title: {
           display: true,
           text: 'Average Blood Pressure (mmHg)',
         },
-        min: 60,
+        min: 40,
         max: 180,
       },
     },
   }
 
-  const barOptions = {
-    responsive: true,
-    maintainAspectRatio: false,
-    plugins: {
-      legend: {
-        position: 'top' as const,
-      },
-      title: {
-        display: true,
-        text: 'Average BP by Exercise Duration',
-      },
-    },
-    scales: {
-      y: {
-        title: {
-          display: true,
-          text: 'Average Blood Pressure (mmHg)',
-        },
-        min: 60,
-        max: 180,
-      },
-    },
-  }
-
-  if (matchedData.length === 0) {
+  if (!correlations || !current || current.same_day.days === 0) {
     return (
       <Paper sx={{ p: 3 }}>
         <Box p={3} textAlign="center">
@@ -215,31 +163,37 @@ const CorrelationChart: React.FC<CorrelationChartProps> = ({
         BP vs Health Factors Correlation
       </Typography>
       <Typography variant="caption" color="text.secondary" sx={{ mb: 2, display: 'block' }}>
-        Showing {matchedData.length} days with both BP readings and health factors
+        Showing {current.same_day.days} days with both BP readings and health factors
       </Typography>
 
       <Box sx={{ borderBottom: 1, borderColor: 'divider', mb: 2 }}>
         <Tabs value={activeTab} onChange={(_, newValue) => setActiveTab(newValue)}>
-          <Tab label="Sleep Quality" />
-          <Tab label="Stress Level" />
-          <Tab label="Exercise" />
+          {FACTORS.map((f) => (
+            <Tab key={f.key} label={f.label} />
+          ))}
         </Tabs>
       </Box>
 
       <Box sx={{ height: 400, position: 'relative' }}>
-        {activeTab === 0 && sleepData && (
-          <Scatter data={sleepData} options={scatterOptions} />
-        )}
-        {activeTab === 1 && stressData && (
-          <Scatter data={stressData} options={scatterOptions} />
-        )}
-        {activeTab === 2 && exerciseData && (
-          <Bar data={exerciseData} options={barOptions} />
-        )}
+        {chartData && <Bar data={chartData} options={barOptions} />}
+      </Box>
+
+      <Box mt={2}>
+        <Typography variant="body2" color="text.secondary">
+          <strong>Same day:</strong> systolic r = {formatCoefficient(current.same_day.systolic.pearson)}
+          {' '}(Spearman {formatCoefficient(current.same_day.systolic.spearman)}), diastolic r ={' '}
+          {formatCoefficient(current.same_day.diastolic.pearson)}
+          {' '}(Spearman {formatCoefficient(current.same_day.diastolic.spearman)})
+        </Typography>
+        <Typography variant="body2" color="text.secondary">
+          <strong>Next day:</strong> systolic r = {formatCoefficient(current.next_day.systolic.pearson)}
+          {' '}(Spearman {formatCoefficient(current.next_day.systolic.spearman)}), diastolic r ={' '}
+          {formatCoefficient(current.next_day.diastolic.pearson)}
+          {' '}(Spearman {formatCoefficient(current.next_day.diastolic.spearman)})
+        </Typography>
       </Box>
     </Paper>
   )
 }
 
 export default CorrelationChart
-
@@ -145,13 +145,18 @@ const ReadingsTable: React.FC<ReadingsTableProps> = ({
                   </TableCell>
                   <TableCell>{reading.notes || '-'}</TableCell>
                   <TableCell align="right">
-                    <IconButton
-                      size="small"
-                      onClick={() => reading.id && handleDelete(reading.id)}
-                      color="error"
-                    >
-                      <DeleteIcon />
-                    </IconButton>
+                    {reading.archived ? (
+                      // Archived readings are read-only
+                      <Chip label="Archived" size="small" variant="outlined" />
+                    ) : (
+                      <IconButton
+                        size="small"
+                        onClick={() => reading.id && handleDelete(reading.id)}
+                        color="error"
+                      >
+                        <DeleteIcon />
+                      </IconButton>
+                    )}
                   </TableCell>
                 </TableRow>
               ))
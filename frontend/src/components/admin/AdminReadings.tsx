@@ -259,20 +259,27 @@ const AdminReadings: React.FC<AdminReadingsProps> = ({ onUpdate }) => {
                       : '-'}
                   </TableCell>
                   <TableCell align="right">
-                    <IconButton
-                      size="small"
-                      onClick={() => handleOpenDialog(reading)}
-                      color="primary"
-                    >
-                      <EditIcon />
-                    </IconButton>
-                    <IconButton
-                      size="small"
-                      onClick={() => reading.id && handleDelete(reading.id)}
-                      color="error"
-                    >
-                      <DeleteIcon />
-                    </IconButton>
+                    {reading.archived ? (
+                      // Archived readings are read-only
+                      <Chip label="Archived" size="small" variant="outlined" />
+                    ) : (
+                      <>
+                        <IconButton
+                          size="small"
+                          onClick={() => handleOpenDialog(reading)}
+                          color="primary"
+                        >
+                          <EditIcon />
+                        </IconButton>
+                        <IconButton
+                          size="small"
+                          onClick={() => reading.id && handleDelete(reading.id)}
+                          color="error"
+                        >
+                          <DeleteIcon />
+                        </IconButton>
+                      </>
+                    )}
                   </TableCell>
                 </TableRow>
               ))
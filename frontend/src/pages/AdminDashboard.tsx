@@ -20,6 +20,7 @@ import LogoutIcon from '@mui/icons-material/Logout'
 import { useAuth } from '../contexts/AuthContext'
 import { useAdmin } from '../contexts/AdminContext'
 import apiClient from '../config/axios'
+import { AdminSummary } from '../types'
 import AdminUsers from '../components/admin/AdminUsers'
 import AdminReadings from '../components/admin/AdminReadings'
 import AdminHealthFactors from '../components/admin/AdminHealthFactors'
@@ -30,13 +31,7 @@ const AdminDashboard = () => {
   const { isAdmin, loading } = useAdmin()
   const navigate = useNavigate()
   const [activeTab, setActiveTab] = useState(0)
-  const [stats, setStats] = useState({
-    totalUsers: 0,
-    totalPatients: 0,
-    totalReadings: 0,
-    totalHealthFactors: 0,
-    totalInsights: 0,
-  })
+  const [stats, setStats] = useState<AdminSummary | null>(null)
 
   useEffect(() => {
     if (!loading && !isAdmin) {
@@ -50,42 +45,12 @@ const AdminDashboard = () => {
 
   const fetchStats = async () => {
     try {
-      // Fetch all data with error handling
-      const [usersRes, readingsRes, factorsRes, insightsRes] = await Promise.all([
-        apiClient.get('/api/auth/users/').catch(() => ({ data: [] })),
-        apiClient.get('/api/readings/').catch(() => ({ data: [] })),
-        apiClient.get('/api/health-factors/').catch(() => ({ data: [] })),
-        apiClient.get('/api/insights/').catch(() => ({ data: [] })),
-      ])
-
-      // Handle paginated or direct array responses
-      const users = usersRes.data.results || usersRes.data || []
-      const readings = readingsRes.data.results || readingsRes.data || []
-      const factors = factorsRes.data.results || factorsRes.data || []
-      const insights = insightsRes.data.results || insightsRes.data || []
-
-      const totalUsers = Array.isArray(users) ? users.length : 0
-      const totalPatients = Array.isArray(users) 
-        ? users.filter((u: any) => u.email?.includes('@patient.example.com')).length 
-        : 0
-
-      setStats({
-        totalUsers,
-        totalPatients,
-        totalReadings: Array.isArray(readings) ? readings.length : 0,
-        totalHealthFactors: Array.isArray(factors) ? factors.length : 0,
-        totalInsights: Array.isArray(insights) ? insights.length : 0,
-      })
+      // One request; totals are counted on the server
+      const response = await apiClient.get('/api/admin/summary/')
+      setStats(response.data)
     } catch (error) {
       console.error('Failed to fetch stats:', error)
-      // Set defaults on error
-      setStats({
-        totalUsers: 0,
-        totalPatients: 0,
-        totalReadings: 0,
-        totalHealthFactors: 0,
-        totalInsights: 0,
-      })
+      setStats(null)
     }
   }
 
@@ -137,7 +102,7 @@ const AdminDashboard = () => {
                   Total Users
                 </Typography>
                 <Typography variant="h4">
-                  {stats.totalUsers}
+                  {stats?.users.total ?? 0}
                 </Typography>
               </CardContent>
             </Card>
@@ -149,7 +114,10 @@ const AdminDashboard = () => {
                   Patients
                 </Typography>
                 <Typography variant="h4">
-                  {stats.totalPatients}
+                  {stats?.users.patients ?? 0}
+                </Typography>
+                <Typography variant="body2" color="textSecondary">
+                  {stats?.active_users.last_7_days ?? 0} active in the last 7 days
                 </Typography>
               </CardContent>
             </Card>
@@ -161,7 +129,7 @@ const AdminDashboard = () => {
                   Readings
                 </Typography>
                 <Typography variant="h4">
-                  {stats.totalReadings}
+                  {stats?.readings.total ?? 0}
                 </Typography>
               </CardContent>
             </Card>
@@ -173,7 +141,7 @@ const AdminDashboard = () => {
                   Health Factors
                 </Typography>
                 <Typography variant="h4">
-                  {stats.totalHealthFactors}
+                  {stats?.health_factors.total ?? 0}
                 </Typography>
               </CardContent>
             </Card>
@@ -185,7 +153,10 @@ const AdminDashboard = () => {
                   Insights
                 </Typography>
                 <Typography variant="h4">
-                  {stats.totalInsights}
+                  {stats?.insights.total ?? 0}
+                </Typography>
+                <Typography variant="body2" color="textSecondary">
+                  {stats?.insights.unread ?? 0} unread
                 </Typography>
               </CardContent>
             </Card>
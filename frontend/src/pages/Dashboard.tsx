@@ -27,6 +27,9 @@ import NotificationPreferences from '../components/NotificationPreferences'
 import { BloodPressureReading, HealthFactor, Medication } from '../types'
 import apiClient from '../config/axios'
 
+// Longest wait for a background PDF render before the export gives up
+const PDF_REPORT_MAX_WAIT_MS = 2 * 60 * 1000
+
 const Dashboard = () => {
   const { user, logout } = useAuth()
   const navigate = useNavigate()
@@ -38,33 +41,32 @@ const Dashboard = () => {
   const [medicationsLoading, setMedicationsLoading] = useState(true)
   const [activeTab, setActiveTab] = useState(0)
   const [editingMedication, setEditingMedication] = useState<Medication | null>(null)
+  const [allMedicationsLoaded, setAllMedicationsLoaded] = useState(false)
 
-  const fetchReadings = async () => {
+  // Recent readings, factors and active medications arrive in one request;
+  // the browser revalidates it with the ETag, so repeat visits are cheap
+  const fetchDashboard = async () => {
     try {
-      const response = await apiClient.get('/api/readings/')
-      setReadings(response.data.results || response.data)
+      const response = await apiClient.get('/api/dashboard/')
+      setReadings(response.data.readings)
+      setHealthFactors(response.data.health_factors)
+      setMedications(response.data.active_medications)
     } catch (error) {
-      console.error('Failed to fetch readings:', error)
+      console.error('Failed to fetch dashboard:', error)
     } finally {
       setLoading(false)
-    }
-  }
-
-  const fetchHealthFactors = async () => {
-    try {
-      const response = await apiClient.get('/api/health-factors/')
-      setHealthFactors(response.data.results || response.data)
-    } catch (error) {
-      console.error('Failed to fetch health factors:', error)
-    } finally {
       setFactorsLoading(false)
+      setMedicationsLoading(false)
     }
   }
 
+  // The medications tab also lists inactive medications
   const fetchMedications = async () => {
+    setMedicationsLoading(true)
     try {
       const response = await apiClient.get('/api/medications/medications/')
       setMedications(response.data.results || response.data)
+      setAllMedicationsLoaded(true)
     } catch (error) {
       console.error('Failed to fetch medications:', error)
     } finally {
@@ -73,11 +75,15 @@ const Dashboard = () => {
   }
 
   useEffect(() => {
-    fetchReadings()
-    fetchHealthFactors()
-    fetchMedications()
+    fetchDashboard()
   }, [])
 
+  useEffect(() => {
+    if (activeTab === 2 && !allMedicationsLoaded) {
+      fetchMedications()
+    }
+  }, [activeTab])
+
   const handleLogout = () => {
     logout()
     navigate('/login')
@@ -183,7 +189,25 @@ const Dashboard = () => {
                   onReadingDeleted={handleReadingDeleted}
                   onExportPDF={async () => {
                     try {
+                      // Request the report, then poll until the background render is done
+                      // (or give up, e.g. when no worker picks the task up)
+                      let { data: report } = await apiClient.post('/api/readings/export-pdf/')
+                      const deadline = Date.now() + PDF_REPORT_MAX_WAIT_MS
+                      while (report.status === 'pending' || report.status === 'running') {
+                        if (Date.now() > deadline) {
+                          throw new Error('Report generation timed out')
+                        }
+                        await new Promise((resolve) => setTimeout(resolve, 1500))
+                        const statusResponse = await apiClient.get('/api/readings/export-pdf/status/', {
+                          params: { report_id: report.report_id },
+                        })
+                        report = statusResponse.data
+                      }
+                      if (report.status !== 'ready') {
+                        throw new Error(`Report generation ${report.status}`)
+                      }
                       const response = await apiClient.get('/api/readings/export-pdf/', {
+                        params: { report_id: report.report_id },
                         responseType: 'blob',
                       })
                       const url = window.URL.createObjectURL(new Blob([response.data]))
@@ -23,6 +23,7 @@ export interface BloodPressureReading {
   created_at?: string
   updated_at?: string
   category?: 'normal' | 'elevated' | 'high_stage1' | 'high_stage2'
+  archived?: boolean
 }
 
 export interface HealthFactor {
@@ -74,3 +75,20 @@ export interface UserInsight {
   is_read: boolean
   severity: 'low' | 'medium' | 'high'
 }
+
+export interface AdminSummary {
+  users: { total: number; staff: number; patients: number }
+  active_users: { last_7_days: number; last_30_days: number }
+  readings: {
+    total: number
+    categories: Record<'normal' | 'elevated' | 'high_stage1' | 'high_stage2', number>
+  }
+  health_factors: { total: number }
+  insights: {
+    total: number
+    unread: number
+    unread_by_severity: Record<'low' | 'medium' | 'high', number>
+    types: Record<UserInsight['insight_type'], number>
+  }
+  generated_at: string
+}